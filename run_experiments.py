@@ -1,14 +1,32 @@
 #!/usr/bin/env python3
 import argparse
+import glob
+import hashlib
+import json
 import os
+import re
+import shlex
 import signal
 import socket
 import subprocess
 import sys
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "util"))
+import gnuTime  # noqa: E402
+import metricsStore  # noqa: E402
+import remoteExecutor  # noqa: E402
+import resourceSampler  # noqa: E402
+import stageCache  # noqa: E402
+import suiteJournal  # noqa: E402
+import suiteProgress  # noqa: E402
+import sweepPruner  # noqa: E402
+import sweepSpec  # noqa: E402
 
 # ==============================================================================
 # Safety: signals + process-group kill
@@ -28,22 +46,46 @@ def _install_signal_handlers():
             pass
 
 
+# A remote worker (util/remoteExecutor.py) sets _log_redirect so that log files
+# are streamed back to the submitting host: _log_redirect(log_path, append)
+# returns the file to write instead. _active_procs are the running commands.
+_log_redirect = None
+_active_procs = set()
+
+
+def _open_log(log_path: Path, append: bool = False):
+    if _log_redirect is not None:
+        return _log_redirect(log_path, append)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    return open(log_path, "a" if append else "w", encoding="utf-8")
+
+
 def _run_command_with_log(
     cmd: Sequence[str],
     log_path: Path,
     cwd: Optional[Path] = None,
     env: Optional[dict] = None,
+    append: bool = False,
+    echo_cmd: bool = False,
+    stage: str = "",
+    sample_interval: float = 0.0,
+    stop_path: Optional[Path] = None,
 ):
     """
-    Run a command, redirect stdout/stderr to log_path.
+    Run a command, redirect stdout/stderr to log_path (appended to if append;
+    echo_cmd first writes the command line, like bash -x).
     Start a new process group so we can kill the whole tree via killpg on interrupt.
+    With sample_interval > 0 the tree's resource usage is recorded under `stage`
+    in the usage file next to log_path (util/resourceSampler.py). The tree is
+    also killed once stop_path appears (see _stop_path).
     """
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-
     # 兼容性处理：Windows/非POSIX环境没有 os.setsid
     preexec = getattr(os, "setsid", None)
 
-    with open(log_path, "w") as log_file:
+    with _open_log(log_path, append) as log_file:
+        if echo_cmd:
+            log_file.write("+ " + " ".join(shlex.quote(c) for c in cmd) + "\n")
+            log_file.flush()
         proc = subprocess.Popen(
             list(cmd),
             stdout=log_file,
@@ -52,9 +94,20 @@ def _run_command_with_log(
             preexec_fn=preexec,
             env=env,
         )
+        _active_procs.add(proc)
+        sampler = None
+        if sample_interval > 0 and preexec and resourceSampler.ProcessTreeSampler.available():
+            usage = resourceSampler.open_usage(resourceSampler.usage_path(log_path), append, _open_log)
+            sampler = resourceSampler.ProcessTreeSampler(proc.pid, usage, stage or Path(cmd[-1]).name,
+                                                         sample_interval).start()
+        stopped = threading.Event()
+        if stop_path is not None and preexec and hasattr(os, "killpg"):
+            threading.Thread(target=_stop_on_request, args=(proc, stop_path, log_file, stopped),
+                             daemon=True).start()
 
+        rusage = None
         try:
-            ret = proc.wait()
+            ret, rusage = _wait_with_rusage(proc)
             if ret != 0:
                 raise subprocess.CalledProcessError(ret, list(cmd))
         except KeyboardInterrupt:
@@ -75,6 +128,45 @@ def _run_command_with_log(
             except Exception:
                 pass
             raise
+        finally:
+            stopped.set()
+            _active_procs.discard(proc)
+            if sampler is not None:
+                sampler.stop(rusage)
+
+
+# Seconds between checks for a stop request
+STOP_POLL = 1.0
+
+
+def _stop_on_request(proc: subprocess.Popen, stop_path: Path, log_file, done: threading.Event) -> None:
+    """Watcher thread: kill proc's process group once stop_path appears (it holds the reason)."""
+    while not done.wait(STOP_POLL):
+        try:
+            reason = stop_path.read_text(encoding="utf-8").strip()
+        except OSError:
+            continue
+        if proc.returncode is not None:
+            return
+        try:
+            log_file.write(f"\n[MAIN] Stopped: {reason}\n")
+            log_file.flush()
+        except (OSError, ValueError):
+            pass
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except OSError:
+            pass
+        return
+
+
+def _wait_with_rusage(proc: subprocess.Popen):
+    """proc.wait(), also returning the rusage of the finished tree where the OS has wait4."""
+    if not hasattr(os, "wait4"):
+        return proc.wait(), None
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, rusage
 
 
 # ==============================================================================
@@ -90,6 +182,27 @@ class RunConfig:
     repo_root: Path  # local repo root (where test/ exists)
     do_run: bool
     do_eval: bool
+    sample_interval: float = resourceSampler.SAMPLE_INTERVAL  # 0: no resource sampling
+    # env.sh's variables, resolved once by the parent (see _load_env_from_script)
+    env: Tuple[Tuple[str, str], ...] = field(default=(), compare=False, repr=False)
+    point: sweepSpec.Point = ()  # sweep point: variables set for this task's scripts
+
+
+def _case_name(cfg: RunConfig) -> str:
+    """The case, suffixed with its sweep point: aes@hbPitch=hbPitch_0p2"""
+    return f"{cfg.case}@{sweepSpec.point_tag(cfg.point)}" if cfg.point else cfg.case
+
+
+def _stop_path(cfg: RunConfig) -> Optional[Path]:
+    """File whose appearance stops a sweep point's running command (see util/sweepPruner.py)."""
+    if not cfg.point:
+        return None
+    return Path(f"run_logs/{cfg.tech}/{cfg.flow}/{_case_name(cfg)}.stop")
+
+
+def _flow_kind(flow: str) -> str:
+    """ord/cds for a flow directory such as ord_pitch or cds_clock."""
+    return flow.split("_", 1)[0]
 
 
 def _log_paths(flow: str, tech: str, case: str) -> Tuple[Path, Path]:
@@ -106,9 +219,39 @@ def _script_paths(repo_root: Path, flow: str, tech: str,
     return run_script, eval_script
 
 
-def _load_env_from_script(env_script: Path) -> None:
-    if not env_script.exists():
-        return
+# env.sh is resolved once per suite, in the parent: the variables it sets or
+# changes (its delta) are applied to os.environ and shipped to the workers in
+# RunConfig.env, so workers never start a login shell. Deltas are cached in
+# <repo>/objects/env_cache by a hash of env.sh, the files a login shell reads,
+# the current environment and cwd (env.sh reads both).
+ENV_CACHE_VERSION = 1
+_ENV_SHELL_VARS = ("_", "SHLVL", "PWD", "OLDPWD")  # set by bash itself
+_LOGIN_FILES = ("/etc/profile", "~/.bash_profile", "~/.bash_login", "~/.profile")
+_env_deltas: Dict[str, Dict[str, str]] = {}
+
+
+def _env_cache_key(env_script: Path) -> str:
+    h = hashlib.sha256(f"v{ENV_CACHE_VERSION}\0{os.getcwd()}\0".encode())
+    h.update(env_script.read_bytes())
+    for name in _LOGIN_FILES:
+        try:
+            st = os.stat(os.path.expanduser(name))
+            h.update(f"\0{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+        except OSError:
+            pass
+    for key in sorted(os.environ):
+        h.update(f"\0{key}={os.environ[key]}".encode(errors="surrogateescape"))
+    return h.hexdigest()
+
+
+def _resolve_env_script(env_script: Path) -> Dict[str, str]:
+    """Variables `bash -lc 'source env.sh'` sets or changes relative to os.environ."""
+    cache_path = env_script.parent / "objects" / "env_cache" / f"{_env_cache_key(env_script)}.json"
+    try:
+        with cache_path.open(encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
     cmd = [
         "bash",
         "-lc",
@@ -118,11 +261,44 @@ def _load_env_from_script(env_script: Path) -> None:
                           stdout=subprocess.PIPE,
                           stderr=subprocess.PIPE,
                           check=True)
+    delta = {}
     for entry in proc.stdout.split(b"\0"):
         if not entry:
             continue
         key, _, value = entry.partition(b"=")
-        os.environ[key.decode(errors="ignore")] = value.decode(errors="ignore")
+        key, value = key.decode(errors="ignore"), value.decode(errors="ignore")
+        if key not in _ENV_SHELL_VARS and os.environ.get(key) != value:
+            delta[key] = value
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+        # The environment may hold credentials: keep the snapshot private
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(delta, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return delta
+
+
+def _load_env_from_script(env_script: Path) -> Dict[str, str]:
+    """Apply env.sh's delta to os.environ (resolved once per process) and return it."""
+    if not env_script.exists():
+        return {}
+    key = str(env_script.resolve())
+    if key not in _env_deltas:
+        _env_deltas[key] = _resolve_env_script(env_script)
+    os.environ.update(_env_deltas[key])
+    return _env_deltas[key]
+
+
+def _task_env(cfg: RunConfig) -> dict:
+    """Environment of a task's commands: this process's plus the suite's env.sh delta and sweep point."""
+    env = os.environ.copy()
+    env.update(cfg.env)
+    env.update(cfg.point)
+    return env
 
 
 def run_one(cfg: RunConfig) -> str:
@@ -132,23 +308,21 @@ def run_one(cfg: RunConfig) -> str:
     - ord: run.sh + eval.sh locally
     """
     _install_signal_handlers()
-    _load_env_from_script(cfg.repo_root / "env.sh")
+    env = _task_env(cfg)
 
     pid = os.getpid()
     host = socket.gethostname()
 
-    run_log, eval_log = _log_paths(cfg.flow, cfg.tech, cfg.case)
+    run_log, eval_log = _log_paths(cfg.flow, cfg.tech, _case_name(cfg))
     # 兼容 Python 3.6: unlink(missing_ok=True) 改为 try-except
-    if cfg.do_run:
-        try:
-            run_log.unlink()
-        except FileNotFoundError:
-            pass
-    if cfg.do_eval:
-        try:
-            eval_log.unlink()
-        except FileNotFoundError:
-            pass
+    for enabled, log_path in ((cfg.do_run, run_log), (cfg.do_eval, eval_log)):
+        if not enabled:
+            continue
+        for path in (log_path, resourceSampler.usage_path(log_path)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
 
     run_script, eval_script = _script_paths(cfg.repo_root, cfg.flow, cfg.tech,
                                             cfg.case)
@@ -159,7 +333,7 @@ def run_one(cfg: RunConfig) -> str:
     elif cfg.do_eval and not cfg.do_run:
         mode = "eval-only"
     print(
-        f"[{pid}] Start {cfg.flow.upper()} tech={cfg.tech} case={cfg.case} mode={mode} on host={host}"
+        f"[{pid}] Start {cfg.flow.upper()} tech={cfg.tech} case={_case_name(cfg)} mode={mode} on host={host}"
     )
 
     # --- run.sh (local) ---
@@ -174,19 +348,27 @@ def run_one(cfg: RunConfig) -> str:
                 ["bash", str(run_script)],
                 run_log,
                 cwd=cfg.repo_root,
-                env=os.environ.copy(),
+                env=env,
+                stage="run.sh",
+                sample_interval=cfg.sample_interval,
+                stop_path=_stop_path(cfg),
             )
         except subprocess.CalledProcessError:
-            msg = f"[{pid}] ERROR: run.sh failed ({cfg.flow}/{cfg.tech}/{cfg.case}). See {run_log}"
+            msg = f"[{pid}] ERROR: run.sh failed ({_task_label(cfg)}). See {run_log}"
             print(msg)
             return msg
 
     # --- eval.sh ---
+    stop_path = _stop_path(cfg)
+    if cfg.do_eval and stop_path is not None and stop_path.exists():
+        msg = f"[{pid}] ERROR: stopped ({_task_label(cfg)})"
+        print(msg)
+        return msg
     if not cfg.do_eval:
-        ok = f"[{pid}] OK: {cfg.flow}/{cfg.tech}/{cfg.case}"
+        ok = f"[{pid}] OK: {_task_label(cfg)}"
         print(ok)
         return ok
-    if cfg.flow == "cds":
+    if _flow_kind(cfg.flow) == "cds":
         if not eval_script.exists():
             msg = f"[{pid}] ERROR: eval.sh not found: {eval_script}"
             print(msg)
@@ -196,14 +378,17 @@ def run_one(cfg: RunConfig) -> str:
                 ["bash", str(eval_script)],
                 eval_log,
                 cwd=cfg.repo_root,
-                env=os.environ.copy(),
+                env=env,
+                stage="eval.sh",
+                sample_interval=cfg.sample_interval,
+                stop_path=_stop_path(cfg),
             )
         except subprocess.CalledProcessError:
-            msg = f"[{pid}] ERROR: eval.sh failed ({cfg.flow}/{cfg.tech}/{cfg.case}). See {eval_log}"
+            msg = f"[{pid}] ERROR: eval.sh failed ({_task_label(cfg)}). See {eval_log}"
             print(msg)
             return msg
 
-    elif cfg.flow == "ord":
+    elif _flow_kind(cfg.flow) == "ord":
         if not eval_script.exists():
             msg = f"[{pid}] ERROR: eval.sh not found: {eval_script}"
             print(msg)
@@ -213,20 +398,893 @@ def run_one(cfg: RunConfig) -> str:
                 ["bash", str(eval_script)],
                 eval_log,
                 cwd=cfg.repo_root,
-                env=os.environ.copy(),
+                env=env,
+                stage="eval.sh",
+                sample_interval=cfg.sample_interval,
+                stop_path=_stop_path(cfg),
             )
         except subprocess.CalledProcessError:
-            msg = f"[{pid}] ERROR: eval.sh failed ({cfg.flow}/{cfg.tech}/{cfg.case}). See {eval_log}"
+            msg = f"[{pid}] ERROR: eval.sh failed ({_task_label(cfg)}). See {eval_log}"
             print(msg)
             return msg
     else:
         return f"[{pid}] ERROR: unknown flow={cfg.flow}"
 
-    ok = f"[{pid}] OK: {cfg.flow}/{cfg.tech}/{cfg.case}"
+    ok = f"[{pid}] OK: {_task_label(cfg)}"
     print(ok)
     return ok
 
 
+# ==============================================================================
+# Stage-level scheduling
+# ==============================================================================
+#
+# test/<tech>/<case>/<flow>/{run,eval}.sh follow one template: source env.sh,
+# export the design variables, then call a fixed chain of Makefile targets
+# (ord-synth -> ord-preplace -> ... -> ord-final). parse_flow_script() turns
+# such a script into its make steps, and every step becomes one stage in a
+# DAG: the stages of one script form a chain (they share RESULTS_DIR), eval
+# stages follow the last run stage, and different tasks are independent.
+#
+# All stages of all tasks share one worker pool. Ready stages are started in
+# order of their remaining critical path (the estimated cost of the stage and
+# everything after it), so long chains such as ariane133 start first and
+# cheap stages of small designs fill the gaps. A script that does not match
+# the template runs unchanged as a single opaque stage.
+
+# Rough relative cost of each Makefile stage ("ord-"/"cds-" prefix dropped),
+# used to rank ready stages; unknown targets count as 1.
+STAGE_WEIGHTS = {
+    "clean_all": 0.05,
+    "synth": 4.0,
+    "preplace": 1.0,
+    "tier-partition": 2.0,
+    "pre": 0.5,
+    "3d-pdn": 1.0,
+    "place-init": 2.0,
+    "place-init-upper": 2.0,
+    "place-init-bottom": 2.0,
+    "place-upper": 3.0,
+    "place-bottom": 3.0,
+    "place-finish": 1.0,
+    "pre-opt": 0.2,
+    "legalize-upper": 2.0,
+    "legalize-bottom": 2.0,
+    "cts": 4.0,
+    "route": 12.0,
+    "final": 2.0,
+}
+
+_EXPORT_RE = re.compile(r"^export\s+([A-Za-z_][A-Za-z0-9_]*)=(.*)$")
+_ASSIGN_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)=(\S*)$")
+_FOR_RE = re.compile(r"^for\s*\(\(\s*i\s*=\s*1\s*;\s*i\s*<=\s*(\$?\w+)\s*;\s*i\s*\+\+\s*\)\)\s*(;\s*do)?$")
+# Plain file commands allowed between make calls (run through bash -c)
+_SHELL_STEP_RE = re.compile(r"^(rm|cp|mkdir|ln|mv)\s")
+_MK_ASSIGN_RE = re.compile(r"^[ \t]*(?:export[ \t]+|override[ \t]+)*([A-Za-z_][A-Za-z0-9_]*)[ \t]*(\?|:|::)?="
+                           r"([^#\n]*)", re.M)
+_VAR_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}|\$([A-Za-z_][A-Za-z0-9_]*)")
+
+
+@dataclass(frozen=True)
+class FlowStep:
+    name: str  # unique within its script: target, target#2, ... for repeats
+    target: str  # Makefile target, or "run.sh"/"eval.sh" for an opaque script
+    cmd: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class FlowScript:
+    exports: Tuple[Tuple[str, str], ...]
+    steps: Tuple[FlowStep, ...]
+
+
+def _expand_vars(text: str, variables: Dict[str, str]) -> str:
+    return _VAR_RE.sub(lambda m: variables.get(m.group(1) or m.group(2), ""), text)
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_flow_script(path: Path, base_env: Dict[str, str]) -> Optional[FlowScript]:
+    """
+    Parse a templated run.sh/eval.sh into (exports, make steps). Returns None
+    if the script contains anything beyond the template (exports, simple
+    assignments, echo, "for ((i=1;i<=N;i++))" loops and make calls after the
+    env.sh preamble, plus rm/cp/mkdir/ln/mv file commands), in which case it
+    must be run as-is.
+    """
+    try:
+        lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+    except OSError:
+        return None
+
+    # Skip the env.sh lookup preamble
+    for i, line in enumerate(lines):
+        if re.match(r'^\s*source\s+"?\$\{?FLOW_ROOT\}?/env\.sh"?\s*$', line):
+            lines = lines[i + 1:]
+            break
+    else:
+        return None
+
+    variables = dict(base_env)
+    exports: List[Tuple[str, str]] = []
+    steps: List[FlowStep] = []
+    seen: Dict[str, int] = {}
+    loop: Optional[Tuple[int, int]] = None  # (repeat count, first step index)
+    pending_for: Optional[int] = None
+
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if pending_for is not None:
+            if line != "do":
+                return None
+            loop, pending_for = (pending_for, len(steps)), None
+            continue
+        m = _FOR_RE.match(line)
+        if m and loop is None:
+            count = _expand_vars(m.group(1), variables) if m.group(1).startswith("$") \
+                else variables.get(m.group(1), m.group(1))
+            if not count.isdigit():
+                return None
+            if m.group(2):
+                loop = (int(count), len(steps))
+            else:
+                pending_for = int(count)
+            continue
+        if line == "done" and loop is not None:
+            count, first = loop
+            body = steps[first:]
+            for _ in range(count - 1):
+                steps.extend(body)
+            if count == 0:
+                del steps[first:]
+            loop = None
+            continue
+        m = _EXPORT_RE.match(line)
+        if m:
+            value = _expand_vars(_unquote(m.group(2)), variables)
+            variables[m.group(1)] = value
+            exports.append((m.group(1), value))
+            continue
+        m = _ASSIGN_RE.match(line)
+        if m:
+            variables[m.group(1)] = _expand_vars(_unquote(m.group(2)), variables)
+            continue
+        if line.startswith("echo "):
+            continue
+        if line.startswith("make "):
+            try:
+                argv = shlex.split(_expand_vars(line, variables))
+            except ValueError:
+                return None
+            targets = [a for a in argv[1:] if "=" not in a and not a.startswith("-")]
+            if len(targets) != 1:
+                return None
+            steps.append(FlowStep(targets[0], targets[0], tuple(argv)))
+            continue
+        m = _SHELL_STEP_RE.match(line)
+        if m and not re.search(r"[;&|<>`(]|\$\(", line):
+            steps.append(FlowStep(m.group(1), m.group(1), ("bash", "-c", _expand_vars(line, variables))))
+            continue
+        return None
+
+    if loop is not None or pending_for is not None:
+        return None
+    named = []
+    for step in steps:
+        seen[step.target] = seen.get(step.target, 0) + 1
+        name = step.target if seen[step.target] == 1 else f"{step.target}#{seen[step.target]}"
+        named.append(FlowStep(name, step.target, step.cmd))
+    return FlowScript(tuple(exports), tuple(named))
+
+
+def _opaque_script(script: Path) -> FlowScript:
+    return FlowScript((), (FlowStep(script.name, script.name, ("bash", str(script))),))
+
+
+def stage_weight(target: str) -> float:
+    if target == "run.sh":
+        return sum(STAGE_WEIGHTS.values())
+    if target == "eval.sh":
+        return STAGE_WEIGHTS["final"]
+    if target in ("rm", "cp", "mkdir", "ln", "mv"):
+        return STAGE_WEIGHTS["clean_all"]
+    for prefix in ("ord-", "cds-"):
+        if target.startswith(prefix):
+            target = target[len(prefix):]
+            break
+    return STAGE_WEIGHTS.get(target, 1.0)
+
+
+def design_scale(repo_root: Path, case: str) -> float:
+    """
+    Rough size prior for a design: 1 + RTL bytes / 100 kB under designs/src.
+    Only used to rank stages; a missing source tree counts as a mid-size design.
+    """
+    names = {case, case.split("_")[0]}
+    total = 0
+    for name in names:
+        for path in glob.glob(str(repo_root / "designs" / "src" / (name + "*") / "**" / "*"), recursive=True):
+            if os.path.isfile(path):
+                total += os.path.getsize(path)
+    return 1.0 + total / 100e3 if total else 3.0
+
+
+# ==============================================================================
+# Resource model: predicted memory / cores per stage
+# ==============================================================================
+#
+# Predictions come from earlier runs of the same design and variant: the
+# "<stage>__mem__peak" (KB), "<stage>__cpu__total" (user s) and
+# "<stage>__runtime__total" (wall) entries genMetrics.py writes to
+# metadata*.json under the task's reports/logs directories. A Makefile stage
+# uses the metrics of the genMetrics stages it covers; stages without their
+# own metrics fall back to the design's overall peak memory and average core
+# use, and designs without history to the --default-* values.
+
+# genMetrics stage prefixes covered by each Makefile stage (prefix dropped)
+METRIC_STAGES = {
+    "synth": ("synth",),
+    "preplace": ("floorplan", "floorplan_io", "floorplan_macro", "floorplan_tap"),
+    "3d-pdn": ("floorplan_pdn",),
+    "place-init": ("globalplace_skip_io", "globalplace_io", "globalplace"),
+    "place-upper": ("globalplace",),
+    "place-bottom": ("globalplace",),
+    "legalize-upper": ("placeopt", "detailedplace"),
+    "legalize-bottom": ("placeopt", "detailedplace"),
+    "cts": ("cts",),
+    "route": ("globalroute", "fillcell", "detailedroute"),
+    "final": ("finish", "finish_merge"),
+}
+
+# Seconds per STAGE_WEIGHTS unit for stages without a recorded runtime
+SECONDS_PER_WEIGHT = 60.0
+
+
+@dataclass(frozen=True)
+class StageDemand:
+    mem_kb: float
+    cores: float
+    seconds: Optional[float] = None  # predicted wall time, if known
+
+
+def _parse_runtime(value) -> Optional[float]:
+    """genMetrics "__runtime__total" ([h:]m:s[.frac]) -> seconds."""
+    return gnuTime.parse_duration(str(value))
+
+
+def _as_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_history_metrics(dirs: Iterable[Path]) -> Dict[str, Dict[str, float]]:
+    """
+    Collect {stage: {"mem": KB, "cpu": s, "wall": s}} from the newest
+    metadata*.json in dirs (flat or --hier genMetrics output).
+    """
+    files = []
+    for d in dirs:
+        files.extend(Path(p) for p in glob.glob(str(d / "metadata*.json")))
+    if not files:
+        return {}
+    newest = max(files, key=lambda p: p.stat().st_mtime)
+    try:
+        with open(newest) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    flat = metricsStore.flatten(data)  # --hier: {"synth": {"mem__peak": ...}}
+
+    stages: Dict[str, Dict[str, float]] = {}
+    for key, value in flat.items():
+        for suffix, metric, conv in (("__mem__peak", "mem", _as_float),
+                                     ("__cpu__total", "cpu", _as_float),
+                                     ("__runtime__total", "wall", _parse_runtime)):
+            if key.endswith(suffix):
+                v = conv(value)
+                if v is not None:
+                    stages.setdefault(key[:-len(suffix)], {})[metric] = v
+    return stages
+
+
+class ResourceModel:
+    """Per-stage StageDemand predictions for one task (see METRIC_STAGES)."""
+
+    def __init__(self, history: Dict[str, Dict[str, float]], default_mem_kb: float,
+                 default_cores: float, max_cores: float):
+        self.history = history
+        self.max_cores = max_cores
+        mems = [h["mem"] for h in history.values() if "mem" in h]
+        cpu = sum(h.get("cpu", 0.0) for h in history.values() if "wall" in h)
+        wall = sum(h["wall"] for h in history.values() if "wall" in h and "cpu" in h)
+        self.task_mem_kb = max(mems) if mems else default_mem_kb
+        self.task_cores = self._cores(cpu, wall) if wall > 0 else default_cores
+
+    def _cores(self, cpu: float, wall: float) -> float:
+        return min(self.max_cores, max(1.0, cpu / wall))
+
+    def predict(self, target: str) -> StageDemand:
+        key = target.split("-", 1)[1] if target.startswith(("ord-", "cds-")) else target
+        if key.startswith("place-init"):
+            key = "place-init"
+        metrics = [self.history[m] for m in METRIC_STAGES.get(key, ()) if m in self.history]
+        if target == "run.sh":
+            metrics = list(self.history.values())
+        if not metrics:
+            return StageDemand(self.task_mem_kb, self.task_cores)
+
+        mems = [m["mem"] for m in metrics if "mem" in m]
+        timed = [m for m in metrics if "wall" in m]
+        wall = sum(m["wall"] for m in timed)
+        cpu = sum(m.get("cpu", 0.0) for m in timed)
+        return StageDemand(
+            max(mems) if mems else self.task_mem_kb,
+            self._cores(cpu, wall) if wall > 0 and cpu > 0 else self.task_cores,
+            wall if timed else None,
+        )
+
+
+def _history_dirs(cfg: RunConfig, exports: Dict[str, str]) -> List[Path]:
+    """Directories of the task's previous run that may hold metadata*.json."""
+    design = exports.get("DESIGN_NICKNAME", cfg.case)
+    variant = exports.get("FLOW_VARIANT", "base")
+    dirs = [cfg.repo_root / exports[k] for k in ("REPORTS_DIR", "LOG_DIR") if k in exports]
+    for kind in ("reports", "logs"):
+        dirs.append(cfg.repo_root / kind / cfg.tech / design / variant)
+    return _dedup_paths(dirs)
+
+
+def _dedup_paths(paths: Iterable[Path]) -> List[Path]:
+    out: List[Path] = []
+    for p in paths:
+        p = Path(os.path.normpath(str(p)))
+        if p not in out:
+            out.append(p)
+    return out
+
+
+def total_memory_kb() -> float:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024.0
+    except (ValueError, OSError, AttributeError):
+        return 64 * 1024 * 1024.0
+
+
+@dataclass(frozen=True)
+class StageJob:
+    """One stage as shipped to a worker."""
+    cfg: RunConfig
+    kind: str  # "run" or "eval"
+    step: FlowStep
+    exports: Tuple[Tuple[str, str], ...]
+    log_path: Path
+    first: bool  # first stage of its script: truncate the log
+    cache_dir: Optional[str] = None
+    cache_key: Optional[str] = None  # snapshot under this key on success (restore: key to restore)
+    prev_key: Optional[str] = None  # key of the previous stage, to reuse its file hashes
+
+
+def _task_label(cfg: RunConfig) -> str:
+    return f"{cfg.flow}/{cfg.tech}/{_case_name(cfg)}"
+
+
+def _task_parts(cfg: RunConfig) -> List[str]:
+    return [part for part, enabled in (("run", cfg.do_run), ("eval", cfg.do_eval)) if enabled]
+
+
+def _stage_key(job: StageJob) -> str:
+    """Name of a stage within its task (run and eval stages may share a target)."""
+    return job.step.name if job.kind == "run" else f"eval:{job.step.name}"
+
+
+@dataclass
+class StageNode:
+    job: StageJob
+    task: int
+    cost: float  # predicted seconds
+    demand: StageDemand
+    next: Optional[int] = None
+    priority: float = 0.0
+
+
+# ==============================================================================
+# Stage result cache (see util/stageCache.py)
+# ==============================================================================
+
+# Run stages are fingerprinted in order; a stage without a fingerprint (shell
+# steps, opaque scripts, tasks without the four work directories) ends the
+# cacheable prefix. If the fingerprints of the first k stages are all in the
+# cache, those stages are replaced by one "restore" stage that puts back the
+# snapshot of stage k.
+RESTORE_TARGET = "restore"
+
+
+def _run_stage_keys(fingerprinter: "stageCache.StageFingerprinter", flow_script: FlowScript,
+                    base_env: Dict[str, str]) -> List[Optional[str]]:
+    env = dict(base_env)
+    env.update(flow_script.exports)
+    keys: List[Optional[str]] = []
+    prev = "" if stageCache.stage_dirs(env) else None
+    for step in flow_script.steps:
+        if prev is not None and step.cmd[:1] == ("make",):
+            prev = fingerprinter.fingerprint(prev, step.target, step.cmd, env)
+        else:
+            prev = None
+        keys.append(prev)
+    return keys
+
+
+def build_stage_graph(
+    tasks: List[RunConfig],
+    base_env: Dict[str, str],
+    default_demand: StageDemand,
+    max_cores: float,
+    cache: Optional["stageCache.StageCache"] = None,
+    durations: Optional["suiteProgress.StageDurations"] = None,
+) -> List[StageNode]:
+    """
+    Expand every task into its chain of stages (see parse_flow_script), with
+    predicted cost and resource demand per stage (see ResourceModel). A
+    stage's last recorded duration, if any, overrides the predicted cost.
+    With a stage cache, the leading run stages whose results are cached
+    collapse into one restore stage.
+    """
+    nodes: List[StageNode] = []
+    fingerprinters: Dict[Path, stageCache.StageFingerprinter] = {}
+    for t, cfg in enumerate(tasks):
+        run_log, eval_log = _log_paths(cfg.flow, cfg.tech, _case_name(cfg))
+        run_script, eval_script = _script_paths(cfg.repo_root, cfg.flow, cfg.tech, cfg.case)
+        scale = design_scale(cfg.repo_root, cfg.case)
+        task_env = dict(base_env)
+        task_env.update(cfg.point)
+        scripts = []
+        for kind, enabled, script, log_path in (("run", cfg.do_run, run_script, run_log),
+                                                ("eval", cfg.do_eval, eval_script, eval_log)):
+            flow_script = parse_flow_script(script, task_env) if script.exists() else None
+            scripts.append((kind, enabled, log_path, flow_script or _opaque_script(script)))
+        exports = dict(e for _, _, _, fs in scripts for e in fs.exports)
+        model = ResourceModel(load_history_metrics(_history_dirs(cfg, exports)),
+                              default_demand.mem_kb, default_demand.cores, max_cores)
+
+        chain: List[StageNode] = []
+        for kind, enabled, log_path, flow_script in scripts:
+            if not enabled:
+                continue
+            keys = [None] * len(flow_script.steps)
+            skip = 0
+            if cache is not None and kind == "run":
+                if cfg.repo_root not in fingerprinters:
+                    fingerprinters[cfg.repo_root] = stageCache.StageFingerprinter(str(cfg.repo_root))
+                keys = _run_stage_keys(fingerprinters[cfg.repo_root], flow_script, task_env)
+                for i, key in enumerate(keys):
+                    if key is None:
+                        break
+                    if cache.has(key):
+                        skip = i + 1
+            if skip:
+                step = FlowStep(f"cached:{flow_script.steps[skip - 1].name}", RESTORE_TARGET, ())
+                job = StageJob(cfg, kind, step, flow_script.exports, log_path, True,
+                               cache.root, keys[skip - 1])
+                demand = StageDemand(default_demand.mem_kb / 4, 1.0)
+                chain.append(StageNode(job, t, scale * stage_weight("clean_all") * SECONDS_PER_WEIGHT,
+                                       demand))
+            for i, step in enumerate(flow_script.steps[skip:], skip):
+                job = StageJob(cfg, kind, step, flow_script.exports, log_path, i == 0,
+                               cache.root if keys[i] else None, keys[i], keys[i - 1] if i else None)
+                demand = model.predict(step.target)
+                cost = demand.seconds if demand.seconds is not None \
+                    else scale * stage_weight(step.target) * SECONDS_PER_WEIGHT
+                recorded = durations.get(_task_label(cfg), _stage_key(job)) if durations else None
+                chain.append(StageNode(job, t, recorded if recorded is not None else cost, demand))
+        for i, node in enumerate(chain):
+            if i + 1 < len(chain):
+                node.next = len(nodes) + i + 1
+        remaining = 0.0
+        for node in reversed(chain):
+            remaining += node.cost
+            node.priority = remaining
+        nodes.extend(chain)
+    return nodes
+
+
+def _restore_stage(job: StageJob) -> None:
+    """Put back the cached work directories of job.cache_key, logging to the run log."""
+    cfg = job.cfg
+    dirs = stageCache.stage_dirs(dict(job.exports))
+    with _open_log(job.log_path) as f:
+        f.write(f"+ restore {job.step.name[len('cached:'):]} from stage cache "
+                f"{job.cache_dir} ({job.cache_key[:16]})\n")
+        count = stageCache.StageCache(job.cache_dir).restore(job.cache_key, dirs, str(cfg.repo_root))
+        f.write(f"Restored {count} files into {', '.join(dirs.values())}\n")
+    if cfg.sample_interval > 0:
+        # later stages append to the usage file; start it afresh as the log
+        resourceSampler.open_usage(resourceSampler.usage_path(job.log_path), False, _open_log).close()
+
+
+def _snapshot_stage(job: StageJob) -> None:
+    dirs = stageCache.stage_dirs(dict(job.exports))
+    try:
+        stageCache.StageCache(job.cache_dir).snapshot(job.cache_key, dirs, str(job.cfg.repo_root),
+                                                     job.step.target, job.prev_key)
+    except OSError as e:
+        with _open_log(job.log_path, append=True) as f:
+            f.write(f"[WARN] Cannot write stage cache '{job.cache_dir}': {e}\n")
+
+
+def run_stage(job: StageJob) -> Tuple[bool, float]:
+    """Worker: run one stage, appending to the task's run/eval log. Returns (ok, seconds)."""
+    _install_signal_handlers()
+    cfg = job.cfg
+    t0 = time.time()
+    if job.step.target == RESTORE_TARGET:
+        try:
+            _restore_stage(job)
+        except OSError as e:
+            with _open_log(job.log_path, append=True) as f:
+                f.write(f"[ERROR] Stage cache restore failed: {e}\n")
+            return False, time.time() - t0
+        return True, time.time() - t0
+
+    stop_path = _stop_path(cfg)
+    if stop_path is not None and stop_path.exists():
+        return False, 0.0
+    env = _task_env(cfg)
+    env.update(job.exports)
+    script = _script_paths(cfg.repo_root, cfg.flow, cfg.tech, cfg.case)[0 if job.kind == "run" else 1]
+    if job.step.cmd[:1] == ("bash",) and job.step.cmd[1:2] != ("-c",) and not script.exists():
+        print(f"[{os.getpid()}] ERROR: {job.kind}.sh not found: {script}")
+        return False, 0.0
+
+    try:
+        _run_command_with_log(job.step.cmd, job.log_path, cwd=cfg.repo_root, env=env,
+                              append=not job.first, echo_cmd=True, stage=job.step.name,
+                              sample_interval=cfg.sample_interval, stop_path=stop_path)
+    except subprocess.CalledProcessError:
+        return False, time.time() - t0
+    secs = time.time() - t0
+    if job.cache_key:
+        _snapshot_stage(job)
+    return True, secs
+
+
+def _admit(nodes: List[StageNode], ready: List[Tuple[float, int]], running: Dict,
+           jobs: int, free_mem_kb: float, free_cores: float) -> List[int]:
+    """
+    Pick ready stages to start, largest remaining critical path first, within
+    `jobs` slots and the free memory/core budget. A stage that does not fit
+    keeps its share reserved, so smaller stages only backfill what is left and
+    it starts as soon as enough frees up; with nothing running, the head
+    always starts (a stage larger than the whole budget still has to run).
+    """
+    picked: List[int] = []
+    slots = jobs - len(running)
+    for _, i in sorted(ready):
+        if slots <= 0:
+            break
+        d = nodes[i].demand
+        fits = d.mem_kb <= free_mem_kb and d.cores <= free_cores
+        if fits or (not running and not picked):
+            picked.append(i)
+            slots -= 1
+        # Reserve (or consume) the stage's share either way
+        free_mem_kb -= d.mem_kb
+        free_cores -= d.cores
+    return picked
+
+
+def run_stage_graph(
+    nodes: List[StageNode],
+    tasks: List[RunConfig],
+    jobs: int,
+    mem_budget_kb: float,
+    core_budget: float,
+    executor: Optional[Executor] = None,
+    progress: Optional["suiteProgress.SuiteProgress"] = None,
+    journal: Optional["suiteJournal.SuiteJournal"] = None,
+    retry: Optional["suiteJournal.RetryPolicy"] = None,
+    fail_fast: bool = False,
+    pruner: Optional["sweepPruner.SweepPruner"] = None,
+) -> int:
+    """
+    Run the stage DAG on up to `jobs` workers (local processes unless an
+    executor is given), admitting stages against the memory/core budget (see
+    _admit). A stage that fails transiently (see retry) is queued again after
+    a backoff; any other failure stops the rest of its task, or with
+    fail_fast every stage not started yet. Sweep points the pruner finds
+    dominated are stopped mid-stage. Returns the number of failed tasks.
+    Stage starts and ends are reported to progress, task states to journal.
+    """
+    heads = {}
+    for i, node in enumerate(nodes):
+        heads.setdefault(node.task, i)
+    if progress is not None:
+        add_progress_tasks(progress, nodes, from_logs=False)
+    ready: List[Tuple[float, int]] = [(-nodes[i].priority, i) for i in heads.values()]
+    delayed: List[Tuple[float, int]] = []  # (due time, node) of stages waiting to be retried
+    retries: Dict[int, int] = {}
+    failed = 0
+    stopping = False  # fail_fast tripped: start nothing new
+    started = set()
+    finished = set()
+    pruned = set()
+    used_mem_kb = 0.0
+    used_cores = 0.0
+
+    with executor or ProcessPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        try:
+            while ready or running or delayed:
+                now = time.time()
+                for due, i in sorted(delayed):
+                    if due <= now:
+                        delayed.remove((due, i))
+                        ready.append((-nodes[i].priority, i))
+                for i in _admit(nodes, ready, running, jobs,
+                                mem_budget_kb - used_mem_kb, core_budget - used_cores):
+                    ready.remove((-nodes[i].priority, i))
+                    node = nodes[i]
+                    used_mem_kb += node.demand.mem_kb
+                    used_cores += node.demand.cores
+                    cfg = node.job.cfg
+                    if node.task not in started:
+                        started.add(node.task)
+                        print(f"[MAIN] Start {cfg.flow.upper()} tech={cfg.tech} case={_case_name(cfg)}")
+                        if journal is not None:
+                            journal.mark(_task_label(cfg), "running")
+                        if pruner is not None:
+                            pruner.started(node.task, time.time())
+                    elif i in retries and journal is not None:
+                        journal.mark(_task_label(cfg), "running")
+                    print(f"[MAIN]   {_task_label(cfg)} {node.job.kind}: {node.job.step.name} "
+                          f"(mem~{node.demand.mem_kb / 1048576:.1f}G cores~{node.demand.cores:.0f})")
+                    running[executor.submit(run_stage, node.job)] = i
+                    if progress is not None:
+                        progress.stage_started(node.task, i - heads[node.task])
+                timeout = PROGRESS_TICK if progress is not None or pruner is not None else None
+                if delayed:
+                    next_due = max(min(due for due, _ in delayed) - now, 0.0)
+                    timeout = next_due if timeout is None else min(timeout, next_due)
+                if not running:
+                    time.sleep(timeout)
+                    done = set()
+                else:
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if progress is not None:
+                    progress.report()
+                for t, why in pruner.poll() if pruner is not None else ():
+                    pruned.add(t)
+                    _prune_task(tasks[t], why, journal)
+                    ready[:] = [r for r in ready if nodes[r[1]].task != t]
+                    delayed[:] = [d for d in delayed if nodes[d[1]].task != t]
+                    if not any(nodes[j].task == t for j in running.values()):
+                        finished.add(t)
+                        if progress is not None:
+                            progress.task_finished(t, False, state="pruned")
+                for fut in done:
+                    i = running.pop(fut)
+                    node = nodes[i]
+                    cfg = node.job.cfg
+                    used_mem_kb -= node.demand.mem_kb
+                    used_cores -= node.demand.cores
+                    reason = None
+                    try:
+                        ok, secs = fut.result()
+                    except Exception as e:
+                        print(f"[MAIN] ERROR: {_task_label(cfg)} {node.job.step.name}: {e}")
+                        ok, secs = False, 0.0
+                        if isinstance(e, remoteExecutor.RemoteError):
+                            reason = str(e)
+                    if progress is not None:
+                        progress.stage_finished(node.task, i - heads[node.task], ok, secs)
+                    if node.task in pruned and not (ok and node.next is None):
+                        finished.add(node.task)
+                        if progress is not None:
+                            progress.task_finished(node.task, False, state="pruned")
+                        continue
+                    if pruner is not None and (not ok or node.next is None):
+                        pruner.finished(node.task, ok)
+                    if not ok and not stopping and retry is not None and retries.get(i, 0) < retry.retries:
+                        reason = reason or retry.transient(node.job.log_path, last_command=True)
+                        if reason:
+                            retries[i] = retries.get(i, 0) + 1
+                            delay = retry.delay(retries[i])
+                            print(f"[MAIN] RETRY {retries[i]}/{retry.retries} of {_task_label(cfg)} "
+                                  f"{node.job.step.name} in {delay:.0f}s: {reason}")
+                            delayed.append((time.time() + delay, i))
+                            if journal is not None:
+                                journal.mark(_task_label(cfg), "retrying", error=reason)
+                            if progress is not None:
+                                progress.stage_retrying(node.task, i - heads[node.task])
+                            continue
+                    if progress is not None and (not ok or node.next is None):
+                        progress.task_finished(node.task, ok)
+                    if not ok:
+                        failed += 1
+                        finished.add(node.task)
+                        print(f"[MAIN] ERROR: {node.job.kind}.sh failed at {node.job.step.name} "
+                              f"({_task_label(cfg)}). See {node.job.log_path}")
+                        if journal is not None:
+                            journal.mark(_task_label(cfg), "failed",
+                                         error=f"{node.job.kind}.sh failed at {node.job.step.name}")
+                        if fail_fast and not stopping:
+                            stopping = True
+                            print(f"[MAIN] --fail-fast: starting no further stages, "
+                                  f"waiting for {len(running)} running")
+                            ready.clear()
+                            delayed.clear()
+                    elif node.next is None:
+                        finished.add(node.task)
+                        print(f"[MAIN] OK: {_task_label(cfg)}")
+                        if journal is not None:
+                            journal.mark(_task_label(cfg), "done", parts=_task_parts(cfg))
+                    elif not stopping:
+                        ready.append((-nodes[node.next].priority, node.next))
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    if journal is not None:
+        for t in heads:
+            if t not in finished:
+                journal.mark(_task_label(tasks[t]), "cancelled")
+    if pruned:
+        print(f"[MAIN] {len(pruned)} dominated sweep point(s) stopped early.")
+    return failed
+
+
+def _prune_task(cfg: RunConfig, reason: str, journal: Optional["suiteJournal.SuiteJournal"]) -> None:
+    """Ask a dominated sweep point to stop: its running command is killed (see _stop_path)."""
+    print(f"[MAIN] STOP {_task_label(cfg)}: {reason}")
+    stop_path = _stop_path(cfg)
+    try:
+        stop_path.parent.mkdir(parents=True, exist_ok=True)
+        stop_path.write_text(reason + "\n", encoding="utf-8")
+    except OSError as e:
+        print(f"[MAIN] WARN: cannot write {stop_path}: {e}")
+    if journal is not None:
+        journal.mark(_task_label(cfg), "pruned", error=reason)
+
+
+def _keep_attempt_logs(cfg: RunConfig, attempt: int) -> None:
+    """Move a failed attempt's logs aside (<case>_run.attempt1.log, ...) before it is retried."""
+    for log_path in _log_paths(cfg.flow, cfg.tech, _case_name(cfg)):
+        usage_path = resourceSampler.usage_path(log_path)
+        for path, moved in ((log_path, log_path.with_name(f"{log_path.stem}.attempt{attempt}.log")),
+                            (usage_path, usage_path.with_name(f"{log_path.stem}.attempt{attempt}.usage.csv"))):
+            try:
+                path.rename(moved)
+            except FileNotFoundError:
+                pass
+
+
+def run_task_pool(executor: Executor, tasks: List[RunConfig],
+                  progress: "suiteProgress.SuiteProgress",
+                  journal: "suiteJournal.SuiteJournal",
+                  retry: "suiteJournal.RetryPolicy", fail_fast: bool,
+                  pruner: Optional["sweepPruner.SweepPruner"] = None) -> int:
+    """
+    Run whole tasks (run_one) on the executor. A task that fails transiently
+    is submitted again after a backoff; with fail_fast the first other
+    failure cancels every task not started yet. Sweep points the pruner
+    finds dominated are stopped. Returns the number of failed tasks.
+    """
+    futures = {executor.submit(run_one, t): i for i, t in enumerate(tasks)}
+    delayed: List[Tuple[float, int]] = []
+    retries: Dict[int, int] = {}
+    started = set()
+    pruned = set()
+    failed = 0
+    while futures or delayed:
+        now = time.time()
+        for due, i in sorted(delayed):
+            if due <= now:
+                delayed.remove((due, i))
+                futures[executor.submit(run_one, tasks[i])] = i
+        for fut, i in futures.items():
+            if i not in started and fut.running():
+                started.add(i)
+                journal.mark(_task_label(tasks[i]), "running")
+                if pruner is not None:
+                    pruner.started(i, now)
+        if futures:
+            done, _ = wait(futures, timeout=PROGRESS_TICK, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(min(PROGRESS_TICK, max(min(due for due, _ in delayed) - now, 0.0)))
+            done = set()
+        for i, why in pruner.poll() if pruner is not None else ():
+            pruned.add(i)
+            _prune_task(tasks[i], why, journal)
+            if any(j == i for _, j in delayed):
+                delayed[:] = [d for d in delayed if d[1] != i]
+                progress.task_finished(i, False, state="pruned")
+        for fut in done:
+            i = futures.pop(fut)
+            cfg = tasks[i]
+            reason = None
+            try:
+                result = fut.result()
+                ok = result.split("] ", 1)[-1].startswith("OK:")
+            except Exception as e:
+                print(f"[MAIN] ERROR: {e}")
+                ok, result = False, str(e)
+                if isinstance(e, remoteExecutor.RemoteError):
+                    reason = str(e)
+            progress.poll()
+            if i in pruned and not ok:
+                progress.task_finished(i, False, state="pruned")
+                continue
+            if pruner is not None:
+                pruner.finished(i, ok)
+            if not ok and retries.get(i, 0) < retry.retries:
+                run_log, eval_log = _log_paths(cfg.flow, cfg.tech, _case_name(cfg))
+                # eval.sh only runs once run.sh succeeded
+                log_path = eval_log if cfg.do_eval and eval_log.exists() else run_log
+                reason = reason or retry.transient(log_path)
+                if reason:
+                    retries[i] = retries.get(i, 0) + 1
+                    delay = retry.delay(retries[i])
+                    print(f"[MAIN] RETRY {retries[i]}/{retry.retries} of {_task_label(cfg)} "
+                          f"in {delay:.0f}s: {reason}")
+                    _keep_attempt_logs(cfg, retries[i])
+                    delayed.append((time.time() + delay, i))
+                    started.discard(i)
+                    journal.mark(_task_label(cfg), "retrying", error=reason)
+                    progress.task_retrying(i)
+                    continue
+            progress.task_finished(i, ok)
+            if ok:
+                journal.mark(_task_label(cfg), "done", parts=_task_parts(cfg))
+                continue
+            failed += 1
+            journal.mark(_task_label(cfg), "failed", error=result.split("] ", 1)[-1])
+            if fail_fast:
+                cancelled = [f for f in futures if f.cancel()]
+                for f in cancelled:
+                    journal.mark(_task_label(tasks[futures.pop(f)]), "cancelled")
+                for _, j in delayed:
+                    journal.mark(_task_label(tasks[j]), "cancelled")
+                delayed.clear()
+                if cancelled:
+                    print(f"[MAIN] --fail-fast: cancelled {len(cancelled)} queued task(s), "
+                          f"waiting for {len(futures)} running")
+        progress.report()
+    if pruned:
+        print(f"[MAIN] {len(pruned)} dominated sweep point(s) stopped early.")
+    return failed
+
+
+# ==============================================================================
+# Progress (see util/suiteProgress.py)
+# ==============================================================================
+
+# Seconds between progress polls while waiting for stages/tasks
+PROGRESS_TICK = 1.0
+
+
+def add_progress_tasks(progress: "suiteProgress.SuiteProgress", nodes: List[StageNode],
+                       from_logs: bool) -> None:
+    """Register every task's stages (in chain order) and logs with progress."""
+    chains: Dict[int, List[StageNode]] = {}
+    for node in nodes:
+        chains.setdefault(node.task, []).append(node)
+    for t, chain in chains.items():
+        stages = [(_stage_key(n.job), n.cost, n.job.step.cmd[:1] == ("make",)) for n in chain]
+        logs = []
+        for i, node in enumerate(chain):
+            if not logs or logs[-1][0] != node.job.log_path:
+                logs.append((node.job.log_path, i))
+        progress.add_task(t, _task_label(chain[0].job.cfg), stages, logs, from_logs)
+
+
 # ==============================================================================
 # CLI + orchestration
 # ==============================================================================
@@ -242,6 +1300,21 @@ def _dedup_keep_order(xs: Iterable[str]) -> List[str]:
     return out
 
 
+def print_usage_summary(tasks: List[RunConfig]) -> None:
+    """Per-task resource table from the usage files next to the logs."""
+    rows = []
+    for cfg in tasks:
+        run_log, eval_log = _log_paths(cfg.flow, cfg.tech, _case_name(cfg))
+        paths = [resourceSampler.usage_path(p) for p, enabled in ((run_log, cfg.do_run),
+                                                                  (eval_log, cfg.do_eval)) if enabled]
+        rows.append((_task_label(cfg), resourceSampler.summarize(paths)))
+    if not any(summary for _, summary in rows):
+        return
+    print("[MAIN] Resource usage per task:")
+    for line in resourceSampler.format_table(rows):
+        print(f"[MAIN]   {line}")
+
+
 def build_tasks(
     flows: List[str],
     techs: List[str],
@@ -249,32 +1322,176 @@ def build_tasks(
     repo_root: Path,
     do_run: bool,
     do_eval: bool,
+    sample_interval: float = resourceSampler.SAMPLE_INTERVAL,
+    env: Optional[Dict[str, str]] = None,
+    points: Sequence[sweepSpec.Point] = ((),),
 ) -> List[RunConfig]:
+    env_items = tuple(sorted((env or {}).items()))
     tasks: List[RunConfig] = []
     for flow in flows:
         for tech in techs:
             for case in cases:
-                tasks.append(
-                    RunConfig(
-                        flow=flow,
-                        tech=tech,
-                        case=case,
-                        repo_root=repo_root,
-                        do_run=do_run,
-                        do_eval=do_eval,
-                    ))
+                for point in points:
+                    tasks.append(
+                        RunConfig(
+                            flow=flow,
+                            tech=tech,
+                            case=case,
+                            repo_root=repo_root,
+                            do_run=do_run,
+                            do_eval=do_eval,
+                            sample_interval=sample_interval,
+                            env=env_items,
+                            point=point,
+                        ))
     return tasks
 
 
+# ==============================================================================
+# Sweeps (see util/sweepSpec.py)
+# ==============================================================================
+
+
+def _sweep_points(args: argparse.Namespace) -> List[sweepSpec.Point]:
+    """Points of --sweep FILE combined with the --sweep-var product; [()] without a sweep."""
+    points = sweepSpec.load_sweep(Path(args.sweep)) if args.sweep else [()]
+    product = dict(sweepSpec.parse_sweep_var(v) for v in args.sweep_var)
+    return sweepSpec.expand(product, [dict(p) for p in points])
+
+
+def _task_flow_script(cfg: RunConfig, base_env: Dict[str, str]) -> Optional[FlowScript]:
+    """A task's run.sh parsed at its sweep point; None if it cannot be parsed."""
+    task_env = dict(base_env)
+    task_env.update(cfg.point)
+    script = _script_paths(cfg.repo_root, cfg.flow, cfg.tech, cfg.case)[0]
+    return parse_flow_script(script, task_env) if script.exists() else None
+
+
+def _task_exports(cfg: RunConfig, base_env: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """The variables a task's run.sh exports at its sweep point; None if it cannot be parsed."""
+    flow_script = _task_flow_script(cfg, base_env)
+    return dict(flow_script.exports) if flow_script is not None else None
+
+
+def _make_var(config_text: str, name: str, env: Dict[str, str]) -> Optional[str]:
+    """name as make sees it: a design config "=" assignment beats the environment, "?=" does not."""
+    value = env.get(name)
+    for m in _MK_ASSIGN_RE.finditer(config_text):
+        if m.group(1) == name and not (m.group(2) == "?" and value is not None):
+            value = m.group(3).strip()
+    return value
+
+
+def _task_log_dir(cfg: RunConfig, base_env: Dict[str, str]) -> Optional[Path]:
+    """
+    A task's LOG_DIR: exported by its run.sh, else the Makefile default
+    $(WORK_HOME)/logs/$(PLATFORM)/$(DESIGN_NICKNAME)/$(FLOW_VARIANT) under the
+    design config of its routing step. None if it cannot be resolved.
+    """
+    flow_script = _task_flow_script(cfg, base_env)
+    if flow_script is None:
+        return None
+    env = dict(base_env)
+    env.update(cfg.point)
+    env.update(flow_script.exports)
+    if env.get("LOG_DIR"):
+        return cfg.repo_root / env["LOG_DIR"]
+    steps = [s for s in flow_script.steps if "route" in s.target] or list(flow_script.steps)
+    design_config = env.get("DESIGN_CONFIG", "")
+    for arg in steps[-1].cmd if steps else ():
+        if arg.startswith("DESIGN_CONFIG="):
+            design_config = arg.split("=", 1)[1]
+    try:
+        config_text = (cfg.repo_root / design_config).read_text(encoding="utf-8", errors="ignore") \
+            if design_config else ""
+    except OSError:
+        config_text = ""
+    parts = [_make_var(config_text, "WORK_HOME", env) or ".", _make_var(config_text, "PLATFORM", env),
+             _make_var(config_text, "DESIGN_NICKNAME", env) or _make_var(config_text, "DESIGN_NAME", env),
+             _make_var(config_text, "FLOW_VARIANT", env) or "base"]
+    if not all(parts) or any("$" in p for p in parts):
+        return None
+    work_home, platform, nickname, variant = parts
+    return cfg.repo_root / work_home / "logs" / platform / nickname / variant
+
+
+def _work_dir_key(cfg: RunConfig, base_env: Dict[str, str]) -> Optional[Tuple[str, ...]]:
+    """Where a task's run.sh writes: its stage dirs, else its FLOW_VARIANT; None if unknown."""
+    exports = _task_exports(cfg, base_env)
+    if exports is None:
+        return None
+    dirs = stageCache.stage_dirs(exports)
+    if dirs:
+        return tuple(os.path.normpath(d) for d in dirs.values())
+    if "FLOW_VARIANT" in exports:
+        return (f"{cfg.tech}/{exports.get('DESIGN_NICKNAME', cfg.case)}/{exports['FLOW_VARIANT']}",)
+    return None
+
+
+def check_sweep_work_dirs(tasks: List[RunConfig], base_env: Dict[str, str]) -> List[str]:
+    """
+    Sweep points of one task must write to different work directories
+    (their FLOW_VARIANT has to depend on the swept variables), or they would
+    overwrite each other. Returns one message per clash.
+    """
+    owners: Dict[Tuple[str, ...], RunConfig] = {}
+    errors = []
+    for cfg in tasks:
+        if not cfg.do_run:
+            continue
+        key = _work_dir_key(cfg, base_env)
+        if key is None:
+            continue
+        other = owners.setdefault(key, cfg)
+        if other is not cfg:
+            errors.append(f"{_task_label(other)} and {_task_label(cfg)} both write {key[0]}: "
+                          f"the flow's FLOW_VARIANT does not depend on the swept variables")
+    return errors
+
+
+def build_sweep_pruner(tasks: List[RunConfig], base_env: Dict[str, str],
+                       margin: float) -> "sweepPruner.SweepPruner":
+    """
+    A pruner over the sweep points whose LOG_DIR is known (see _task_log_dir),
+    compared within their (flow, tech, case). Stop files of an earlier suite
+    are removed.
+    """
+    pruner = sweepPruner.SweepPruner(margin)
+    for i, cfg in enumerate(tasks):
+        stop_path = _stop_path(cfg)
+        if stop_path is None or not cfg.do_run:
+            continue
+        stop_path.unlink(missing_ok=True)
+        log_dir = _task_log_dir(cfg, base_env)
+        if log_dir is None:
+            print(f"[MAIN] WARN: --prune-margin: no LOG_DIR for {_task_label(cfg)}, never pruned")
+            continue
+        pruner.add(i, (cfg.flow, cfg.tech, cfg.case), _task_label(cfg), log_dir)
+    return pruner
+
+
+def write_sweep_index(path: Path, tasks: List[RunConfig]) -> None:
+    """Record which task, logs and variables belong to each sweep point."""
+    entries = []
+    for cfg in tasks:
+        run_log, eval_log = _log_paths(cfg.flow, cfg.tech, _case_name(cfg))
+        entries.append({"task": _task_label(cfg), "flow": cfg.flow, "tech": cfg.tech, "case": cfg.case,
+                        "point": dict(cfg.point), "run_log": str(run_log), "eval_log": str(eval_log)})
+    try:
+        suiteProgress.write_json_atomic(path, {"tasks": entries})
+    except OSError as e:
+        print(f"[MAIN] WARN: cannot write {path}: {e}")
+
+
 def parse_args(default_repo_root: Optional[str], ) -> argparse.Namespace:
     p = argparse.ArgumentParser(
         description=
         "Run ORFS experiments (ORD/CDS) in parallel with per-task logs.")
     p.add_argument(
         "--flow",
-        choices=["ord", "cds", "all"],
         default="all",
-        help="Which flow to run (default: all).",
+        help="Which flow to run: ord, cds, all, or a flow directory under "
+        "test/<tech>/<case>/ such as ord_pitch or cds_clock (default: all).",
     )
     p.add_argument(
         "--tech",
@@ -291,8 +1508,169 @@ def parse_args(default_repo_root: Optional[str], ) -> argparse.Namespace:
     p.add_argument(
         "--jobs",
         type=int,
-        default=9,
-        help="Parallel workers.",
+        default=None,
+        help="Parallel workers (default: CPU count for --schedule stage, where the "
+        "memory/core budget limits concurrency; 9 for --schedule task).",
+    )
+    p.add_argument(
+        "--mem-budget",
+        type=float,
+        default=None,
+        help="Memory budget in GB for concurrently running stages "
+        "(default: 90%% of physical memory).",
+    )
+    p.add_argument(
+        "--cpu-budget",
+        type=float,
+        default=None,
+        help="Core budget for concurrently running stages (default: CPU count).",
+    )
+    p.add_argument(
+        "--default-mem",
+        type=float,
+        default=4.0,
+        help="Predicted peak memory in GB of a stage without history (default: 4).",
+    )
+    p.add_argument(
+        "--default-cores",
+        type=float,
+        default=1.0,
+        help="Predicted cores of a stage without history (default: 1).",
+    )
+    p.add_argument(
+        "--schedule",
+        choices=["stage", "task"],
+        default="task",
+        help="task: run each run.sh/eval.sh as one job (default). stage (opt-in): "
+        "schedule the individual Makefile stages of all tasks on one pool by "
+        "replaying the parsed run.sh line by line. Unlike bash run.sh (no set -e), "
+        "a failed stage then stops the rest of its task, and shell constructs the "
+        "parser does not model are not supported.",
+    )
+    p.add_argument(
+        "--stage-cache",
+        metavar="DIR",
+        help="Enable the stage result cache in DIR: run stages whose inputs are "
+        "unchanged are restored instead of rerun (default: off; --schedule stage "
+        "only). Files outside the repository are not part of a stage's "
+        "fingerprint; use a fresh DIR after changing them.",
+    )
+    p.add_argument(
+        "--stage-cache-max-gb",
+        type=float,
+        default=stageCache.STAGE_CACHE_MAX_GB,
+        help="Evict least recently used cached stages beyond this size "
+        f"(default: {stageCache.STAGE_CACHE_MAX_GB:g}).",
+    )
+    p.add_argument(
+        "--progress-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between progress summaries with per-task stage and ETA "
+        "(0: off). run_logs/status.json is updated either way.",
+    )
+    p.add_argument(
+        "--sample-interval",
+        type=float,
+        default=resourceSampler.SAMPLE_INTERVAL,
+        help="Seconds between resource samples (RSS, CPU, I/O, threads) of each "
+        "task's processes, written to <log>.usage.csv next to the run/eval logs "
+        "(default: %(default)s; 0 disables).",
+    )
+    p.add_argument(
+        "--status-file",
+        default="run_logs/status.json",
+        help="Machine-readable suite status, rewritten atomically every few "
+        "seconds (default: run_logs/status.json).",
+    )
+    p.add_argument(
+        "--sweep",
+        metavar="FILE",
+        help="Run every task once per point of this JSON sweep spec "
+        "(see util/sweepSpec.py).",
+    )
+    p.add_argument(
+        "--sweep-var",
+        action="append",
+        default=[],
+        metavar="VAR=VALUES",
+        help="Sweep VAR over a,b,c or start:stop:step (inclusive). Repeatable: "
+        "the variables are swept as a cartesian product (combined with --sweep).",
+    )
+    p.add_argument(
+        "--prune-margin",
+        type=float,
+        metavar="FRAC",
+        help="Stop sweep points whose post-global-route timing or overflow is "
+        "worse by more than FRAC (e.g. 0.1) than another point of the same "
+        "flow/tech/case that is no worse on either (see util/sweepPruner.py). "
+        "Needs each task's LOG_DIR visible here (local or shared filesystem).",
+    )
+    p.add_argument(
+        "--journal",
+        default="run_logs/suite_journal.json",
+        help="Suite journal recording every task's state as the suite runs "
+        "(default: run_logs/suite_journal.json).",
+    )
+    p.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the tasks the journal records as done, e.g. after a crash, "
+        "Ctrl-C or a fix for the failed ones.",
+    )
+    p.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Retries of a task (--schedule task) or stage (--schedule stage) "
+        "that failed transiently: license checkout failures, OOM kills, lost "
+        "workers (default: %(default)s).",
+    )
+    p.add_argument(
+        "--retry-backoff",
+        type=float,
+        default=30.0,
+        help="Seconds before the first retry, doubling for each further one "
+        "(default: %(default)s).",
+    )
+    p.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="After the first task failure, start nothing new: let running "
+        "work finish and cancel the rest of the queue.",
+    )
+    p.add_argument(
+        "--remote",
+        action="append",
+        default=[],
+        metavar="WORKER",
+        help="Run jobs on a worker instead of local processes. Repeatable: "
+        "local[:N] (a worker process on this host), ssh:HOST[:N] (needs the repo "
+        "at the same path on HOST), tcp:HOST:PORT (a --serve --listen job server). "
+        "N is the worker's concurrency limit (default: its CPU count).",
+    )
+    p.add_argument(
+        "--token",
+        default=os.environ.get(remoteExecutor.TOKEN_ENV, ""),
+        help=f"Shared secret, required for tcp workers and --listen (default: "
+        f"${remoteExecutor.TOKEN_ENV}).",
+    )
+    p.add_argument(
+        "--serve",
+        action="store_true",
+        help="Act as a worker: take jobs on stdin/stdout, or on --listen.",
+    )
+    p.add_argument(
+        "--listen",
+        default=None,
+        metavar="HOST:PORT",
+        help="With --serve: accept a submitting run_experiments.py on HOST:PORT.",
+    )
+    p.add_argument(
+        "--slots",
+        type=int,
+        default=None,
+        help="With --serve: concurrent jobs (default: CPU count).",
     )
     stage_group = p.add_mutually_exclusive_group()
     stage_group.add_argument(
@@ -317,13 +1695,20 @@ def parse_args(default_repo_root: Optional[str], ) -> argparse.Namespace:
 def main() -> int:
     _install_signal_handlers()
     script_root = Path(__file__).resolve().parent
-    _load_env_from_script(script_root / "env.sh")
+    args = parse_args(default_repo_root=None, )
 
-    default_repo_root = os.environ.get("FLOW_HOME", str(script_root))
-    args = parse_args(default_repo_root=default_repo_root, )
+    if args.serve:
+        # Jobs carry env.sh's variables (RunConfig.env): nothing to source here
+        slots = args.slots or os.cpu_count() or 1
+        this = sys.modules[__name__]
+        if not args.listen:
+            return remoteExecutor.serve_stdio(slots, this)
+        host, _, port = args.listen.rpartition(":")
+        return remoteExecutor.serve_tcp(host or "127.0.0.1", int(port), args.token, slots, this)
 
-    repo_root = Path(args.repo_root).resolve() if args.repo_root else Path(
-        __file__).resolve().parent
+    env = dict(_load_env_from_script(script_root / "env.sh"))
+    repo_root = Path(args.repo_root or os.environ.get("FLOW_HOME", str(script_root))).resolve()
+    env.update(_load_env_from_script(repo_root / "env.sh"))
 
     # Default suites (match your originals)
     default_techs = ["asap7_3D", "nangate45_3D", "asap7_nangate45_3D"]
@@ -334,12 +1719,20 @@ def main() -> int:
 
     if args.flow == "all":
         flows = ["ord", "cds"]
-    else:
+    elif _flow_kind(args.flow) in ("ord", "cds"):
         flows = [args.flow]
+    else:
+        print(f"[MAIN] ERROR: unknown flow '{args.flow}' (ord, cds, all or ord_*/cds_*)")
+        return 2
 
     do_run = not args.eval_only
     do_eval = not args.run_only
 
+    try:
+        points = _sweep_points(args)
+    except (OSError, ValueError) as e:
+        print(f"[MAIN] ERROR: sweep: {e}")
+        return 2
     tasks = build_tasks(
         flows=flows,
         techs=techs,
@@ -347,22 +1740,117 @@ def main() -> int:
         repo_root=repo_root,
         do_run=do_run,
         do_eval=do_eval,
+        sample_interval=args.sample_interval,
+        env=env,
+        points=points,
     )
+    if points != [()]:
+        clashes = check_sweep_work_dirs(tasks, dict(os.environ))
+        for msg in clashes:
+            print(f"[MAIN] ERROR: sweep: {msg}")
+        if clashes:
+            return 2
+        write_sweep_index(Path("run_logs") / "sweep.json", tasks)
+    if args.prune_margin is not None and args.prune_margin < 0:
+        print("[MAIN] ERROR: --prune-margin must be >= 0")
+        return 2
+
+    executor: Optional[Executor] = None
+    if args.remote:
+        try:
+            specs = [remoteExecutor.parse_worker_spec(w) for w in args.remote]
+        except ValueError as e:
+            print(f"[MAIN] ERROR: {e}")
+            return 2
+        try:
+            executor = remoteExecutor.RemoteExecutor(specs, str(Path(__file__).resolve()),
+                                                     str(repo_root), args.token)
+        except (OSError, remoteExecutor.RemoteError) as e:
+            print(f"[MAIN] ERROR: cannot start workers: {e}")
+            return 2
+        for line in executor.describe():
+            print(f"[MAIN] worker {line}")
+    if args.jobs is None:
+        if executor is not None:
+            args.jobs = executor.slots
+        else:
+            args.jobs = (os.cpu_count() or 1) if args.schedule == "stage" else 9
+
+
+    journal = suiteJournal.SuiteJournal(Path(args.journal), resume=args.resume)
+    if args.resume:
+        todo = [t for t in tasks if not journal.completed(_task_label(t), _task_parts(t))]
+        print(f"[MAIN] resume: {len(tasks) - len(todo)} task(s) already done per {journal.path}")
+        tasks = todo
+    for t in tasks:
+        journal.mark(_task_label(t), "queued")
+    retry = suiteJournal.RetryPolicy(args.retries, args.retry_backoff)
+    pruner = None
+    if points != [()] and args.prune_margin is not None:
+        pruner = build_sweep_pruner(tasks, dict(os.environ), args.prune_margin)
 
     print(f"[MAIN] repo_root={repo_root}")
     print(f"[MAIN] flows={flows} techs={techs} cases={cases} jobs={args.jobs}")
+    if points != [()]:
+        print(f"[MAIN] sweep: {len(points)} point(s) over "
+              f"{', '.join(_dedup_keep_order(k for p in points for k, _ in p))}")
     print(f"[MAIN] stages: run={do_run} eval={do_eval}")
     print(
         f"[MAIN] total_tasks={len(tasks)} logs under run_logs/<tech>/<flow>/..."
     )
 
-    # Run
-    executor: Optional[ProcessPoolExecutor] = None
+    durations = suiteProgress.StageDurations(Path("run_logs") / "stage_durations.json")
+    if args.schedule == "stage":
+        if executor is not None:
+            # This host's memory says nothing about the workers': only an
+            # explicit budget applies, and cores default to the total slots
+            mem_budget_kb = args.mem_budget * 1048576 if args.mem_budget else float("inf")
+            core_budget = args.cpu_budget or float(executor.slots)
+        else:
+            mem_budget_kb = args.mem_budget * 1048576 if args.mem_budget else 0.9 * total_memory_kb()
+            core_budget = args.cpu_budget or float(os.cpu_count() or 1)
+        cache = None
+        if args.stage_cache:
+            cache = stageCache.StageCache(args.stage_cache)
+            print(f"[MAIN] stage cache: {cache.root}")
+        nodes = build_stage_graph(tasks, dict(os.environ),
+                                  StageDemand(args.default_mem * 1048576, args.default_cores),
+                                  core_budget, cache, durations)
+        print(f"[MAIN] total_stages={len(nodes)} budget: mem={mem_budget_kb / 1048576:.1f}G "
+              f"cores={core_budget:g}")
+        progress = suiteProgress.SuiteProgress(Path(args.status_file), durations, args.jobs,
+                                               args.progress_interval)
+        try:
+            failed = run_stage_graph(nodes, tasks, args.jobs, mem_budget_kb, core_budget, executor,
+                                     progress, journal, retry, args.fail_fast, pruner)
+        except KeyboardInterrupt:
+            print("[MAIN] KeyboardInterrupt received, shutting down...")
+            return 130
+        finally:
+            progress.report(force=True)
+            durations.save()
+        if cache is not None:
+            try:
+                cache.prune(args.stage_cache_max_gb * (1 << 30))
+            except OSError as e:
+                print(f"[MAIN] WARN: cannot prune stage cache: {e}")
+        print_usage_summary(tasks)
+        if failed:
+            print(f"[MAIN] {failed} task(s) failed.")
+        print("[MAIN] All experiments completed.")
+        return 0
+
+    # Run; progress follows the make calls in each task's logs
+    progress = suiteProgress.SuiteProgress(Path(args.status_file), durations, args.jobs,
+                                           args.progress_interval)
+    add_progress_tasks(progress,
+                       build_stage_graph(tasks, dict(os.environ),
+                                         StageDemand(args.default_mem * 1048576, args.default_cores),
+                                         float(os.cpu_count() or 1), durations=durations),
+                       from_logs=True)
     try:
-        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
-            futures = [executor.submit(run_one, t) for t in tasks]
-            for fut in as_completed(futures):
-                _ = fut.result()
+        with executor or ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            failed = run_task_pool(executor, tasks, progress, journal, retry, args.fail_fast, pruner)
     except KeyboardInterrupt:
         print("[MAIN] KeyboardInterrupt received, shutting down...")
         if executor is not None:
@@ -371,7 +1859,13 @@ def main() -> int:
             except Exception:
                 pass
         return 130
+    finally:
+        progress.report(force=True)
+        durations.save()
 
+    print_usage_summary(tasks)
+    if failed:
+        print(f"[MAIN] {failed} task(s) failed.")
     print("[MAIN] All experiments completed.")
     return 0
 
@@ -2,10 +2,24 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import bisect
+import glob
+import hashlib
 import json
+import mmap
+import multiprocessing as mp
 import os
+import pickle
 import re
-from typing import Dict, List, Tuple, Optional
+import sys
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "util"))
+import defIndex  # noqa: E402
+import fileIO  # noqa: E402
 
 # ------------------------------------------------------------
 # Name normalization helpers (DEF / Verilog / partition shared)
@@ -54,7 +68,7 @@ def parse_partition_file(partition_path: Optional[str]) -> Dict[str, int]:
         print(f"[WARN] partition file '{partition_path}' not found, ignored.")
         return part
 
-    with open(partition_path, "r", encoding="utf-8", errors="ignore") as f:
+    with fileIO.open_read(partition_path, "rt") as f:
         for raw in f:
             line = raw.strip()
             if not line:
@@ -72,6 +86,170 @@ def parse_partition_file(partition_path: Optional[str]) -> Dict[str, int]:
             part[normalize_name(inst)] = die
     return part
 
+# ------------------------------------------------------------
+# View index (incremental regeneration)
+# ------------------------------------------------------------
+# Bump when the index layout or any rewrite rule changes.
+VIEW_INDEX_VERSION = 1
+# Above this fraction of touched records a full rewrite is cheaper.
+INCREMENTAL_MAX_FRACTION = 0.3
+
+def file_sig(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def _nbytes(s: str) -> int:
+    return len(s) if s.isascii() else len(s.encode("utf-8"))
+
+@dataclass
+class ViewIndex:
+    """
+    Byte-offset index of one generated view, saved next to it as <out>.3didx.
+
+    A record is a patchable piece of the view: a DEF component line, a DEF net
+    block or a Verilog instance statement. in_a/in_b is its byte span in the
+    input and out_a/out_b in the output; everything between records is copied
+    verbatim. `affects` lists, per instance, the records whose text depends on
+    that instance's die, so a new partition only re-renders those records.
+    """
+    kind: str
+    in_sig: Tuple[int, int]
+    maps_key: str
+    part_map: Dict[str, int] = field(default_factory=dict)
+    in_a: array = field(default_factory=lambda: array("q"))
+    in_b: array = field(default_factory=lambda: array("q"))
+    out_a: array = field(default_factory=lambda: array("q"))
+    out_b: array = field(default_factory=lambda: array("q"))
+    affects: Dict[str, List[int]] = field(default_factory=dict)
+    # DEF: 0 = component line, 1 = net block; plus the inst -> base map
+    rec_kind: bytearray = field(default_factory=bytearray)
+    inst2base: Dict[str, str] = field(default_factory=dict)
+    # Verilog: comment-masked text of the few records that contain comments
+    rec_masked: Dict[int, str] = field(default_factory=dict)
+    out_sig: Tuple[int, int] = (0, 0)
+    version: int = VIEW_INDEX_VERSION
+
+    def add(self, in_a: int, in_b: int, out_a: int, out_b: int, kind: int = 0) -> int:
+        self.in_a.append(in_a)
+        self.in_b.append(in_b)
+        self.out_a.append(out_a)
+        self.out_b.append(out_b)
+        self.rec_kind.append(kind)
+        return len(self.in_a) - 1
+
+    def link(self, inst: str, rec: int) -> None:
+        recs = self.affects.setdefault(inst, [])
+        if not recs or recs[-1] != rec:
+            recs.append(rec)
+
+    def save(self, path: str, out_path: str) -> None:
+        self.out_sig = file_sig(out_path)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            # Plain dict so the file does not depend on the module's import name.
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ViewIndex"]:
+        try:
+            with open(path, "rb") as f:
+                return cls(**pickle.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable view index '{path}': {e}")
+            return None
+
+def view_index_path(out_path: str) -> str:
+    return out_path + ".3didx"
+
+class _OffsetWriter:
+    """Binary writer that encodes str chunks and tracks the output byte offset."""
+
+    def __init__(self, f):
+        self.f = f
+        self.pos = 0
+
+    def write(self, s: str) -> None:
+        b = s.encode("utf-8")
+        self.f.write(b)
+        self.pos += len(b)
+
+    def write_bytes(self, b) -> None:
+        self.f.write(b)
+        self.pos += len(b)
+
+def patch_view_incremental(
+    kind: str,
+    in_path: str,
+    out_path: str,
+    part_map: Dict[str, int],
+    maps_key: str,
+    render: Callable[[ViewIndex, int, str], str],
+) -> bool:
+    """
+    Regenerate out_path from the previous run's index by re-rendering only the
+    records of instances whose die changed; all other bytes are copied from the
+    previous output. render(index, rec, input_text) returns a record's new text.
+
+    Returns False (caller does a full rewrite) when there is no usable index:
+    missing, other version/kind, input/output/cell map changed since it was
+    written, or too many records touched.
+    """
+    idx_path = view_index_path(out_path)
+    idx = ViewIndex.load(idx_path)
+    if idx is None or idx.version != VIEW_INDEX_VERSION or idx.kind != kind:
+        return False
+    try:
+        if idx.in_sig != file_sig(in_path) or idx.out_sig != file_sig(out_path):
+            return False
+    except FileNotFoundError:
+        return False
+    if idx.maps_key != maps_key:
+        return False
+
+    old = idx.part_map
+    changed = [k for k in old.keys() | part_map.keys() if old.get(k) != part_map.get(k)]
+    recs = sorted({r for k in changed for r in idx.affects.get(k, ())})
+    n_rec = len(idx.in_a)
+    if n_rec == 0 or len(recs) > INCREMENTAL_MAX_FRACTION * n_rec:
+        return False
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    new_len: Dict[int, int] = {}
+    if recs:
+        with open(in_path, "rb") as fi, open(out_path, "rb") as fo, open(tmp_path, "wb") as ft:
+            with mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ) as mi, \
+                 mmap.mmap(fo.fileno(), 0, access=mmap.ACCESS_READ) as mo:
+                pos = 0
+                with memoryview(mo) as old_out:
+                    pos = 0
+                    for r in recs:
+                        ft.write(old_out[pos:idx.out_a[r]])
+                        text = mi[idx.in_a[r]:idx.in_b[r]].decode("utf-8", "ignore")
+                        b = render(idx, r, text.replace("\r\n", "\n")).encode("utf-8")
+                        ft.write(b)
+                        new_len[r] = len(b)
+                        pos = idx.out_b[r]
+                    ft.write(old_out[pos:])
+        os.replace(tmp_path, out_path)
+
+        # Shift output offsets of every record after the first patched one.
+        delta = 0
+        for r in range(recs[0], n_rec):
+            a = idx.out_a[r] + delta
+            if r in new_len:
+                delta += new_len[r] - (idx.out_b[r] - idx.out_a[r])
+            idx.out_a[r] = a
+            idx.out_b[r] = idx.out_b[r] + delta
+
+    idx.part_map = dict(part_map)
+    idx.save(idx_path, out_path)
+    print(f"[INFO] Incremental {kind}: {len(changed)} instance(s) changed die, "
+          f"{len(recs)}/{n_rec} record(s) re-rendered.")
+    return True
+
 # ------------------------------------------------------------
 # DEF parsing helpers
 # ------------------------------------------------------------
@@ -91,45 +269,47 @@ def collect_inst_base_from_def(def_path: str) -> Dict[str, str]:
     """
     Collect inst -> base master from DEF COMPONENTS.
     Handles multi-line components; only parses the leading "- inst master" line.
+    With a current DEF index only the COMPONENTS records are read (via mmap);
+    otherwise the file (possibly .gz/.zst) is streamed up to END COMPONENTS.
     """
     inst2base: Dict[str, str] = {}
-    try:
-        lines = open(def_path, "r", encoding="utf-8", errors="ignore").readlines()
-    except FileNotFoundError:
+    if not os.path.isfile(def_path):
         print(f"[ERROR] DEF file '{def_path}' not found for collect_inst_base_from_def.")
         return inst2base
 
-    in_comp = False
-    i, n = 0, len(lines)
-    while i < n:
-        line = lines[i]
-        if not in_comp and COMP_BEGIN_RE.match(line):
-            in_comp = True
-            i += 1
-            continue
-        if in_comp and COMP_END_RE.match(line):
-            in_comp = False
-            i += 1
-            continue
+    dix = defIndex.load_def_index(def_path) if fileIO.compression(def_path) is None else None
+    if dix is not None and not dix.has_cr and os.path.getsize(def_path) > 0:
+        with open(def_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for _, start, end in dix.iter_items("COMPONENTS"):
+                nl = mm.find(b"\n", start, end)
+                first = mm[start:end if nl < 0 else nl + 1].decode("utf-8", "ignore")
+                m = COMP_FIRST_RE.match(first)
+                if m:
+                    _, inst_raw, master, _ = m.groups()
+                    inst2base[normalize_from_def(inst_raw)] = strip_tier_suffix(master)
+        return inst2base
+
+    with fileIO.open_read(def_path, "rt") as f:
+        lines = iter(f)
+        in_comp = False
+        for line in lines:
+            if not in_comp:
+                if COMP_BEGIN_RE.match(line):
+                    in_comp = True
+                continue
+            if COMP_END_RE.match(line):
+                break
 
-        if in_comp:
             m = COMP_FIRST_RE.match(line)
             if m:
                 _, inst_raw, master, _ = m.groups()
-                inst_norm = normalize_from_def(inst_raw)
-                inst2base[inst_norm] = strip_tier_suffix(master)
+                inst2base[normalize_from_def(inst_raw)] = strip_tier_suffix(master)
 
                 # Skip to end of this component (until ';')
-                if ";" in line:
-                    i += 1
-                else:
-                    i += 1
-                    while i < n and ";" not in lines[i]:
-                        i += 1
-                    if i < n:
-                        i += 1
-                continue
-        i += 1
+                if ";" not in line:
+                    for nxt in lines:
+                        if ";" in nxt:
+                            break
 
     return inst2base
 
@@ -172,122 +352,214 @@ def rewrite_def_net_block(
     new_text = DEF_CONN_RE.sub(repl, text)
     return new_text.splitlines(keepends=True)
 
-def rewrite_def(
-    def_in: str,
-    def_out: str,
+def _rewrite_def_component_line(
+    m,
     part_map: Dict[str, int],
     base_to_bottom: Dict[str, str],
     base_to_upper: Dict[str, str],
-    base_to_pin_map: Dict[str, Dict[str, str]],
-) -> None:
+) -> Tuple[str, str, str]:
     """
-    Rewrite DEF:
-      - COMPONENTS: update master per inst->die using JSON macro mapping if available
-      - NETS: remap pins for upper instances using JSON pin_map
+    Rewrite the leading "- inst master ..." line of a component (COMP_FIRST_RE
+    match). Returns (new_line, inst_key, base master).
     """
-    try:
-        lines = open(def_in, "r", encoding="utf-8", errors="ignore").readlines()
-    except FileNotFoundError:
-        print(f"[ERROR] DEF file '{def_in}' not found.")
-        return
+    indent, inst_raw, master, rest = m.groups()
+    inst_key = normalize_from_def(inst_raw)
+    base = strip_tier_suffix(master)
+    die = part_map.get(inst_key)
+
+    new_master = master
+    if die is not None:
+        if die == 0 and base in base_to_upper:
+            new_master = base_to_upper[base]
+        elif die == 1 and base in base_to_bottom:
+            new_master = base_to_bottom[base]
+        else:
+            new_master = base + ("_upper" if die == 0 else "_bottom")
 
-    inst2base = collect_inst_base_from_def(def_in)
+    return f"{indent}- {inst_raw} {new_master}{rest}\n", inst_key, base
 
-    out: List[str] = []
-    in_comp = False
-    in_nets = False
-    i, n = 0, len(lines)
+def _decode_def_line(raw: bytes) -> str:
+    line = raw.decode("utf-8", "ignore")
+    if line.endswith("\r\n"):
+        line = line[:-2] + "\n"
+    return line
 
-    while i < n:
-        line = lines[i]
+# Chunks of a DEF as produced by _iter_def_chunks_*: (kind, in_start, in_end, data)
+DEF_COPY, DEF_COMP, DEF_NET = range(3)
 
-        # COMPONENTS begin/end
-        if not in_comp and COMP_BEGIN_RE.match(line):
-            in_comp = True
-            out.append(line)
-            i += 1
+def _iter_def_chunks_scanned(f, scanner: "defIndex.DefScanner"):
+    """
+    Classify a DEF line by line with the DEF index scanner (which builds the
+    index on the way). COPY data is a str, COMP is a component's first line,
+    NET a whole net block.
+    """
+    net_buf: List[str] = []
+    net_start = 0
+    for a, b, raw in defIndex.iter_lines(f):
+        kind = scanner.feed(a, b, raw)
+        line = _decode_def_line(raw)
+        sec = scanner.section
+
+        if sec == "NETS" and (kind == defIndex.ITEM or (kind == defIndex.CONT and net_buf)):
+            if kind == defIndex.ITEM:
+                net_start = a
+            net_buf.append(line)
+            if not scanner.item_open:
+                yield DEF_NET, net_start, b, net_buf
+                net_buf = []
             continue
-        if in_comp and COMP_END_RE.match(line):
-            in_comp = False
-            out.append(line)
-            i += 1
+
+        if sec == "COMPONENTS" and kind == defIndex.ITEM and COMP_FIRST_RE.match(line):
+            yield DEF_COMP, a, b, line
             continue
 
-        if in_comp:
-            m = COMP_FIRST_RE.match(line)
-            if m:
-                indent, inst_raw, master, rest = m.groups()
-                inst_key = normalize_from_def(inst_raw)
-                die = part_map.get(inst_key)
-
-                new_master = master
-                if die is not None:
-                    base = strip_tier_suffix(master)
-                    if die == 0 and base in base_to_upper:
-                        new_master = base_to_upper[base]
-                    elif die == 1 and base in base_to_bottom:
-                        new_master = base_to_bottom[base]
-                    else:
-                        new_master = base + ("_upper" if die == 0 else "_bottom")
+        yield DEF_COPY, a, b, line
 
-                out.append(f"{indent}- {inst_raw} {new_master}{rest}\n")
+def _iter_def_chunks_indexed(mm, dix: "defIndex.DefIndex"):
+    """
+    Same chunks as _iter_def_chunks_scanned, but driven by a current DEF index:
+    only COMPONENTS and NETS records are decoded, everything else is passed
+    through as a raw byte span of mm (COPY data is None).
+    """
+    pos = 0
+    for _, start, end in dix.iter_items("COMPONENTS"):
+        nl = mm.find(b"\n", start, end)
+        first_end = end if nl < 0 else nl + 1
+        first = _decode_def_line(mm[start:first_end])
+        if not COMP_FIRST_RE.match(first):
+            continue
+        yield DEF_COPY, pos, start, None
+        yield DEF_COMP, start, first_end, first
+        pos = first_end
+    for _, start, end in dix.iter_items("NETS"):
+        yield DEF_COPY, pos, start, None
+        yield DEF_NET, start, end, mm[start:end].decode("utf-8", "ignore").splitlines(keepends=True)
+        pos = end
+    yield DEF_COPY, pos, len(mm), None
 
-                # Copy rest of component until ';'
-                if ";" in line:
-                    i += 1
-                else:
-                    i += 1
-                    while i < n:
-                        out.append(lines[i])
-                        if ";" in lines[i]:
-                            i += 1
-                            break
-                        i += 1
-                continue
+def rewrite_def(
+    def_in: str,
+    def_out: str,
+    part_map: Dict[str, int],
+    base_to_bottom: Dict[str, str],
+    base_to_upper: Dict[str, str],
+    base_to_pin_map: Dict[str, Dict[str, str]],
+    incremental: bool = False,
+    maps_key: str = "",
+) -> bool:
+    """
+    Rewrite DEF in a single streaming pass:
+      - COMPONENTS: update master per inst->die using JSON macro mapping if available,
+        and record inst -> base master on the way
+      - NETS: remap pins for upper instances using JSON pin_map
 
-            out.append(line)
-            i += 1
-            continue
+    DEF requires COMPONENTS to precede NETS, so the inst -> base map is complete
+    by the time the first net is seen. Only the current component/net block is
+    held in memory; output is written as the input is read.
 
-        # NETS begin/end
-        if not in_nets and NETS_BEGIN_RE.match(line):
-            in_nets = True
-            out.append(line)
-            i += 1
-            continue
-        if in_nets and NETS_END_RE.match(line):
-            in_nets = False
-            out.append(line)
-            i += 1
-            continue
+    Sections and records are located with the DEF index (util/defIndex.py): a
+    current <def>.defidx sidecar lets the rewrite jump from record to record
+    and copy everything else as raw bytes; without one, the file is scanned
+    line by line and the sidecar is written for the next reader. A .gz/.zst input
+    is always streamed (no sidecar); a .gz/.zst output is compressed on the fly.
 
-        if in_nets:
-            stripped = line.lstrip()
-            if stripped.startswith("-"):
-                buf = [line]
-                i += 1
-                while i < n:
-                    buf.append(lines[i])
-                    if ";" in lines[i]:
-                        i += 1
-                        break
-                    i += 1
-                new_block = rewrite_def_net_block(buf, part_map, inst2base, base_to_pin_map)
-                out.extend(new_block)
-                continue
-            out.append(line)
-            i += 1
-            continue
+    With incremental=True the previous output is patched through its view index
+    when possible (see patch_view_incremental); otherwise the full rewrite also
+    writes a fresh index for the next run. maps_key identifies the cell map.
+    Returns False if the input DEF is missing.
+    """
+    if not os.path.isfile(def_in):
+        print(f"[ERROR] DEF file '{def_in}' not found.")
+        return False
+
+    plain_in = fileIO.compression(def_in) is None
+    if incremental and not (plain_in and fileIO.compression(def_out) is None):
+        print("[INFO] Incremental DEF needs uncompressed input and output; doing a full rewrite.")
+        incremental = False
+
+    if incremental:
+        def render(idx: ViewIndex, r: int, text: str) -> str:
+            if idx.rec_kind[r] == 0:
+                return _rewrite_def_component_line(
+                    COMP_FIRST_RE.match(text), part_map, base_to_bottom, base_to_upper)[0]
+            return "".join(rewrite_def_net_block(
+                text.splitlines(keepends=True), part_map, idx.inst2base, base_to_pin_map))
 
-        out.append(line)
-        i += 1
+        if patch_view_incremental("DEF", def_in, def_out, part_map, maps_key, render):
+            return True
 
-    with open(def_out, "w", encoding="utf-8") as f:
-        f.writelines(out)
+    idx = ViewIndex("DEF", file_sig(def_in), maps_key, dict(part_map)) if incremental else None
+    inst2base: Dict[str, str] = {}
+    dix = defIndex.load_def_index(def_in) if plain_in else None
+    if dix is not None and (dix.has_cr or dix.size == 0):
+        dix = None
+    scanner = defIndex.DefScanner() if dix is None else None
+
+    with fileIO.open_read(def_in, "rb") as fin, fileIO.open_write(def_out, "wb") as fraw:
+        fout = _OffsetWriter(fraw)
+        if dix is not None:
+            mm = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+            raw_in = memoryview(mm)
+            chunks = _iter_def_chunks_indexed(mm, dix)
+        else:
+            mm = raw_in = None
+            chunks = _iter_def_chunks_scanned(fin, scanner)
+
+        try:
+            for kind, a, b, data in chunks:
+                if kind == DEF_COPY:
+                    if data is None:
+                        fout.write_bytes(raw_in[a:b])
+                    else:
+                        fout.write(data)
+                elif kind == DEF_COMP:
+                    out_a = fout.pos
+                    new_line, inst_key, base = _rewrite_def_component_line(
+                        COMP_FIRST_RE.match(data), part_map, base_to_bottom, base_to_upper)
+                    inst2base[inst_key] = base
+                    fout.write(new_line)
+                    if idx is not None:
+                        idx.link(inst_key, idx.add(a, b, out_a, fout.pos, 0))
+                else:
+                    out_a = fout.pos
+                    for out_line in rewrite_def_net_block(data, part_map, inst2base, base_to_pin_map):
+                        fout.write(out_line)
+                    if idx is not None:
+                        r = idx.add(a, b, out_a, fout.pos, 1)
+                        for inst, _ in DEF_CONN_RE.findall("".join(data)):
+                            inst_key = normalize_name(inst)
+                            if inst2base.get(inst_key) in base_to_pin_map:
+                                idx.link(inst_key, r)
+        finally:
+            chunks.close()
+            if mm is not None:
+                raw_in.release()
+                mm.close()
+
+    if scanner is not None and plain_in:
+        defIndex.save_def_index(scanner.finish(*file_sig(def_in)), def_in)
+    if idx is not None:
+        idx.inst2base = inst2base
+        idx.save(view_index_path(def_out), def_out)
+    return True
 
 # ------------------------------------------------------------
 # Verilog robust instance statement scanning + comment masking
 # ------------------------------------------------------------
+# Comments: "// ... \n" and "/* ... */". An unterminated block comment runs to
+# EOF but leaves the last character unmasked, matching the historical scanner.
+VERILOG_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/|/\*(?:.*(?=.))?", re.S)
+
+# Fast path: one whole statement at paren depth 0, terminated by ';', with
+# parentheses nested at most two levels deep and no string literal. This covers
+# every instance statement of a flat gate-level netlist ("MOD inst ( .A(n) );").
+VERILOG_SIMPLE_STMT_RE = re.compile(
+    r"""[^();"]*(?:\((?:[^()";]|\([^()";]*\))*\)[^();"]*)*;"""
+)
+
+# Slow path tokens: string literals (with backslash escapes) and ( ) ;
+VERILOG_STMT_TOKEN_RE = re.compile(r'"(?:[^"\\]+|\\[\s\S]?)*"?|[();]')
+
 def mask_verilog_comments_keep_len(s: str) -> str:
     """
     Replace comment characters with spaces, preserving string length.
@@ -296,78 +568,96 @@ def mask_verilog_comments_keep_len(s: str) -> str:
       - /* ... */
     This allows regex span indices to apply to original text.
     """
-    out = list(s)
-    i = 0
-    n = len(out)
-    while i < n:
-        if i + 1 < n and out[i] == "/" and out[i+1] == "/":
-            # line comment
-            j = i
-            while j < n and out[j] != "\n":
-                out[j] = " "
-                j += 1
-            i = j
-            continue
-        if i + 1 < n and out[i] == "/" and out[i+1] == "*":
-            # block comment
-            j = i
-            out[j] = " "
-            out[j+1] = " "
-            j += 2
-            while j + 1 < n and not (out[j] == "*" and out[j+1] == "/"):
-                out[j] = " "
-                j += 1
-            if j + 1 < n:
-                out[j] = " "
-                out[j+1] = " "
-                j += 2
-            i = j
+    return VERILOG_COMMENT_RE.sub(lambda m: " " * (m.end() - m.start()), s)
+
+def iter_verilog_statements(text: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """
+    Lazily split Verilog into top-level statements by ';' while tracking
+    parentheses depth and strings. Yields (start,end) spans in the original
+    text (end includes ';'); a trailing remainder without ';' is yielded last.
+    start/end restrict scanning to text[start:end]; start must be a statement
+    boundary (depth 0, outside strings).
+
+    Each statement is first tried against VERILOG_SIMPLE_STMT_RE, which matches
+    it in one compiled-regex call; anything else (strings, deeper nesting,
+    unbalanced parentheses) falls back to scanning only the ( ) ; and string
+    tokens. Both paths split exactly where a character-by-character scan would.
+    """
+    n = len(text) if end is None else end
+    simple = VERILOG_SIMPLE_STMT_RE.match
+    while start < n:
+        m = simple(text, start, n)
+        if m:
+            stop = m.end()
+            yield start, stop
+            start = stop
             continue
-        i += 1
-    return "".join(out)
+
+        depth = 0
+        stop = n
+        for tok in VERILOG_STMT_TOKEN_RE.finditer(text, start, n):
+            c = tok.group()
+            if c == "(":
+                depth += 1
+            elif c == ")":
+                if depth > 0:
+                    depth -= 1
+            elif c == ";" and depth == 0:
+                stop = tok.end()
+                break
+        yield start, stop
+        start = stop
 
 def split_verilog_statements(text: str) -> List[Tuple[int, int]]:
     """
     Split Verilog into top-level statements by ';' while tracking parentheses depth and strings.
     Returns list of (start,end) spans in the original text (end includes ';').
     """
-    spans: List[Tuple[int, int]] = []
-    depth = 0
-    in_str = False
-    esc = False
-    start = 0
-    i = 0
-    n = len(text)
-    while i < n:
-        c = text[i]
-        if in_str:
-            if esc:
-                esc = False
-            elif c == "\\":
-                esc = True
-            elif c == '"':
-                in_str = False
-            i += 1
-            continue
-
-        if c == '"':
-            in_str = True
-            i += 1
+    return list(iter_verilog_statements(text))
+
+def find_verilog_comments(text: str) -> List[Tuple[int, int]]:
+    """Return sorted (start,end) spans of all comments in text."""
+    return [m.span() for m in VERILOG_COMMENT_RE.finditer(text)]
+
+def iter_verilog_statements_masked(
+    text: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    comments: Optional[List[Tuple[int, int]]] = None,
+) -> Iterator[Tuple[int, int, str, str]]:
+    """
+    Yield (start, end, stmt, stmt_masked) for every top-level statement, where
+    stmt_masked has comment characters replaced by spaces (same length as stmt).
+    Comments are located once up front (or passed in from find_verilog_comments),
+    so statements without comments are yielded as-is without building a masked
+    copy of the whole file.
+    """
+    if comments is None:
+        comments = find_verilog_comments(text)
+    nc = len(comments)
+    ci = bisect.bisect_right(comments, (start, start))
+    if ci > 0 and comments[ci - 1][1] > start:
+        ci -= 1
+    for a, b in iter_verilog_statements(text, start, end):
+        while ci < nc and comments[ci][1] <= a:
+            ci += 1
+        stmt = text[a:b]
+        if ci == nc or comments[ci][0] >= b:
+            yield a, b, stmt, stmt
             continue
 
-        if c == "(":
-            depth += 1
-        elif c == ")":
-            if depth > 0:
-                depth -= 1
-        elif c == ";" and depth == 0:
-            spans.append((start, i + 1))
-            start = i + 1
-        i += 1
-
-    if start < n:
-        spans.append((start, n))
-    return spans
+        parts: List[str] = []
+        last = a
+        k = ci
+        while k < nc and comments[k][0] < b:
+            ca = max(comments[k][0], a)
+            cb = min(comments[k][1], b)
+            parts.append(text[last:ca])
+            parts.append(" " * (cb - ca))
+            last = cb
+            k += 1
+        parts.append(text[last:b])
+        yield a, b, stmt, "".join(parts)
 
 # instance header matcher (operates on COMMENT-MASKED text so spans align)
 # module can be normal or escaped; instance can be normal or escaped
@@ -459,6 +749,284 @@ def parse_cell_map_json(cell_map_path: Optional[str]):
 
     return base_to_bottom, base_to_upper, base_to_pin_map, base_to_upper_extra_pins
 
+def _rewrite_verilog_stmt(
+    stmt: str,
+    stmt_m: str,
+    part_map: Dict[str, int],
+    base_to_bottom: Dict[str, str],
+    base_to_upper: Dict[str, str],
+    base_to_pin_map: Dict[str, Dict[str, str]],
+    base_to_upper_extra_pins: Dict[str, List[str]],
+) -> str:
+    """
+    Rewrite one statement; stmt_m is the comment-masked copy used for matching.
+    Returns stmt unchanged if it is not an instance of a partitioned inst.
+    """
+    return _rewrite_verilog_stmt_inst(
+        stmt, stmt_m, part_map, base_to_bottom, base_to_upper, base_to_pin_map, base_to_upper_extra_pins)[0]
+
+def _rewrite_verilog_stmt_inst(
+    stmt: str,
+    stmt_m: str,
+    part_map: Dict[str, int],
+    base_to_bottom: Dict[str, str],
+    base_to_upper: Dict[str, str],
+    base_to_pin_map: Dict[str, Dict[str, str]],
+    base_to_upper_extra_pins: Dict[str, List[str]],
+) -> Tuple[str, Optional[str]]:
+    """
+    Like _rewrite_verilog_stmt, but also returns the normalized instance name
+    whenever stmt is an instance statement (None otherwise), partitioned or not.
+    """
+    # Quick filter: instance statements usually contain '(' and ')'
+    if "(" not in stmt_m:
+        return stmt, None
+
+    m = VERILOG_INST_HDR_RE.match(stmt_m)
+    if not m:
+        return stmt, None
+
+    module_tok = m.group(2)
+    inst_tok   = m.group(4)
+
+    inst_norm = normalize_from_verilog(inst_tok)
+    die = part_map.get(inst_norm)
+    if die is None:
+        return stmt, inst_norm
+
+    module_base = strip_tier_suffix(module_tok)
+
+    if die == 0 and module_base in base_to_upper:
+        new_module = base_to_upper[module_base]
+    elif die == 1 and module_base in base_to_bottom:
+        new_module = base_to_bottom[module_base]
+    else:
+        new_module = module_base + ("_upper" if die == 0 else "_bottom")
+
+    # Replace module token at the exact span in original stmt (based on masked match)
+    mod_span = m.span(2)  # (start,end) inside stmt
+    stmt2 = stmt[:mod_span[0]] + new_module + stmt[mod_span[1]:]
+
+    # Port remap for upper
+    if die == 0 and module_base in base_to_pin_map:
+        pm = base_to_pin_map[module_base]
+
+        def _port_repl(mm):
+            dot, pin, lp = mm.groups()
+            return f"{dot}{pm.get(pin, pin)}{lp}"
+
+        stmt2 = VERILOG_PORT_RE.sub(_port_repl, stmt2)
+
+    # Bind extra pins to 1'b0 for upper
+    if die == 0 and module_base in base_to_upper_extra_pins:
+        stmt2 = _append_extra_ports_instance(stmt2, base_to_upper_extra_pins[module_base])
+
+    return stmt2, inst_norm
+
+def _iter_rewritten_verilog(
+    text: str,
+    start: int,
+    end: int,
+    comments: List[Tuple[int, int]],
+    *maps,
+    recs: Optional[list] = None,
+) -> Iterator[str]:
+    """
+    Yield the rewritten text of text[start:end] (statement-aligned), chunk by chunk.
+    If recs is a list, (in_a, in_b, out_a, out_b, inst, masked_or_None) is
+    appended for every instance statement; out offsets are output bytes
+    counted from the first yielded chunk.
+    """
+    pos = 0
+    for a, b, stmt, stmt_m in iter_verilog_statements_masked(text, start, end, comments):
+        out, inst = _rewrite_verilog_stmt_inst(stmt, stmt_m, *maps)
+        if recs is not None:
+            n = _nbytes(out)
+            if inst is not None:
+                recs.append((a, b, pos, pos + n, inst, None if stmt_m is stmt else stmt_m))
+            pos += n
+        yield out
+
+# ------------------------------------------------------------
+# Parallel (sharded) Verilog rewrite
+# ------------------------------------------------------------
+# The parent only guesses cut points, in O(shards) (verilog_shard_bounds).
+# Each worker finds the comments of its own range and rewrites the statements
+# from its start up to its cut, stopping short if a statement runs across the
+# cut. The parent accepts a shard only if it starts exactly where the accepted
+# output ends, outside a comment; anything else is rewritten serially, so a
+# bad guess costs time, never a different output.
+#
+# Read-only state of the worker pool: netlist text and the partition/cell
+# maps. It is set before the pool starts so fork()ed workers inherit it for
+# free; without fork it is shipped once per worker through the pool
+# initializer. Tasks only carry (start,end) shard bounds.
+_SHARD_STATE: Dict[str, object] = {}
+
+# Below this netlist size a pool costs more than it saves
+VERILOG_PARALLEL_MIN_BYTES = 4 << 20
+VERILOG_SHARD_MIN_BYTES = 256 << 10
+# How far back a cut looks for an open /* block comment
+_CUT_LOOKBACK = 64 << 10
+
+def _init_shard_worker(state: Optional[Dict[str, object]]) -> None:
+    global _SHARD_STATE
+    if state is not None:
+        _SHARD_STATE = state
+
+def _verilog_comments_from(text: str, start: int, end: int) -> Tuple[List[Tuple[int, int]], bool]:
+    """
+    Comment spans of text[start:end], scanning from start (which must be
+    outside any comment), and whether the last one runs across end.
+    """
+    spans: List[Tuple[int, int]] = []
+    for m in VERILOG_COMMENT_RE.finditer(text, start):
+        if m.start() >= end:
+            break
+        spans.append(m.span())
+    return spans, bool(spans) and spans[-1][1] > end
+
+def _rewrite_verilog_span(
+    text: str,
+    start: int,
+    end: int,
+    comments: List[Tuple[int, int]],
+    maps: tuple,
+    index: bool,
+) -> Tuple[str, Optional[list], int]:
+    """
+    Rewrite the statements from start (a statement boundary) up to end.
+    Returns (output, index records or None, stop), where stop is the end of the
+    last statement rewritten: end, or less if a statement runs across end
+    (end is not a statement boundary), which is then left out. Records are as
+    in _iter_rewritten_verilog.
+    """
+    recs = [] if index else None
+    parts: List[str] = []
+    pos = 0
+    stop = start
+    for a, b, stmt, stmt_m in iter_verilog_statements_masked(text, start, None, comments):
+        if b > end:
+            break
+        out, inst = _rewrite_verilog_stmt_inst(stmt, stmt_m, *maps)
+        if recs is not None:
+            n = _nbytes(out)
+            if inst is not None:
+                recs.append((a, b, pos, pos + n, inst, None if stmt_m is stmt else stmt_m))
+            pos += n
+        parts.append(out)
+        stop = b
+        if b == end:
+            break
+    return "".join(parts), recs, stop
+
+def _rewrite_verilog_shard(bounds: Tuple[int, int]) -> Tuple[int, int, str, Optional[list], bool]:
+    """(start, stop, output, index records or None, stop is inside a comment) of one shard."""
+    st = _SHARD_STATE
+    start, end = bounds
+    comments, crosses = _verilog_comments_from(st["text"], start, end)
+    chunk, recs, stop = _rewrite_verilog_span(st["text"], start, end, comments, st["maps"], st["index"])
+    return start, stop, chunk, recs, crosses and stop == end
+
+def _likely_verilog_cut(text: str, p: int) -> bool:
+    """Cheap local check that the ';' at p ends a statement outside comments and strings."""
+    line = text[text.rfind("\n", 0, p) + 1:p + 1]
+    if "//" in line or "/*" in line or "*/" in line or '"' in line:
+        return False
+    # ';' inside an escaped identifier ("\a;b ")
+    words = line.split()
+    if words and words[-1].startswith("\\"):
+        return False
+    lo = max(0, p - _CUT_LOOKBACK)
+    return text.rfind("/*", lo, p) <= text.rfind("*/", lo, p)
+
+def verilog_shard_bounds(text: str, n_shards: int) -> List[Tuple[int, int]]:
+    """
+    Cut text into about n_shards contiguous (start,end) ranges of similar size,
+    in O(n_shards): each cut follows the first ";" + newline after k*len/n_shards
+    that _likely_verilog_cut accepts. Cuts are guesses that the workers check
+    (see above).
+    """
+    n = len(text)
+    cuts = [0]
+    for k in range(1, max(1, n_shards)):
+        p = max(k * n // n_shards, cuts[-1])
+        while True:
+            p = text.find(";\n", p)
+            if p < 0 or _likely_verilog_cut(text, p):
+                break
+            p += 1
+        if p < 0:
+            break
+        if p + 1 > cuts[-1]:
+            cuts.append(p + 1)
+    if cuts[-1] < n:
+        cuts.append(n)
+    return list(zip(cuts, cuts[1:]))
+
+def _iter_rewritten_verilog_sharded(
+    text: str,
+    maps: tuple,
+    jobs: int,
+    index: bool = False,
+) -> Iterator[Tuple[str, Optional[list]]]:
+    """
+    Rewrite shards in a process pool of `jobs` workers; yields (output, index
+    records or None) in order, see _iter_rewritten_verilog.
+    """
+    global _SHARD_STATE
+    # A few shards per worker keeps the pool busy when shards are uneven.
+    n_shards = max(1, min(jobs * 4, len(text) // VERILOG_SHARD_MIN_BYTES))
+    bounds = verilog_shard_bounds(text, n_shards)
+    state = {"text": text, "maps": maps, "index": index}
+    if "fork" in mp.get_all_start_methods():
+        ctx = mp.get_context("fork")
+        _SHARD_STATE = state
+        initargs = (None,)
+    else:
+        ctx = mp.get_context()
+        initargs = (state,)
+
+    comments: Optional[List[Tuple[int, int]]] = None  # whole file, only for the serial gaps
+    pos = 0
+    pos_in_comment = False
+
+    def in_comment(p: int) -> bool:
+        k = bisect.bisect_right(comments, (p, len(text) + 1)) - 1
+        return k >= 0 and comments[k][0] < p < comments[k][1]
+
+    sys.stdout.flush()
+    try:
+        with ctx.Pool(jobs, initializer=_init_shard_worker, initargs=initargs) as pool:
+            for start, stop, chunk, recs, stop_in_comment in pool.imap(_rewrite_verilog_shard, bounds):
+                if start != pos or pos_in_comment:
+                    # The previous cut was no statement boundary: rewrite up
+                    # to this shard serially, or past it if it is no better
+                    if comments is None:
+                        comments = find_verilog_comments(text)
+                    chunk_s, recs_s, pos = _rewrite_verilog_span(text, pos, start, comments, maps, index)
+                    yield chunk_s, recs_s
+                    pos_in_comment = in_comment(pos)
+                    if start != pos or pos_in_comment:
+                        continue
+                yield chunk, recs
+                pos = stop
+                pos_in_comment = stop_in_comment
+    finally:
+        _SHARD_STATE = {}
+    if pos < len(text):
+        if comments is None:
+            comments = find_verilog_comments(text)
+        chunk, recs, _ = _rewrite_verilog_span(text, pos, len(text), comments, maps, index)
+        yield chunk, recs
+
+def _add_verilog_index_recs(idx: ViewIndex, recs: list, out_base: int) -> None:
+    for a, b, out_a, out_b, inst, masked in recs:
+        r = idx.add(a, b, out_base + out_a, out_base + out_b)
+        idx.link(inst, r)
+        if masked is not None:
+            idx.rec_masked[r] = masked
+
 def rewrite_verilog(
     v_in: str,
     v_out: str,
@@ -467,87 +1035,89 @@ def rewrite_verilog(
     base_to_upper: Dict[str, str],
     base_to_pin_map: Dict[str, Dict[str, str]],
     base_to_upper_extra_pins: Dict[str, List[str]],
-) -> None:
+    jobs: int = 1,
+    incremental: bool = False,
+    maps_key: str = "",
+) -> bool:
     """
     Robust rewrite for structural/gate-level Verilog instance statements.
-    Works on full-file statement spans. Uses comment masking so indices align.
+    Works on full-file statement spans from the lazy tokenizer; comments are
+    masked per statement so indices align. Output is written as it is produced.
 
       - Rename module based on inst->die and JSON macro mapping
       - For upper (die=0): port rename using pin_map
       - For upper: bind extra pins to 1'b0 if missing
+
+    With jobs > 1, statements are rewritten in shards by a process pool and
+    the shard outputs are concatenated in order (same output as jobs=1);
+    jobs is capped at the CPU count, and netlists under
+    VERILOG_PARALLEL_MIN_BYTES are always rewritten serially.
+    With incremental=True the previous output is patched through its view index
+    when possible; otherwise the full rewrite also writes a fresh index
+    (ASCII, LF-only netlists, so str offsets are byte offsets).
+    The input is decoded straight from its mmap; .gz/.zst input and output are
+    (de)compressed on the fly, but are never patched incrementally.
+    Returns False if the input Verilog is missing.
     """
-    try:
-        text = open(v_in, "r", encoding="utf-8", errors="ignore").read()
-    except FileNotFoundError:
+    if not os.path.isfile(v_in):
         print(f"[ERROR] Verilog file '{v_in}' not found.")
-        return
-
-    masked = mask_verilog_comments_keep_len(text)
-    spans = split_verilog_statements(text)
-
-    out_chunks: List[str] = []
-    last = 0
-
-    for (a, b) in spans:
-        stmt = text[a:b]
-        stmt_m = masked[a:b]
-
-        out_chunks.append(text[last:a])
-        last = b
-
-        # Quick filter: instance statements usually contain '(' and ')'
-        if "(" not in stmt_m:
-            out_chunks.append(stmt)
-            continue
-
-        m = VERILOG_INST_HDR_RE.match(stmt_m)
-        if not m:
-            out_chunks.append(stmt)
-            continue
-
-        indent = m.group(1)
-        module_tok = m.group(2)
-        inst_tok   = m.group(4)
-
-        inst_norm = normalize_from_verilog(inst_tok)
-        die = part_map.get(inst_norm)
-        if die is None:
-            out_chunks.append(stmt)
-            continue
-
-        module_base = strip_tier_suffix(module_tok)
-
-        if die == 0 and module_base in base_to_upper:
-            new_module = base_to_upper[module_base]
-        elif die == 1 and module_base in base_to_bottom:
-            new_module = base_to_bottom[module_base]
+        return False
+
+    plain = fileIO.compression(v_in) is None and fileIO.compression(v_out) is None
+    if incremental and not plain:
+        print("[INFO] Incremental Verilog needs uncompressed input and output; doing a full rewrite.")
+        incremental = False
+
+    maps = (part_map, base_to_bottom, base_to_upper, base_to_pin_map, base_to_upper_extra_pins)
+
+    if incremental:
+        def render(idx: ViewIndex, r: int, text: str) -> str:
+            return _rewrite_verilog_stmt(text, idx.rec_masked.get(r, text), *maps)
+
+        if patch_view_incremental("Verilog", v_in, v_out, part_map, maps_key, render):
+            return True
+
+    in_sig = file_sig(v_in)
+    with fileIO.mapped(v_in) as data:
+        with memoryview(data) as view:
+            text = str(view, "utf-8", "ignore")
+        # Same length as ASCII text <=> every byte was ASCII (nothing dropped)
+        indexable = len(text) == len(data) and text.isascii() and "\r" not in text
+    if not indexable and "\r" in text:
+        # Universal newlines, as a text-mode open() would do
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    idx = None
+    if incremental:
+        if indexable:
+            idx = ViewIndex("Verilog", in_sig, maps_key, dict(part_map))
         else:
-            new_module = module_base + ("_upper" if die == 0 else "_bottom")
-
-        # Replace module token at the exact span in original stmt (based on masked match)
-        mod_span = m.span(2)  # (start,end) inside stmt
-        stmt2 = stmt[:mod_span[0]] + new_module + stmt[mod_span[1]:]
-
-        # Port remap for upper
-        if die == 0 and module_base in base_to_pin_map:
-            pm = base_to_pin_map[module_base]
-
-            def _port_repl(mm):
-                dot, pin, lp = mm.groups()
-                return f"{dot}{pm.get(pin, pin)}{lp}"
-
-            stmt2 = VERILOG_PORT_RE.sub(_port_repl, stmt2)
-
-        # Bind extra pins to 1'b0 for upper
-        if die == 0 and module_base in base_to_upper_extra_pins:
-            stmt2 = _append_extra_ports_instance(stmt2, base_to_upper_extra_pins[module_base])
-
-        out_chunks.append(stmt2)
-
-    out_chunks.append(text[last:])
+            print(f"[INFO] '{v_in}' is not plain ASCII/LF; no view index written.")
+
+    # Workers beyond the CPU count only add pool overhead
+    jobs = min(jobs, os.cpu_count() or 1)
+    if len(text) < VERILOG_PARALLEL_MIN_BYTES:
+        jobs = 1
+
+    with fileIO.open_write(v_out, "wb") as fraw:
+        fout = _OffsetWriter(fraw)
+        if jobs > 1:
+            for chunk, recs in _iter_rewritten_verilog_sharded(text, maps, jobs, index=idx is not None):
+                out_base = fout.pos
+                fout.write(chunk)
+                if idx is not None:
+                    _add_verilog_index_recs(idx, recs, out_base)
+        else:
+            comments = find_verilog_comments(text)
+            recs = [] if idx is not None else None
+            for chunk in _iter_rewritten_verilog(text, 0, len(text), comments, *maps, recs=recs):
+                fout.write(chunk)
+            if idx is not None:
+                _add_verilog_index_recs(idx, recs, 0)
 
-    with open(v_out, "w", encoding="utf-8") as f:
-        f.write("".join(out_chunks))
+    if idx is not None:
+        idx.save(view_index_path(v_out), v_out)
+    return True
 
 def ensure_upper_has_more_cells(part_map: Dict[str, int], ratio_threshold: float = 2.0) -> Dict[str, int]:
     """
@@ -589,9 +1159,126 @@ def ensure_upper_has_more_cells(part_map: Dict[str, int], ratio_threshold: float
     print(f"[INFO] Keep (ratio={ratio:.2f} < {ratio_threshold}): upper(0)={c0}, bottom(1)={c1}.")
     return part_map
 
+# ------------------------------------------------------------
+# Parsed-input cache (partition.txt + map.json)
+# ------------------------------------------------------------
+# Bump when the cached tables or the parsers/normalization change.
+INPUT_CACHE_VERSION = 1
+# Cache files kept per directory (most recently used first).
+INPUT_CACHE_KEEP = 4
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _parse_inputs(partition_path: Optional[str], cell_map_path: Optional[str]):
+    return parse_partition_file(partition_path), parse_cell_map_json(cell_map_path)
+
+def load_inputs_cached(
+    partition_path: Optional[str],
+    cell_map_path: Optional[str],
+    cache_dir: Optional[str],
+):
+    """
+    Return (part_map, parse_cell_map_json(...)) for the given inputs, reusing a
+    pickle under cache_dir keyed by the content hash of both files. A changed
+    partition or cell map yields a new key, so stale entries are never read;
+    only the INPUT_CACHE_KEEP most recent entries are kept.
+    Falls back to plain parsing when caching is off or an input is missing.
+    """
+    paths = [p for p in (partition_path, cell_map_path) if p]
+    if not cache_dir or not paths or not all(os.path.isfile(p) for p in paths):
+        return _parse_inputs(partition_path, cell_map_path)
+
+    h = hashlib.sha1(f"v{INPUT_CACHE_VERSION}".encode())
+    for p in (partition_path, cell_map_path):
+        h.update(b"\0" + (file_digest(p).encode() if p else b"-"))
+    cache_path = os.path.join(cache_dir, f"3d_views_inputs.{h.hexdigest()}.pkl")
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        os.utime(cache_path)
+        print(f"[INFO] Loaded parsed partition/cell map from cache '{cache_path}'.")
+        return cached
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[WARN] Ignoring unreadable cache '{cache_path}': {e}")
+
+    parsed = _parse_inputs(partition_path, cell_map_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(parsed, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        old = sorted(glob.glob(os.path.join(cache_dir, "3d_views_inputs.*.pkl")),
+                     key=os.path.getmtime, reverse=True)
+        for stale in old[INPUT_CACHE_KEEP:]:
+            os.remove(stale)
+    except OSError as e:
+        print(f"[WARN] Cannot write cache '{cache_path}': {e}")
+    return parsed
+
+# ------------------------------------------------------------
+# Driver: DEF and Verilog views in parallel
+# ------------------------------------------------------------
+def _run_view_job(label: str, out_path: str, fn, args: tuple, kwargs: dict) -> bool:
+    """Run one rewrite and report its wall time; returns the rewrite status."""
+    t0 = time.perf_counter()
+    ok = fn(*args, **kwargs)
+    dt = time.perf_counter() - t0
+    if ok:
+        print(f"[INFO] {label} view written to '{out_path}' in {dt:.2f}s.")
+    else:
+        print(f"[ERROR] {label} view '{out_path}' failed after {dt:.2f}s.")
+    sys.stdout.flush()
+    return bool(ok)
+
+def _view_job_process(label: str, out_path: str, fn, args: tuple, kwargs: dict) -> None:
+    sys.exit(0 if _run_view_job(label, out_path, fn, args, kwargs) else 1)
+
+def run_view_jobs(view_jobs: List[tuple], concurrent: bool = True) -> int:
+    """
+    Run (label, out_path, fn, args, kwargs) rewrites, each in its own worker
+    process when concurrent (they share only read-only inputs), else in turn.
+    Returns 0 only if every rewrite succeeded.
+    """
+    if not concurrent or len(view_jobs) < 2:
+        results = [_run_view_job(*job) for job in view_jobs]
+        return 0 if all(results) else 1
+
+    # fork lets the workers inherit the parsed maps instead of pickling them.
+    # Workers are non-daemonic so the Verilog job can start its own --jobs pool.
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context()
+    sys.stdout.flush()  # forked children would otherwise re-emit buffered output
+    procs = []
+    for job in view_jobs:
+        proc = ctx.Process(target=_view_job_process, args=job, name=f"3d-views-{job[0]}")
+        proc.start()
+        procs.append((job[0], proc))
+
+    status = 0
+    try:
+        for label, proc in procs:
+            proc.join()
+            if proc.exitcode != 0:
+                print(f"[ERROR] {label} worker exited with status {proc.exitcode}.")
+                status = 1
+    except KeyboardInterrupt:
+        for _, proc in procs:
+            proc.terminate()
+        raise
+    return status
+
 def main():
     ap = argparse.ArgumentParser(
-        description="Convert 2D DEF/Verilog to 3D tier views using partition + JSON cell map."
+        description="Convert 2D DEF/Verilog to 3D tier views using partition + JSON cell map. "
+                    "Any input or output may be .gz/.zst compressed."
     )
     ap.add_argument("--def-in", required=True)
     ap.add_argument("--def-out", required=True)
@@ -599,19 +1286,40 @@ def main():
     ap.add_argument("--v-out", required=True)
     ap.add_argument("--partition", default=None, help="partition.txt: <inst> <die(0/1)> (die can be last token)")
     ap.add_argument("--cell-map", default=None, help="map.json with base/bottom/upper macro and pin_map")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for the Verilog rewrite (default: 1).")
+    ap.add_argument("--cache-dir", default=None,
+                    help="Cache for parsed partition/cell map (default: .3d_views_cache next to --def-out).")
+    ap.add_argument("--no-cache", action="store_true", help="Always re-parse partition and cell map.")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Patch only instances whose die changed since the previous run, using the view "
+                         "indexes (<out>.3didx) it left behind; falls back to a full rewrite and refreshes them.")
+    ap.add_argument("--serial", action="store_true",
+                    help="Rewrite DEF and Verilog one after the other instead of in two concurrent workers.")
     args = ap.parse_args()
 
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or os.path.join(os.path.dirname(os.path.abspath(args.def_out)), ".3d_views_cache")
+
     # Partition map (must exist if you want deterministic conversion)
-    part = parse_partition_file(args.partition)
+    part, cell_maps = load_inputs_cached(args.partition, args.cell_map, cache_dir)
     part = ensure_upper_has_more_cells(part)
-    
+
     if not part:
         print("[WARN] No partition map provided/parsed. Conversion will only apply JSON macro mapping where possible.")
 
-    base_to_bottom, base_to_upper, base_to_pin_map, base_to_upper_extra_pins = parse_cell_map_json(args.cell_map)
+    base_to_bottom, base_to_upper, base_to_pin_map, base_to_upper_extra_pins = cell_maps
+    maps_key = file_digest(args.cell_map) if args.cell_map and os.path.isfile(args.cell_map) else "-"
+    view_kwargs = {"incremental": args.incremental, "maps_key": maps_key}
 
-    rewrite_def(args.def_in, args.def_out, part, base_to_bottom, base_to_upper, base_to_pin_map)
-    rewrite_verilog(args.v_in, args.v_out, part, base_to_bottom, base_to_upper, base_to_pin_map, base_to_upper_extra_pins)
+    view_jobs = [
+        ("DEF", args.def_out, rewrite_def,
+         (args.def_in, args.def_out, part, base_to_bottom, base_to_upper, base_to_pin_map), view_kwargs),
+        ("Verilog", args.v_out, rewrite_verilog,
+         (args.v_in, args.v_out, part, base_to_bottom, base_to_upper, base_to_pin_map, base_to_upper_extra_pins),
+         dict(view_kwargs, jobs=args.jobs)),
+    ]
+    return run_view_jobs(view_jobs, concurrent=not args.serial)
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
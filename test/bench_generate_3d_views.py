@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ============================================================
+#  bench_generate_3d_views.py
+#
+#  Benchmark the Verilog rewrite of scripts_openroad/generate_3d_views.py
+#  on a synthetic flat gate-level netlist (default: 1M instances).
+#
+#  What gets measured:
+#    1) Tokenizer: comment masking + top-level statement splitting
+#    2) rewrite_verilog end to end (partition + JSON cell map), serially
+#    3) Scaling: rewrite_verilog with 2, 4, ... up to --jobs workers,
+#       speedup and efficiency against the serial run (rewrite_verilog
+#       caps workers at the CPU count, so run it on the target machine)
+#    4) The parent's serial share of a sharded rewrite (decode, cut
+#       points, output write) and the speedup limit it implies
+#
+#  The sharded path is always checked byte for byte against the serial
+#  output, even on a single CPU.
+#
+#  With --reference, the historical per-character scanners are run on
+#  the same netlist and the rewritten output is checked byte for byte.
+# ============================================================
+
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts_openroad"))
+import generate_3d_views as g3d  # noqa: E402
+
+
+CELLS = {
+    "INVx1_ASAP7_75t_R": ["A", "Y"],
+    "NAND2x1_ASAP7_75t_R": ["A", "B", "Y"],
+    "BUFx2_ASAP7_75t_R": ["A", "Y"],
+    "DFFHQNx1_ASAP7_75t_R": ["D", "CLK", "QN"],
+}
+
+
+# -----------------------------
+# Reference (per-character) scanners
+# -----------------------------
+def ref_mask_verilog_comments_keep_len(s: str) -> str:
+    out = list(s)
+    i = 0
+    n = len(out)
+    while i < n:
+        if i + 1 < n and out[i] == "/" and out[i+1] == "/":
+            j = i
+            while j < n and out[j] != "\n":
+                out[j] = " "
+                j += 1
+            i = j
+            continue
+        if i + 1 < n and out[i] == "/" and out[i+1] == "*":
+            j = i
+            out[j] = " "
+            out[j+1] = " "
+            j += 2
+            while j + 1 < n and not (out[j] == "*" and out[j+1] == "/"):
+                out[j] = " "
+                j += 1
+            if j + 1 < n:
+                out[j] = " "
+                out[j+1] = " "
+                j += 2
+            i = j
+            continue
+        i += 1
+    return "".join(out)
+
+
+def ref_split_verilog_statements(text: str) -> List[Tuple[int, int]]:
+    spans: List[Tuple[int, int]] = []
+    depth = 0
+    in_str = False
+    esc = False
+    start = 0
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif c == "\\":
+                esc = True
+            elif c == '"':
+                in_str = False
+            i += 1
+            continue
+        if c == '"':
+            in_str = True
+            i += 1
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            if depth > 0:
+                depth -= 1
+        elif c == ";" and depth == 0:
+            spans.append((start, i + 1))
+            start = i + 1
+        i += 1
+    if start < n:
+        spans.append((start, n))
+    return spans
+
+
+def ref_rewrite_verilog(v_in, v_out, part_map, b2b, b2u, b2pm, b2extra) -> None:
+    text = open(v_in, "r", encoding="utf-8", errors="ignore").read()
+    masked = ref_mask_verilog_comments_keep_len(text)
+    out_chunks: List[str] = []
+    last = 0
+    for a, b in ref_split_verilog_statements(text):
+        out_chunks.append(text[last:a])
+        last = b
+        out_chunks.append(g3d._rewrite_verilog_stmt(
+            text[a:b], masked[a:b], part_map, b2b, b2u, b2pm, b2extra))
+    out_chunks.append(text[last:])
+    with open(v_out, "w", encoding="utf-8") as f:
+        f.write("".join(out_chunks))
+
+
+# -----------------------------
+# Synthetic inputs
+# -----------------------------
+def write_inputs(workdir: Path, n_inst: int, seed: int) -> Tuple[Path, Path, Path]:
+    rnd = random.Random(seed)
+    names = list(CELLS)
+
+    cell_map = {"cells": {}}
+    for base, pins in CELLS.items():
+        cell_map["cells"][base] = {
+            "base": base,
+            "bottom": {"macro": base + "_bottom"},
+            "upper": {"macro": base + "_upper", "pins": [p + "_m" for p in pins] + ["VDD_TOP"]},
+            "pin_map": {p: p + "_m" for p in pins},
+        }
+    map_path = workdir / "map.json"
+    map_path.write_text(json.dumps(cell_map), encoding="utf-8")
+
+    v_path = workdir / "bench.v"
+    part_path = workdir / "partition.txt"
+    with open(v_path, "w", encoding="utf-8") as fv, open(part_path, "w", encoding="utf-8") as fp:
+        fv.write("/* Generated by bench_generate_3d_views.py */\n")
+        fv.write("module top (clk, rst);\n input clk;\n input rst;\n")
+        for i in range(n_inst):
+            fv.write(f" wire n{i};\n")
+        for i in range(n_inst):
+            base = names[i % len(names)]
+            inst = f"\\u_core/blk{i % 97}/u{i} " if i % 10 == 0 else f"u{i}"
+            conns = ",\n    ".join(
+                f".{p}(n{(i + k) % n_inst})" for k, p in enumerate(CELLS[base]))
+            fv.write(f" {base} {inst} ({conns});\n")
+            fp.write(f"{inst.strip().lstrip(chr(92))} {rnd.randint(0, 1)}\n")
+        fv.write("endmodule\n")
+    return v_path, part_path, map_path
+
+
+def _timed(label: str, fn, *args):
+    t0 = time.perf_counter()
+    ret = fn(*args)
+    print(f"  {label:<34s} {time.perf_counter() - t0:9.2f} s")
+    return ret
+
+
+def _elapsed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def _jobs_steps(max_jobs: int) -> List[int]:
+    """2, 4, 8, ... below max_jobs, then max_jobs."""
+    steps = []
+    j = 2
+    while j < max_jobs:
+        steps.append(j)
+        j *= 2
+    return steps + [max_jobs] if max_jobs > 1 else steps
+
+
+def _write_sharded(text: str, path: Path, maps: tuple, jobs: int) -> None:
+    """The sharded path of rewrite_verilog, whatever the CPU count."""
+    with open(path, "wb") as f:
+        for chunk, _ in g3d._iter_rewritten_verilog_sharded(text, maps, jobs):
+            f.write(chunk.encode("utf-8"))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark generate_3d_views.py Verilog rewrite.")
+    ap.add_argument("-n", "--instances", type=int, default=1000000, help="Instance count (default: 1M).")
+    ap.add_argument("--seed", type=int, default=1, help="Random seed for the partition.")
+    ap.add_argument("--reference", action="store_true",
+                    help="Also run the per-character reference scanners and compare outputs.")
+    ap.add_argument("--jobs", "-j", type=int, default=0,
+                    help="Time the sharded rewrite with up to this many workers (default: CPU count).")
+    ap.add_argument("--workdir", default=None, help="Keep inputs/outputs here instead of a temp dir.")
+    args = ap.parse_args()
+
+    tmp = None
+    if args.workdir:
+        workdir = Path(args.workdir).resolve()
+        workdir.mkdir(parents=True, exist_ok=True)
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="bench_3d_views_")
+        workdir = Path(tmp.name)
+
+    try:
+        print(f"[INFO] Generating {args.instances} instances in {workdir}")
+        v_path, part_path, map_path = write_inputs(workdir, args.instances, args.seed)
+        print(f"[INFO] Netlist size: {os.path.getsize(v_path) / 1e6:.1f} MB")
+
+        part = g3d.parse_partition_file(str(part_path))
+        maps = g3d.parse_cell_map_json(str(map_path))
+        text = v_path.read_text(encoding="utf-8", errors="ignore")
+
+        print("[BENCH] tokenizer")
+        n_new = _timed("iter_verilog_statements_masked", lambda t: sum(1 for _ in g3d.iter_verilog_statements_masked(t)), text)
+        if args.reference:
+            _timed("reference mask_comments", ref_mask_verilog_comments_keep_len, text)
+            n_ref = len(_timed("reference split_statements", ref_split_verilog_statements, text))
+            if n_ref != n_new:
+                print(f"[ERROR] statement count mismatch: {n_new} vs reference {n_ref}")
+                return 1
+        del text
+
+        print("[BENCH] rewrite_verilog")
+        out_new = workdir / "bench_3D.v"
+        t_serial = _elapsed(g3d.rewrite_verilog, str(v_path), str(out_new), part, *maps)
+        print(f"  {'rewrite_verilog':<34s} {t_serial:9.2f} s")
+        serial_bytes = out_new.read_bytes()
+
+        cpus = os.cpu_count() or 1
+        max_jobs = args.jobs or cpus
+        text = v_path.read_text(encoding="utf-8", errors="ignore")
+        check_jobs = max(2, min(max_jobs, 4))
+        out_par = workdir / "bench_3D.par.v"
+        _write_sharded(text, out_par, (part,) + tuple(maps), check_jobs)
+        if out_par.read_bytes() != serial_bytes:
+            print(f"[ERROR] Sharded rewrite ({check_jobs} workers) differs from serial output.")
+            return 1
+        print(f"[OK] Sharded rewrite ({check_jobs} workers) is byte-identical to the serial output.")
+
+        print(f"[BENCH] scaling on {cpus} CPU(s), serial = 1.00x")
+        for jobs in _jobs_steps(min(max_jobs, cpus)):
+            t = _elapsed(g3d.rewrite_verilog, str(v_path), str(out_par), part, *maps, jobs)
+            if out_par.read_bytes() != serial_bytes:
+                print(f"[ERROR] rewrite_verilog --jobs {jobs} output differs from serial output.")
+                return 1
+            print(f"  {'rewrite_verilog --jobs %d' % jobs:<34s} {t:9.2f} s {t_serial / t:6.2f}x"
+                  f"  efficiency {t_serial / t / jobs:4.0%}")
+        if max_jobs > cpus:
+            print(f"[INFO] rewrite_verilog uses at most {cpus} worker(s) here; "
+                  f"run on a machine with {max_jobs} CPUs for the full figure.")
+
+        # Everything the parent does itself in a sharded rewrite: decode the
+        # input, pick the cut points, unpickle the shard outputs and write
+        # them in order
+        print("[BENCH] parent serial share")
+        raw = v_path.read_bytes()
+        t_decode = _elapsed(lambda: str(raw, "utf-8", "ignore"))
+        n_shards = max(1, min(max_jobs * 4, len(text) // g3d.VERILOG_SHARD_MIN_BYTES))
+        t_cuts = _elapsed(g3d.verilog_shard_bounds, text, n_shards)
+        pickled = pickle.dumps(serial_bytes.decode("utf-8"))
+        t_recv = _elapsed(pickle.loads, pickled)
+        t_write = _elapsed(lambda: (workdir / "bench_3D.tmp.v").write_bytes(serial_bytes))
+        share = (t_decode + t_cuts + t_recv + t_write) / t_serial
+        print(f"  {'decode':<34s} {t_decode:9.3f} s")
+        print(f"  {'cut points (%d shards)' % n_shards:<34s} {t_cuts:9.3f} s")
+        print(f"  {'receive shard outputs':<34s} {t_recv:9.3f} s")
+        print(f"  {'write output':<34s} {t_write:9.3f} s")
+        for n in sorted({cpus, 8, 64} - {1}):
+            print(f"  {'speedup limit on %d CPUs' % n:<34s} {1 / (share + (1 - share) / n):9.1f}x"
+                  f"  (serial share {share:.1%})")
+        del text, raw, pickled
+        if args.reference:
+            out_ref = workdir / "bench_3D.ref.v"
+            _timed("reference rewrite_verilog", ref_rewrite_verilog, str(v_path), str(out_ref), part, *maps)
+            if out_new.read_bytes() != out_ref.read_bytes():
+                print("[ERROR] rewrite_verilog output differs from reference.")
+                return 1
+            print("[OK] Output is byte-identical to the reference.")
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
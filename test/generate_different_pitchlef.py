@@ -23,10 +23,14 @@
 
 import argparse
 import re
+import sys
 from pathlib import Path
 from decimal import Decimal, getcontext
 from typing import Tuple, List
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "util"))
+import fileIO  # noqa: E402
+
 getcontext().prec = 28
 
 
@@ -275,7 +279,7 @@ def main():
     out_dir = Path(args.outdir).resolve()
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    base_text = in_path.read_text(encoding="utf-8", errors="ignore")
+    base_text = fileIO.read_text(in_path)
 
     # ---- derive defaults from input (no hard-code) ----
     hb_w0, hb_s0 = get_hb_layer_defaults(base_text)
@@ -287,8 +291,13 @@ def main():
     pmin = Decimal(str(args.pmin))
     pstep = Decimal(str(args.pstep))
 
-    stem = in_path.stem
-    suffix = in_path.suffix if in_path.suffix else ".lef"
+    # "x.tlef.gz" -> "x.hbPitch_<p>.tlef.gz": outputs keep the input's compression
+    comp = fileIO.compression(in_path)
+    plain_path = Path(fileIO.strip_compression_suffix(str(in_path)))
+    stem = plain_path.stem
+    suffix = plain_path.suffix if plain_path.suffix else ".lef"
+    if comp:
+        suffix += "." + comp
 
     for pitch in frange_desc(pmax, pmin, pstep):
         hb_width = pitch / Decimal("2")
@@ -308,7 +317,7 @@ def main():
         text = update_samenet_hb_spacing(text, hb_samenet=hb_samenet)
 
         out_name = f"{stem}.hbPitch_{pitch_tag(pitch)}{suffix}"
-        (out_dir / out_name).write_text(text, encoding="utf-8")
+        fileIO.write_text(out_dir / out_name, text)
 
     print(f"[OK] Generated tech LEFs in: {out_dir}")
 
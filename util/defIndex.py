@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Byte-offset index of a DEF file: section boundaries plus the span of every
+# "- name ... ;" record (components, nets, pins, ...). The index is kept in a
+# sidecar file (<def>.defidx) and is only trusted while the DEF's size and
+# mtime are unchanged, so tools can seek straight to one instance or net
+# through mmap instead of re-scanning the whole file.
+#
+#   python3 defIndex.py 6_final.def --sections
+#   python3 defIndex.py 6_final.def --component u_core/u1 --net n42
+# -----------------------------------------------------------------------------
+
+import argparse
+import mmap
+import os
+import pickle
+import re
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Bump when the sidecar layout or the scanning rules change.
+DEF_INDEX_VERSION = 1
+
+# Sections whose body is a list of "- name ... ;" records.
+DEF_SECTIONS = (
+    "PROPERTYDEFINITIONS", "VIAS", "STYLES", "NONDEFAULTRULES", "REGIONS",
+    "COMPONENTS", "PINS", "PINPROPERTIES", "BLOCKAGES", "SLOTS", "FILLS",
+    "SPECIALNETS", "NETS", "SCANCHAINS", "GROUPS",
+)
+
+SECTION_BEGIN_RE = re.compile(rb"^\s*(" + b"|".join(s.encode() for s in DEF_SECTIONS) + rb")\b", re.I)
+SECTION_END_RE = re.compile(rb"^\s*END\s+([A-Za-z]+)\b", re.I)
+ITEM_NAME_RE = re.compile(rb"^\s*-\s+(\S+)")
+
+# Line classes reported by DefScanner.feed()
+OTHER, BEGIN, END, ITEM, CONT = range(5)
+
+
+def index_path(def_path: str) -> str:
+    return def_path + ".defidx"
+
+
+def iter_lines(f) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield (byte_start, byte_end, raw_line) for a file opened in binary mode."""
+    pos = 0
+    for raw in f:
+        end = pos + len(raw)
+        yield pos, end, raw
+        pos = end
+
+
+@dataclass
+class DefIndex:
+    """
+    sections: name -> (start of the "NAME n ;" line, end of the "END NAME" line)
+    items:    section -> (record names, start offsets, end offsets), in file order;
+              a record runs from its "- name" line through the line holding ';'.
+    """
+    size: int
+    mtime_ns: int
+    has_cr: bool = False
+    sections: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    items: Dict[str, Tuple[List[str], array, array]] = field(default_factory=dict)
+    version: int = DEF_INDEX_VERSION
+
+    def __post_init__(self):
+        self._lookup: Dict[str, Dict[str, int]] = {}
+
+    def section_span(self, section: str) -> Optional[Tuple[int, int]]:
+        return self.sections.get(section.upper())
+
+    def iter_items(self, section: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (name, start, end) of every record of a section, in file order."""
+        names, starts, ends = self.items.get(section.upper(), ([], (), ()))
+        return zip(names, starts, ends)
+
+    def find(self, section: str, name: str) -> Optional[Tuple[int, int]]:
+        """Byte span of record `name` (as written in the DEF) in `section`, or None."""
+        section = section.upper()
+        if section not in self.items:
+            return None
+        lookup = self._lookup.get(section)
+        if lookup is None:
+            lookup = {n: i for i, n in enumerate(self.items[section][0])}
+            self._lookup[section] = lookup
+        i = lookup.get(name)
+        if i is None:
+            return None
+        _, starts, ends = self.items[section]
+        return starts[i], ends[i]
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        state = {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+class DefScanner:
+    """
+    Line-by-line DEF section/record scanner. Feed every line in order; each
+    call classifies the line (OTHER, BEGIN, END, ITEM, CONT) and updates the
+    index under construction. `section` is the open section (or None) and
+    `item_open` tells whether the current record continues on the next line.
+    """
+
+    def __init__(self):
+        self.section: Optional[str] = None
+        self.item_open = False
+        self.has_cr = False
+        self._begin = 0
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        self._items: Dict[str, Tuple[List[str], array, array]] = {}
+        self._cur = None
+
+    def feed(self, a: int, b: int, raw: bytes) -> int:
+        if raw.endswith(b"\r\n"):
+            self.has_cr = True
+
+        if self.item_open:
+            if b";" in raw:
+                self.item_open = False
+                self._cur[2].append(b)
+            return CONT
+
+        if self.section is None:
+            m = SECTION_BEGIN_RE.match(raw)
+            if m:
+                self.section = m.group(1).decode().upper()
+                self._begin = a
+                self._cur = self._items.setdefault(self.section, ([], array("q"), array("q")))
+                return BEGIN
+            return OTHER
+
+        m = SECTION_END_RE.match(raw)
+        if m and m.group(1).decode(errors="ignore").upper() == self.section:
+            self._sections[self.section] = (self._begin, b)
+            self.section = None
+            return END
+
+        if raw.lstrip().startswith(b"-"):
+            m = ITEM_NAME_RE.match(raw)
+            names, starts, ends = self._cur
+            names.append(m.group(1).decode("utf-8", "ignore") if m else "")
+            starts.append(a)
+            if b";" in raw:
+                ends.append(b)
+            else:
+                self.item_open = True
+            return ITEM
+        return OTHER
+
+    def finish(self, size: int, mtime_ns: int) -> DefIndex:
+        items = {}
+        for sec, (names, starts, ends) in self._items.items():
+            if len(ends) < len(starts):
+                # Unterminated last record runs to EOF
+                ends.append(size)
+            items[sec] = (names, starts, ends)
+        return DefIndex(size, mtime_ns, self.has_cr, dict(self._sections), items)
+
+
+def _sig(def_path: str) -> Tuple[int, int]:
+    st = os.stat(def_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def build_def_index(def_path: str, save: bool = True) -> DefIndex:
+    """Scan def_path once and return its index (also written to the sidecar if save)."""
+    size, mtime_ns = _sig(def_path)
+    scanner = DefScanner()
+    with open(def_path, "rb") as f:
+        for a, b, raw in iter_lines(f):
+            scanner.feed(a, b, raw)
+    idx = scanner.finish(size, mtime_ns)
+    if save:
+        save_def_index(idx, def_path)
+    return idx
+
+
+def save_def_index(idx: DefIndex, def_path: str) -> None:
+    try:
+        idx.save(index_path(def_path))
+    except OSError as e:
+        print(f"[WARN] Cannot write DEF index '{index_path(def_path)}': {e}")
+
+
+def load_def_index(def_path: str, build: bool = False) -> Optional[DefIndex]:
+    """
+    Return the sidecar index of def_path if it is current (same size/mtime and
+    version). Otherwise build (and save) a new one if build=True, else None.
+    """
+    try:
+        with open(index_path(def_path), "rb") as f:
+            idx = DefIndex(**pickle.load(f))
+        if idx.version == DEF_INDEX_VERSION and (idx.size, idx.mtime_ns) == _sig(def_path):
+            return idx
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[WARN] Ignoring unreadable DEF index '{index_path(def_path)}': {e}")
+    return build_def_index(def_path) if build else None
+
+
+def read_record(def_path: str, span: Tuple[int, int]) -> str:
+    """Read one record (or any byte span) of def_path through mmap."""
+    with open(def_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[span[0]:span[1]].decode("utf-8", "ignore")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build or query the byte-offset index of a DEF file")
+    parser.add_argument("def_file", help="DEF file")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the sidecar even if it is current")
+    parser.add_argument("--sections", action="store_true", help="Print section spans and record counts")
+    parser.add_argument("--component", "-c", action="append", default=[], help="Print a component record")
+    parser.add_argument("--net", "-n", action="append", default=[], help="Print a net record")
+    parser.add_argument("--pin", "-p", action="append", default=[], help="Print a pin record")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    idx = build_def_index(args.def_file) if args.rebuild else load_def_index(args.def_file, build=True)
+
+    if args.sections:
+        print("%-20s %14s %14s %10s" % ("Section", "Start", "End", "Records"))
+        for name, (start, end) in sorted(idx.sections.items(), key=lambda kv: kv[1]):
+            print("%-20s %14d %14d %10d" % (name, start, end, len(idx.items.get(name, ([],))[0])))
+
+    status = 0
+    for section, names in (("COMPONENTS", args.component), ("NETS", args.net), ("PINS", args.pin)):
+        for name in names:
+            span = idx.find(section, name)
+            if span is None:
+                print(f"[ERROR] {section} record '{name}' not found.", file=sys.stderr)
+                status = 1
+                continue
+            sys.stdout.write(read_record(args.def_file, span))
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
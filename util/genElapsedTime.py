@@ -9,6 +9,8 @@ import os
 import argparse  # argument parsing
 import sys
 
+import gnuTime
+
 # Parse and validate arguments
 # ==============================================================================
 parser = argparse.ArgumentParser(
@@ -17,6 +19,8 @@ parser.add_argument('--logDir', '-d', required=True, nargs='+',
                     help='Log files directories')
 parser.add_argument('--noHeader', action='store_true',
                     help='Skip the header')
+parser.add_argument('--resources', action='store_true',
+                    help='Also print CPU seconds (user + sys) and peak memory')
 args = parser.parse_args()
 
 if not args.logDir:
@@ -25,54 +29,50 @@ if not args.logDir:
     parser.print_help()
     sys.exit(1)
 
+def format_row(name, elapsed, record):
+    if not args.resources:
+        return '%-25s %10s' % (name, elapsed)
+    cpu = (record.user or 0) + (record.sys or 0)
+    peak = '%.1f' % (record.peak_rss / 1024) if record.peak_rss is not None else '-'
+    return '%-25s %10s %10d %12s' % (name, elapsed, cpu, peak)
+
+
 def print_log_dir_times(logdir):
     first = True
     totalElapsed = 0
+    records = []
     print(logdir)
 
     # Loop on all log files in the directory
     for f in sorted(pathlib.Path(logdir).glob('**/*.log')):
         if "eqy_output" in str(f):
             continue
-        # Extract Elapsed Time line from log file
-        with open(str(f)) as logfile:
-            found = False
-            for line in logfile:
-                elapsedTime = 0
-
-                if 'Elapsed time' in line:
-                    found = True
-                    # Extract the portion that has the time
-                    timePor = line.strip().replace('Elapsed time: ', '')
-                    # Remove the units from the time portion
-                    timePor = timePor.split('[h:]', 1)[0]
-                    # Remove any fraction of a second
-                    timePor = timePor.split('.', 1)[0]
-                    # Calculate elapsed time that has this format 'h:m:s'
-                    timeList = timePor.split(':')
-                    if len(timeList) == 2:
-                        # Only minutes and seconds are present
-                        elapsedTime = int(timeList[0])*60 + int(timeList[1])
-                    elif len(timeList) == 3:
-                        # Hours, minutes, and seconds are present
-                        elapsedTime = int(timeList[0])*3600 + int(timeList[1])*60 + int(timeList[2])
-                    else:
-                        print('Elapsed time not understood in',  str(line), file=sys.stderr)
-
-            if not found:
-                print('No elapsed time found in',  str(f), file=sys.stderr)
-                continue
+        # The last GNU time line of the log file (the latest run of the step)
+        record = gnuTime.last_record(str(f))
+        if record is None:
+            print('No elapsed time found in',  str(f), file=sys.stderr)
+            continue
+        if record.wall is None:
+            print('Elapsed time not understood in',  str(f), file=sys.stderr)
+            elapsedTime = 0
+        else:
+            # Whole seconds
+            elapsedTime = int(record.wall)
 
         # Print the name of the step and the corresponding elapsed time
         if elapsedTime != 0:
             if first and not args.noHeader:
-                print("%-25s %10s" % ("Log", "Elapsed seconds"))
+                if args.resources:
+                    print("%-25s %10s %10s %12s" % ("Log", "Elapsed seconds", "CPU seconds", "Peak MB"))
+                else:
+                    print("%-25s %10s" % ("Log", "Elapsed seconds"))
                 first = False
-            print('%-25s %10s' % (os.path.splitext(os.path.basename(str(f)))[0], elapsedTime))
+            print(format_row(os.path.splitext(os.path.basename(str(f)))[0], elapsedTime, record))
+            records.append(record)
         totalElapsed += elapsedTime
 
     if totalElapsed != 0:
-        print("%-25s %10s" % ( "Total", totalElapsed ))
+        print(format_row("Total", totalElapsed, gnuTime.total(records)))
 
 for log_dir in args.logDir:
     print_log_dir_times(log_dir)
@@ -3,19 +3,33 @@
 # This scripts attempts to extract relevant data from a completed flow design
 # and save it into a 'metadata.json'. It achieves this by looking for specific
 # information in specific files using regular expressions
+#
+# With --bulk it does the same for every <platform>/<design>/<variant> run
+# under --logs (with the matching --reports/--results directories), in a
+# process pool, and writes one JSON object per run to a JSON Lines file.
+#
+# What each source file yielded is cached in <logs>/genMetrics.cache.json
+# (see ExtractionCache), so a rerun after some stages were redone only parses
+# the files that changed.
 # -----------------------------------------------------------------------------
 
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from collections import defaultdict
 from uuid import uuid4 as uuid
 from subprocess import check_output, call, STDOUT
 
 import argparse
+import hashlib
 import json
 import re
+from functools import lru_cache
 from glob import glob
 
+import gnuTime
+import metricsStore
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -24,8 +38,8 @@ def parse_args():
     parser.add_argument(
         "--design",
         "-d",
-        required=True,
-        help="Design Name for metrics",
+        required=False,
+        help="Design Name for metrics (required without --bulk)",
     )
     parser.add_argument(
         "--flowVariant",
@@ -45,19 +59,213 @@ def parse_args():
         help="Additional comments to embed",
     )
     parser.add_argument(
-        "--output", "-o", required=False, default="metadata.json", help="Output file"
+        "--output",
+        "-o",
+        required=False,
+        help="Output file (default: metadata.json, metrics.jsonl with --bulk)",
     )
     parser.add_argument("--hier", "-x", action="store_true", help="Hierarchical JSON")
     parser.add_argument("--logs", help="Path to logs")
     parser.add_argument("--reports", help="Path to reports")
     parser.add_argument("--results", help="Path to results")
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Extract every <platform>/<design>/<variant> run under --logs "
+        "(default: logs), --reports (reports) and --results (results) into one "
+        "JSON Lines file",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse every file again instead of reusing " + CACHE_FILE,
+    )
+    parser.add_argument(
+        "--store",
+        help="Also add the results to this metrics store (see metricsStore.py)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parallel extractions with --bulk (default: number of CPUs)",
+    )
     args = parser.parse_args()
+    if not args.bulk and args.design is None:
+        parser.error("--design is required without --bulk")
+    if args.output is None:
+        args.output = "metrics.jsonl" if args.bulk else "metadata.json"
 
     return args
 
 
 # Functions
 # =============================================================================
+# All tags of a run are extracted through one FileScanner: collect_metrics
+# hands it every pattern of each file up front, each file is read once and
+# matched against all its patterns in a single pass, and its content is
+# dropped as soon as that is done. Only the matches are kept.
+
+CACHE_FILE = "genMetrics.cache.json"
+CACHE_VERSION = 2
+
+
+@lru_cache(maxsize=None)
+def compilePattern(pattern):
+    return re.compile(pattern, re.M)
+
+
+# One regex matching any of 'patterns' (a tuple): each pattern is wrapped in a
+# group, mapped here to (pattern, index of its first own group, group count).
+# None if they cannot be combined (e.g. clashing group names).
+@lru_cache(maxsize=None)
+def compilePatterns(patterns):
+    parts = []
+    groups = {}
+    index = 1
+    for pattern in patterns:
+        count = compilePattern(pattern).groups
+        groups[index] = (pattern, index + 1, count)
+        parts.append("(" + pattern + ")")
+        index += count + 1
+    try:
+        return re.compile("|".join(parts), re.M), groups
+    except re.error:
+        return None
+
+
+# {pattern: re.findall(pattern, text, re.M)} for every pattern, in a single
+# pass over text. Patterns of one file must match disjoint text (in practice
+# different lines, as all of collect_metrics' do): where two would overlap,
+# only the first one's match is seen.
+def findallPatterns(patterns, text):
+    combined = compilePatterns(tuple(patterns)) if len(patterns) > 1 else None
+    if combined is None:
+        return {p: compilePattern(p).findall(text) for p in patterns}
+    regex, groups = combined
+    found = {p: [] for p in patterns}
+    for m in regex.finditer(text):
+        # The wrapping group closes last, so it is lastindex
+        pattern, first, count = groups[m.lastindex]
+        if count == 0:
+            found[pattern].append(m.group(m.lastindex))
+        elif count == 1:
+            found[pattern].append(m.group(first) or "")
+        else:
+            found[pattern].append(m.groups("")[first - 1:first - 1 + count])
+    return found
+
+
+def fileSha256(file):
+    h = hashlib.sha256()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Matches of every pattern and the parsed JSON of each source file of a run,
+# kept between runs in 'path'. An entry is reused while the file's size and
+# mtime are unchanged, or, when only the mtime changed (a stage restored or
+# touched), while its sha256 is. Entries of files a run did not use are
+# dropped when it is saved.
+class ExtractionCache:
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self._used = {}
+        self.dirty = False
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.files = data["files"]
+        except (IOError, ValueError, KeyError, AttributeError):
+            pass
+
+    def entry(self, file):
+        """The entry of 'file', emptied if the file changed; None if it is missing."""
+        file = os.path.realpath(file)
+        if file in self._used:
+            return self._used[file]
+        try:
+            st = os.stat(file)
+        except OSError:
+            return None
+        entry = self.files.get(file)
+        if entry is None or (entry["size"], entry["mtime_ns"]) != (
+            st.st_size,
+            st.st_mtime_ns,
+        ):
+            sha = fileSha256(file)
+            if entry is None or (entry["size"], entry["sha256"]) != (st.st_size, sha):
+                entry = {"size": st.st_size, "sha256": sha, "matches": {}}
+            entry["mtime_ns"] = st.st_mtime_ns
+            self.dirty = True
+        self._used[file] = entry
+        return entry
+
+    def save(self):
+        if not self.dirty and len(self._used) == len(self.files):
+            return
+        data = {"version": CACHE_VERSION, "files": self._used}
+        try:
+            with open(self.path + ".tmp", "w") as f:
+                json.dump(data, f)
+            os.replace(self.path + ".tmp", self.path)
+        except IOError as e:
+            print("[WARN] Failed to write extraction cache:", e)
+
+
+class FileScanner:
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._matches = {}
+
+    def scan(self, file, patterns):
+        """Match all 'patterns' in 'file' with one read of it, which is not kept."""
+        entry = self.cache.entry(file) if self.cache is not None else None
+        todo = []
+        for pattern in dict.fromkeys(patterns):
+            key = (file, pattern)
+            if key in self._matches:
+                continue
+            if entry is not None and pattern in entry["matches"]:
+                self._matches[key] = entry["matches"][pattern]
+            else:
+                todo.append(pattern)
+        if not todo:
+            return
+        try:
+            with open(file) as f:
+                found = findallPatterns(todo, f.read())
+        except IOError:
+            found = None
+        for pattern in todo:
+            self._matches[(file, pattern)] = None if found is None else found[pattern]
+            if entry is not None and found is not None:
+                entry["matches"][pattern] = found[pattern]
+                self.cache.dirty = True
+
+    def findall(self, pattern, file):
+        """re.findall(pattern, <content of file>, re.M), or None if it cannot be opened."""
+        self.scan(file, [pattern])
+        return self._matches[(file, pattern)]
+
+    def load_json(self, file):
+        """Parsed content of the JSON 'file'."""
+        entry = self.cache.entry(file) if self.cache is not None else None
+        if entry is not None and "json" in entry:
+            return entry["json"]
+        with open(file, "r") as f:
+            data = json.load(f)
+        if entry is not None:
+            entry["json"] = data
+            self.cache.dirty = True
+        return data
+
+
 # Main function to do specific extraction of patterns from a file
 
 # This function will look for a regular expression 'pattern' in a 'file', and
@@ -78,16 +286,42 @@ def extractTagFromFile(
     defaultNotFound="N/A",
     t=float,
     required=True,
+    scanner=None,
 ):
-    if jsonTag in jsonFile:
-        print("[WARN] Overwriting Tag", jsonTag)
+    scanner = scanner or FileScanner()
+    setTag(
+        jsonTag,
+        jsonFile,
+        scanner.findall(pattern, file),
+        file,
+        count,
+        occurrence,
+        defaultNotFound,
+        t,
+        required,
+    )
 
-    try:
-        with open(file) as f:
-            content = f.read()
 
-        parsedMetrics = re.findall(pattern, content, re.M)
+# Sets 'jsonTag' from the matches of its pattern in 'file' (None: the file could
+# not be opened), as described for extractTagFromFile.
+def setTag(
+    jsonTag,
+    jsonFile,
+    parsedMetrics,
+    file,
+    count=False,
+    occurrence=-1,
+    defaultNotFound="N/A",
+    t=float,
+    required=True,
+):
+    if jsonTag in jsonFile:
+        print("[WARN] Overwriting Tag", jsonTag)
 
+    if parsedMetrics is None:
+        print("[ERROR] Failed to open file:", file)
+        jsonFile[jsonTag] = "ERR"
+    else:
         patternNotFound = len(parsedMetrics) < abs(occurrence)
         if patternNotFound and not required:
             jsonFile[jsonTag] = defaultNotFound
@@ -112,29 +346,44 @@ def extractTagFromFile(
                 "Will use {}.".format(defaultNotFound),
             )
             jsonFile[jsonTag] = defaultNotFound
-    except IOError:
-        print("[ERROR] Failed to open file:", file)
-        jsonFile[jsonTag] = "ERR"
 
 
-def extractGnuTime(prefix, jsonFile, file):
+# GNU time tags and their field in gnuTime.raw_fields. All formats gnuTime
+# knows are accepted; for ORFS "Elapsed time:" lines every field matches what
+# its own per-tag pattern used to.
+GNU_TIME_TAGS = (("__runtime__total", 0), ("__cpu__total", 1), ("__mem__peak", 3))
+
+# Stage logs whose GNU time lines make up the run time, in accumulation order
+GNU_TIME_LOGS = (
+    ("synth", "1_2_yosys.log"),
+    ("floorplan", "2_1_floorplan.log"),
+    ("floorplan_io", "2_2_floorplan_io.log"),
+    ("floorplan_macro", "2_3_floorplan_macro.log"),
+    ("floorplan_tap", "2_4_floorplan_tapcell.log"),
+    ("floorplan_pdn", "2_5_floorplan_pdn.log"),
+    ("globalplace_skip_io", "3_1_place_gp_skip_io.log"),
+    ("globalplace_io", "3_2_place_iop.log"),
+    ("globalplace", "3_3_place_gp.log"),
+    ("placeopt", "3_4_place_resized.log"),
+    ("detailedplace", "3_5_place_dp.log"),
+    ("cts", "4_1_cts.log"),
+    ("globalroute", "5_1_grt.log"),
+    ("fillcell", "5_2_fillcell.log"),
+    ("detailedroute", "5_3_route.log"),
+    ("finish_merge", "6_1_merge.log"),
+    ("finish", "6_report.log"),
+)
+
+
+def extractGnuTime(prefix, jsonFile, file, scanner=None):
     if not os.path.isfile(file):
         return
-    extractTagFromFile(
-        prefix + "__runtime__total",
-        jsonFile,
-        "^Elapsed time: (\\S+)\\[h:\\]min:sec.*",
-        file,
-    )
-    extractTagFromFile(
-        prefix + "__cpu__total",
-        jsonFile,
-        "^Elapsed time:.*CPU time: user (\\S+) .*",
-        file,
-    )
-    extractTagFromFile(
-        prefix + "__mem__peak", jsonFile, "^Elapsed time:.*Peak memory: (\\S+)KB.", file
-    )
+    scanner = scanner or FileScanner()
+    parsed = scanner.findall(gnuTime.GNU_TIME_PATTERN, file)
+    fields = None if parsed is None else [gnuTime.raw_fields(m) for m in parsed]
+    for tag, i in GNU_TIME_TAGS:
+        values = None if fields is None else [f[i] for f in fields if f[i]]
+        setTag(prefix + tag, jsonFile, values, file)
 
 
 #
@@ -181,21 +430,16 @@ def is_git_repo(folder=None):
         return call(cmd, stderr=STDOUT, stdout=open(os.devnull, "w")) == 0
 
 
-def merge_jsons(root_path, output, files):
+def merge_jsons(root_path, output, files, scanner=None):
+    scanner = scanner or FileScanner()
     paths = sorted(glob(os.path.join(root_path, files)))
     for path in paths:
-        file = open(path, "r")
-        data = json.load(file)
-        output.update(data)
-        file.close()
+        output.update(scanner.load_json(path))
 
 
-def extract_metrics(
-    cwd, platform, design, flow_variant, output, hier_json, logPath, rptPath, resultPath
-):
-    baseRegEx = "^{}\n^-*\n^{}"
-
-    metrics_dict = defaultdict(dict)
+# Tool and repository versions, the same for every run of an invocation
+def flow_info(now):
+    metrics_dict = {}
     metrics_dict["run__flow__generate_date"] = now.strftime("%Y-%m-%d %H:%M")
     metrics_dict["run__flow__metrics_version"] = "Metrics_2.1.2"
     cmdOutput = check_output([os.environ.get("OPENROAD_EXE", "openroad"), "-version"])
@@ -212,9 +456,6 @@ def extract_metrics(
         cmdOutput = "not a git repo"
         print("[WARN]", cmdOutput)
     metrics_dict["run__flow__scripts_commit"] = cmdOutput
-    metrics_dict["run__flow__uuid"] = str(uuid())
-    metrics_dict["run__flow__design"] = design
-    metrics_dict["run__flow__platform"] = platform
     platformDir = os.environ.get("PLATFORM_DIR")
     if platformDir is None:
         print("[INFO]", "PLATFORM_DIR env variable not set")
@@ -226,6 +467,50 @@ def extract_metrics(
         print("[WARN]", "not a git repo")
         cmdOutput = "N/A"
     metrics_dict["run__flow__platform_commit"] = cmdOutput
+    return metrics_dict
+
+
+def collect_metrics(
+    info,
+    platform,
+    design,
+    flow_variant,
+    hier_json,
+    logPath,
+    rptPath,
+    resultPath,
+    use_cache=True,
+):
+    baseRegEx = "^{}\n^-*\n^{}"
+    cache = None
+    if use_cache and os.path.isdir(logPath):
+        cache = ExtractionCache(os.path.join(logPath, CACHE_FILE))
+    scanner = FileScanner(cache)
+
+    synthStat = rptPath + "/synth_stat.txt"
+    synthCountPattern = "^\\s+(\\d+)\\s+[-0-9.]+\\s+cells$"
+    synthAreaPattern = "Chip area for (?:top )?module.*: +(\\S+)"
+    grtLog = logPath + "/5_1_grt.log"
+    grtSlackPattern = "^\\[INFO FLW-....\\] Clock .* slack (\\S+)"
+    finishRpt = rptPath + "/6_finish.rpt"
+    finishWnsPattern = baseRegEx.format("finish slack div critical path delay", "(\\S+)")
+
+    # Every pattern of each file, so that each file is read and scanned once
+    filePatterns = defaultdict(list)
+    filePatterns[synthStat] += [synthCountPattern, synthAreaPattern]
+    filePatterns[grtLog].append(grtSlackPattern)
+    filePatterns[finishRpt].append(finishWnsPattern)
+    for log in ["6_report.log"] + [log for _, log in GNU_TIME_LOGS]:
+        if os.path.isfile(logPath + "/" + log):
+            filePatterns[logPath + "/" + log].append(gnuTime.GNU_TIME_PATTERN)
+    for file, patterns in filePatterns.items():
+        scanner.scan(file, patterns)
+
+    metrics_dict = defaultdict(dict)
+    metrics_dict.update(info)
+    metrics_dict["run__flow__uuid"] = str(uuid())
+    metrics_dict["run__flow__design"] = design
+    metrics_dict["run__flow__platform"] = platform
     metrics_dict["run__flow__variant"] = flow_variant
 
     # Synthesis
@@ -235,15 +520,17 @@ def extract_metrics(
     extractTagFromFile(
         "synth__design__instance__count__stdcell",
         metrics_dict,
-        "^\\s+(\\d+)\\s+[-0-9.]+\\s+cells$",
-        rptPath + "/synth_stat.txt",
+        synthCountPattern,
+        synthStat,
+        scanner=scanner,
     )
 
     extractTagFromFile(
         "synth__design__instance__area__stdcell",
         metrics_dict,
-        "Chip area for (?:top )?module.*: +(\\S+)",
-        rptPath + "/synth_stat.txt",
+        synthAreaPattern,
+        synthStat,
+        scanner=scanner,
     )
 
     # Clocks
@@ -254,92 +541,58 @@ def extract_metrics(
 
     # Floorplan
     # =========================================================================
-    merge_jsons(logPath, metrics_dict, "2_*.json")
+    merge_jsons(logPath, metrics_dict, "2_*.json", scanner=scanner)
 
     # Place
     # =========================================================================
-    merge_jsons(logPath, metrics_dict, "3_*.json")
+    merge_jsons(logPath, metrics_dict, "3_*.json", scanner=scanner)
 
     # CTS
     # =======================================================================
-    merge_jsons(logPath, metrics_dict, "4_*.json")
+    merge_jsons(logPath, metrics_dict, "4_*.json", scanner=scanner)
 
     # Global Route
     # =========================================================================
-    merge_jsons(logPath, metrics_dict, "5_*.json")
+    merge_jsons(logPath, metrics_dict, "5_*.json", scanner=scanner)
     extractTagFromFile(
         "globalroute__timing__clock__slack",
         metrics_dict,
-        "^\\[INFO FLW-....\\] Clock .* slack (\\S+)",
-        logPath + "/5_1_grt.log",
+        grtSlackPattern,
+        grtLog,
+        scanner=scanner,
     )
 
     # Finish
     # =========================================================================
-    merge_jsons(logPath, metrics_dict, "6_*.json")
+    merge_jsons(logPath, metrics_dict, "6_*.json", scanner=scanner)
     extractTagFromFile(
         "finish__timing__wns_percent_delay",
         metrics_dict,
-        baseRegEx.format("finish slack div critical path delay", "(\\S+)"),
-        rptPath + "/6_finish.rpt",
+        finishWnsPattern,
+        finishRpt,
+        scanner=scanner,
     )
 
-    extractGnuTime("finish", metrics_dict, logPath + "/6_report.log")
+    extractGnuTime("finish", metrics_dict, logPath + "/6_report.log", scanner=scanner)
 
     # Accumulate time
     # =========================================================================
 
-    extractGnuTime("synth", metrics_dict, logPath + "/1_2_yosys.log")
-    extractGnuTime("floorplan", metrics_dict, logPath + "/2_1_floorplan.log")
-    extractGnuTime("floorplan_io", metrics_dict, logPath + "/2_2_floorplan_io.log")
-    extractGnuTime(
-        "floorplan_macro", metrics_dict, logPath + "/2_3_floorplan_macro.log"
-    )
-    extractGnuTime(
-        "floorplan_tap", metrics_dict, logPath + "/2_4_floorplan_tapcell.log"
-    )
-    extractGnuTime("floorplan_pdn", metrics_dict, logPath + "/2_5_floorplan_pdn.log")
-    extractGnuTime(
-        "globalplace_skip_io", metrics_dict, logPath + "/3_1_place_gp_skip_io.log"
-    )
-    extractGnuTime("globalplace_io", metrics_dict, logPath + "/3_2_place_iop.log")
-    extractGnuTime("globalplace", metrics_dict, logPath + "/3_3_place_gp.log")
-    extractGnuTime("placeopt", metrics_dict, logPath + "/3_4_place_resized.log")
-    extractGnuTime("detailedplace", metrics_dict, logPath + "/3_5_place_dp.log")
-    extractGnuTime("cts", metrics_dict, logPath + "/4_1_cts.log")
-    extractGnuTime("globalroute", metrics_dict, logPath + "/5_1_grt.log")
-    extractGnuTime("fillcell", metrics_dict, logPath + "/5_2_fillcell.log")
-    extractGnuTime("detailedroute", metrics_dict, logPath + "/5_3_route.log")
-    extractGnuTime("finish_merge", metrics_dict, logPath + "/6_1_merge.log")
-    extractGnuTime("finish", metrics_dict, logPath + "/6_report.log")
+    for prefix, log in GNU_TIME_LOGS:
+        extractGnuTime(prefix, metrics_dict, logPath + "/" + log, scanner=scanner)
+
+    if cache is not None:
+        cache.save()
 
     failed = False
     total = timedelta()
     for key in metrics_dict:
         if key.endswith("__runtime__total"):
-            # Big try block because Hour and microsecond is optional
-            try:
-                t = datetime.strptime(metrics_dict[key], "%H:%M:%S.%f")
-            except ValueError:
-                try:
-                    t = datetime.strptime(metrics_dict[key], "%M:%S.%f")
-                except ValueError:
-                    try:
-                        t = datetime.strptime(metrics_dict[key], "%H:%M:%S")
-                    except ValueError:
-                        try:
-                            t = datetime.strptime(metrics_dict[key], "%M:%S")
-                        except ValueError:
-                            failed = True
-                            break
-
-            delta = timedelta(
-                hours=t.hour,
-                minutes=t.minute,
-                seconds=t.second,
-                microseconds=t.microsecond,
-            )
-            total += delta
+            seconds = gnuTime.parse_duration(str(metrics_dict[key]))
+            if seconds is None:
+                failed = True
+                break
+            total += timedelta(seconds=seconds)
 
     if failed:
         metrics_dict["total_time"] = "ERR"
@@ -356,21 +609,126 @@ def extract_metrics(
                 hier_dict[key_list[0]][key_list[1]] = metrics_dict[metric]
         metrics_dict = hier_dict
 
+    return metrics_dict
+
+
+def extract_metrics(
+    cwd,
+    platform,
+    design,
+    flow_variant,
+    output,
+    hier_json,
+    logPath,
+    rptPath,
+    resultPath,
+    store=None,
+    use_cache=True,
+):
+    metrics_dict = collect_metrics(
+        flow_info(datetime.now()),
+        platform,
+        design,
+        flow_variant,
+        hier_json,
+        logPath,
+        rptPath,
+        resultPath,
+        use_cache,
+    )
+
     with open(output, "w") as resultSpecfile:
         json.dump(metrics_dict, resultSpecfile, indent=2, sort_keys=True)
 
+    if store is not None:
+        with metricsStore.MetricsStore(store) as db:
+            db.add(metrics_dict, source=output)
 
-args = parse_args()
-now = datetime.now()
 
-extract_metrics(
-    os.path.join(os.path.dirname(os.path.realpath(__file__)), "../"),
-    args.platform,
-    args.design,
-    args.flowVariant,
-    args.output,
-    args.hier,
-    args.logs,
-    args.reports,
-    args.results,
-)
+# Bulk extraction
+# =============================================================================
+
+
+# (platform, design, variant) of every run directory under logRoot
+def find_runs(logRoot):
+    runs = []
+    for path in sorted(glob(os.path.join(logRoot, "*", "*", "*"))):
+        if os.path.isdir(path):
+            runs.append(tuple(os.path.relpath(path, logRoot).split(os.sep)))
+    return runs
+
+
+def _collect_run(job):
+    info, run, hier_json, logRoot, rptRoot, resultRoot, use_cache = job
+    try:
+        return collect_metrics(
+            info,
+            *run,
+            hier_json,
+            os.path.join(logRoot, *run),
+            os.path.join(rptRoot, *run),
+            os.path.join(resultRoot, *run),
+            use_cache,
+        )
+    except Exception as e:
+        print("[ERROR] Failed to extract {}: {}".format("/".join(run), e))
+        return None
+
+
+def harvest_metrics(
+    output, hier_json, logRoot, rptRoot, resultRoot, jobs, store=None, use_cache=True
+):
+    runs = find_runs(logRoot)
+    info = flow_info(datetime.now())
+    work = [
+        (info, run, hier_json, logRoot, rptRoot, resultRoot, use_cache) for run in runs
+    ]
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+            results = list(pool.map(_collect_run, work))
+    else:
+        results = [_collect_run(job) for job in work]
+
+    written = 0
+    with open(output + ".tmp", "w") as resultSpecfile:
+        for metrics_dict in results:
+            if metrics_dict is not None:
+                resultSpecfile.write(json.dumps(metrics_dict, sort_keys=True) + "\n")
+                written += 1
+    os.replace(output + ".tmp", output)
+    print("[INFO] Wrote metrics of {}/{} runs to {}".format(written, len(runs), output))
+    if store is not None:
+        with metricsStore.MetricsStore(store) as db:
+            db.add_many((m for m in results if m is not None), source=output)
+    return written == len(runs)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.bulk:
+        ok = harvest_metrics(
+            args.output,
+            args.hier,
+            args.logs or "logs",
+            args.reports or "reports",
+            args.results or "results",
+            args.jobs,
+            args.store,
+            not args.no_cache,
+        )
+        raise SystemExit(0 if ok else 1)
+
+    extract_metrics(
+        os.path.join(os.path.dirname(os.path.realpath(__file__)), "../"),
+        args.platform,
+        args.design,
+        args.flowVariant,
+        args.output,
+        args.hier,
+        args.logs,
+        args.reports,
+        args.results,
+        args.store,
+        not args.no_cache,
+    )
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Parser for the GNU time lines the flow leaves at the end of each step's log,
+# shared by genMetrics.py, genElapsedTime.py and run_experiments.py.
+#
+# Three formats are recognized, in a single scan of the text:
+#
+#   ORFS      Elapsed time: 0:04.26[h:]min:sec. CPU time: user 3.90 system 0.30 (98%). Peak memory: 123456KB.
+#   TIME_CMD  Elapsed: 0:04.26  CPU: user 3.90 sys 0.30 (98%)  Peak: 123456 KB
+#   default   3.90user 0.30system 0:04.26elapsed 98%CPU (0avgtext+0avgdata 123456maxresident)k
+#
+# (TIME_CMD is this repository's Makefile format, default what /usr/bin/time
+# prints when the Makefile falls back to it.) Each line becomes a TimeRecord
+# (wall, user, sys, peak_rss): seconds, seconds, seconds, KB; fields the line
+# does not show are None.
+#
+#   python3 gnuTime.py logs/asap7/aes/base/*.log     per-log and total usage
+# -----------------------------------------------------------------------------
+
+import argparse
+import os
+import re
+import sys
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# One group per field, (wall, user, sys, peak) for every format in turn. The
+# ORFS fields are optional lookaheads: each is captured wherever it appears on
+# the line, independently of the others, as genMetrics always extracted them.
+GNU_TIME_PATTERN = (
+    "^(?:"
+    "Elapsed time:"
+    "(?:(?= (\\S+)\\[h:\\]min:sec))?"
+    "(?:(?=.*CPU time: user (\\S+) ))?"
+    "(?:(?=.*CPU time: user \\S+ system (\\S+)))?"
+    "(?:(?=.*Peak memory: (\\S+)KB.))?"
+    "|"
+    "Elapsed: (\\S+)\\s+CPU: user (\\S+) sys (\\S+) \\(\\S*\\)\\s+Peak: (\\d+) ?KB"
+    "|"
+    "(?=\\S+user \\S+system (\\S+)elapsed)"
+    "(\\S+)user (\\S+)system \\S+elapsed[^\\n]*?(\\d+)maxresident"
+    ")"
+)
+GNU_TIME_RE = re.compile(GNU_TIME_PATTERN, re.M)
+FIELDS = 4
+
+_DURATION_RE = re.compile(r"^(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d+)?)$")
+
+
+class TimeRecord(NamedTuple):
+    wall: Optional[float]  # seconds
+    user: Optional[float]  # seconds
+    sys: Optional[float]  # seconds
+    peak_rss: Optional[int]  # KB
+
+
+def parse_duration(text: str) -> Optional[float]:
+    """[[h:]m:]s[.frac] (GNU time %E) -> seconds; None if it is not one."""
+    m = _DURATION_RE.match(text.strip())
+    if not m:
+        return None
+    hours, minutes, seconds = m.groups()
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds)
+
+
+def raw_fields(groups: Sequence[str]) -> Tuple[str, str, str, str]:
+    """(wall, user, sys, peak) as printed, '' where absent, from one match's groups (or findall tuple)."""
+    for i in range(0, len(groups), FIELDS):
+        block = tuple(g or "" for g in groups[i:i + FIELDS])
+        if any(block):
+            return block
+    return ("", "", "", "")
+
+
+def _float(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def record(groups: Sequence[str]) -> TimeRecord:
+    wall, user, sys_, peak = raw_fields(groups)
+    peak_kb = _float(peak)
+    return TimeRecord(parse_duration(wall) if wall else None, _float(user) if user else None,
+                      _float(sys_) if sys_ else None, int(peak_kb) if peak_kb is not None else None)
+
+
+def parse_text(text: str) -> List[TimeRecord]:
+    """Every GNU time line of text, in order."""
+    return [record(m.groups()) for m in GNU_TIME_RE.finditer(text)]
+
+
+def parse_file(path: str) -> List[TimeRecord]:
+    """Every GNU time line of a log; [] if it cannot be read."""
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            return parse_text(f.read())
+    except OSError:
+        return []
+
+
+def last_record(path: str) -> Optional[TimeRecord]:
+    """The last GNU time line of a log (logs are appended to: the latest run), or None."""
+    records = parse_file(path)
+    return records[-1] if records else None
+
+
+def total(records: Iterable[TimeRecord]) -> TimeRecord:
+    """Summed wall/user/sys and the largest peak; a field is None if no record has it."""
+    sums: List[Optional[float]] = [None, None, None]
+    peak: Optional[int] = None
+    for r in records:
+        for i, v in enumerate(r[:3]):
+            if v is not None:
+                sums[i] = (sums[i] or 0.0) + v
+        if r.peak_rss is not None:
+            peak = max(peak or 0, r.peak_rss)
+    return TimeRecord(sums[0], sums[1], sums[2], peak)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Wall, CPU and peak memory of the GNU time lines in logs")
+    parser.add_argument("logs", nargs="+", help="Log files")
+    parser.add_argument("--all", action="store_true",
+                        help="Every GNU time line of each log instead of the last")
+    return parser.parse_args()
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    args = parse_args()
+    print("%-32s %10s %10s %10s %12s" % ("Log", "Wall(s)", "User(s)", "Sys(s)", "Peak(KB)"))
+    seen = []
+    for path in args.logs:
+        records = parse_file(path) if args.all else [r for r in [last_record(path)] if r is not None]
+        for r in records:
+            print("%-32s %10s %10s %10s %12s" % (os.path.basename(path)[:32], _fmt(r.wall, ".2f"),
+                                                 _fmt(r.user, ".2f"), _fmt(r.sys, ".2f"), _fmt(r.peak_rss, "d")))
+        seen.extend(records)
+    if not seen:
+        print("[ERROR] No GNU time lines found.", file=sys.stderr)
+        return 1
+    t = total(seen)
+    print("%-32s %10s %10s %10s %12s" % ("Total", _fmt(t.wall, ".2f"), _fmt(t.user, ".2f"),
+                                         _fmt(t.sys, ".2f"), _fmt(t.peak_rss, "d")))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Local store of genMetrics results, for comparisons across many runs
+# without re-opening every metadata.json.
+#
+# The store is an SQLite file with one row per run (uuid, platform, design,
+# variant, generate date) and one row per (run, metric key): numbers in
+# `num`, anything else (N/A, [h:]m:s runtimes, clock lists as JSON) in
+# `text`. Runs are indexed on design/platform/variant/uuid and metrics on
+# key, so filtering and pivoting hundreds of sweep points stays sub-second.
+#
+#   genMetrics.py ... --store metrics.db          append as they are extracted
+#   metricsStore.py metrics.db add logs/*/*/*/metadata.json metrics.jsonl
+#   metricsStore.py metrics.db query -d aes -k 'finish__timing__*' --latest
+#   metricsStore.py metrics.db pivot -k total_time --rows design --cols variant
+#   metricsStore.py metrics.db trend -k detailedroute__route__wirelength -d aes
+#
+# Filters (-p/-d/-v) and keys (-k) are SQLite GLOB patterns.
+# -----------------------------------------------------------------------------
+
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bump when the schema changes; stores of another version are emptied.
+STORE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    uuid TEXT PRIMARY KEY,
+    platform TEXT,
+    design TEXT,
+    variant TEXT,
+    generate_date TEXT,
+    added REAL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_design ON runs (design, platform, variant, uuid);
+CREATE TABLE IF NOT EXISTS metrics (
+    uuid TEXT NOT NULL,
+    key TEXT NOT NULL,
+    num REAL,
+    text TEXT,
+    PRIMARY KEY (uuid, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS metrics_key ON metrics (key, uuid);
+"""
+
+RUN_FIELDS = ("platform", "design", "variant")
+
+Row = Tuple[str, str, str, str, str]  # uuid, platform, design, variant, generate_date
+
+
+def flatten(metrics: dict) -> Dict[str, object]:
+    """Flat genMetrics keys from flat or --hier output ({"synth": {"x": 1}} -> synth__x)."""
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            for sub, v in value.items():
+                flat[f"{key}__{sub}"] = v
+        else:
+            flat[key] = value
+    return flat
+
+
+def _split_value(value) -> Tuple[Optional[float], Optional[str]]:
+    if isinstance(value, bool) or value is None:
+        return None, json.dumps(value)
+    if isinstance(value, (int, float)):
+        return float(value), None
+    if isinstance(value, str):
+        return None, value
+    return None, json.dumps(value, sort_keys=True)
+
+
+def _value(num: Optional[float], text: Optional[str]):
+    if num is not None:
+        return int(num) if num.is_integer() else num
+    return text
+
+
+class MetricsStore:
+    """The SQLite metrics store at `path` (created on first use)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=60)
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, STORE_VERSION):
+            self.db.executescript("DROP TABLE IF EXISTS runs; DROP TABLE IF EXISTS metrics;")
+        self.db.executescript(_SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {STORE_VERSION}")
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "MetricsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Adding runs
+    def add(self, metrics: dict, source: str = "") -> str:
+        """Store one genMetrics result (replacing a run with the same uuid); returns the uuid."""
+        self.add_many([metrics], source)
+        return _run_id(flatten(metrics))
+
+    def add_many(self, results: Iterable[dict], source: str = "") -> int:
+        count = 0
+        now = time.time()
+        with self.db:
+            for metrics in results:
+                flat = flatten(metrics)
+                run_id = _run_id(flat)
+                self.db.execute("DELETE FROM metrics WHERE uuid = ?", (run_id,))
+                self.db.execute(
+                    "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, str(flat.get("run__flow__platform", "")), str(flat.get("run__flow__design", "")),
+                     str(flat.get("run__flow__variant", "")), str(flat.get("run__flow__generate_date", "")),
+                     now, source))
+                self.db.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?)",
+                                    ((run_id, key, *_split_value(value)) for key, value in flat.items()))
+                count += 1
+        return count
+
+    def add_file(self, path: str) -> int:
+        """Add a metadata.json or a genMetrics --bulk JSON Lines file; returns the number of runs."""
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                results = [json.loads(line) for line in f if line.strip()]
+            else:
+                results = [json.load(f)]
+        return self.add_many(results, source=path)
+
+    # Queries
+    def runs(self, platform: str = "*", design: str = "*", variant: str = "*",
+             latest: bool = False) -> List[Row]:
+        """Runs matching the GLOB filters, oldest first; with latest, the newest per design/variant."""
+        rows = self.db.execute(
+            "SELECT uuid, platform, design, variant, generate_date FROM runs "
+            "WHERE platform GLOB ? AND design GLOB ? AND variant GLOB ? "
+            "ORDER BY generate_date, added", (platform, design, variant)).fetchall()
+        if latest:
+            newest = {}
+            for i, row in enumerate(rows):
+                newest[row[1:4]] = (i, row)
+            rows = [row for _, row in sorted(newest.values())]
+        return rows
+
+    def values(self, runs: Sequence[Row], keys: Sequence[str]) -> Dict[str, Dict[str, object]]:
+        """{uuid: {key: value}} for the keys matching any of the GLOB patterns."""
+        out: Dict[str, Dict[str, object]] = {row[0]: {} for row in runs}
+        if not out or not keys:
+            return out
+        key_sql = " OR ".join("m.key GLOB ?" for _ in keys)
+        # Temporary table rather than a huge IN (...) for large sweeps
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (uuid TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM wanted")
+        self.db.executemany("INSERT INTO wanted VALUES (?)", ((u,) for u in out))
+        for run_id, key, num, text in self.db.execute(
+                f"SELECT m.uuid, m.key, m.num, m.text FROM metrics m JOIN wanted w ON m.uuid = w.uuid "
+                f"WHERE {key_sql}", tuple(keys)):
+            out[run_id][key] = _value(num, text)
+        return out
+
+
+def _run_id(flat: Dict[str, object]) -> str:
+    """run__flow__uuid, or for results without one a content hash, so adding them twice replaces them."""
+    if flat.get("run__flow__uuid"):
+        return str(flat["run__flow__uuid"])
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, json.dumps(flat, sort_keys=True, default=str)))
+
+
+# CLI
+# =============================================================================
+def _format(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def _print_table(header: Sequence[str], rows: Sequence[Sequence], as_csv: bool) -> None:
+    if as_csv:
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows([[("" if v is None else v) for v in row] for row in rows])
+        return
+    cells = [list(header)] + [[_format(v) for v in row] for row in rows]
+    widths = [max(len(r[i]) for r in cells) for i in range(len(header))]
+    for r in cells:
+        print("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Store and query genMetrics results")
+    parser.add_argument("db", help="SQLite metrics store (created if missing)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Add metadata.json or --bulk .jsonl files")
+    add.add_argument("files", nargs="+")
+
+    def filters(p, keys):
+        p.add_argument("--platform", "-p", default="*", help="Platform GLOB")
+        p.add_argument("--design", "-d", default="*", help="Design GLOB")
+        p.add_argument("--variant", "-v", default="*", help="Flow variant GLOB")
+        p.add_argument("--csv", action="store_true", help="CSV output")
+        if keys:
+            p.add_argument("--key", "-k", action="append", required=True,
+                           help="Metric key GLOB (repeatable)")
+
+    runs = sub.add_parser("runs", help="List stored runs")
+    filters(runs, keys=False)
+    runs.add_argument("--latest", action="store_true", help="Only the newest run per design/variant")
+
+    query = sub.add_parser("query", help="One row per run, one column per matching key")
+    filters(query, keys=True)
+    query.add_argument("--latest", action="store_true", help="Only the newest run per design/variant")
+
+    pivot = sub.add_parser("pivot", help="One key of the newest runs, as a rows x cols table")
+    filters(pivot, keys=True)
+    pivot.add_argument("--rows", choices=RUN_FIELDS, default="design")
+    pivot.add_argument("--cols", choices=RUN_FIELDS, default="variant")
+
+    trend = sub.add_parser("trend", help="Values of keys over time, per design/variant")
+    filters(trend, keys=True)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with MetricsStore(args.db) as store:
+        if args.command == "add":
+            status = 0
+            for path in args.files:
+                try:
+                    print(f"[INFO] {path}: {store.add_file(path)} run(s)")
+                except (OSError, ValueError) as e:
+                    print(f"[ERROR] Cannot add {path}: {e}", file=sys.stderr)
+                    status = 1
+            return status
+
+        latest = getattr(args, "latest", False) or args.command == "pivot"
+        runs = store.runs(args.platform, args.design, args.variant, latest=latest)
+        if args.command == "runs":
+            _print_table(("uuid", "platform", "design", "variant", "date"), runs, args.csv)
+            return 0
+
+        values = store.values(runs, args.key)
+        keys = sorted({k for v in values.values() for k in v})
+        if args.command == "query":
+            _print_table(("platform", "design", "variant", "date") + tuple(keys),
+                         [row[1:] + tuple(values[row[0]].get(k) for k in keys) for row in runs], args.csv)
+        elif args.command == "trend":
+            table = []
+            for key in keys:
+                for row in runs:
+                    if key in values[row[0]]:
+                        table.append((key,) + row[1:] + (values[row[0]][key],))
+            table.sort(key=lambda r: r[:4])
+            _print_table(("key", "platform", "design", "variant", "date", "value"), table, args.csv)
+        else:  # pivot
+            if len(keys) != 1:
+                print(f"[ERROR] pivot needs exactly one key, {len(keys)} match: {', '.join(keys)}",
+                      file=sys.stderr)
+                return 1
+            r, c = RUN_FIELDS.index(args.rows) + 1, RUN_FIELDS.index(args.cols) + 1
+            cells: Dict[Tuple[str, str], object] = {}
+            for row in runs:
+                cells[(row[r], row[c])] = values[row[0]].get(keys[0])
+            row_names = sorted({k[0] for k in cells})
+            col_names = sorted({k[1] for k in cells})
+            _print_table((f"{args.rows} \\ {args.cols}",) + tuple(col_names),
+                         [(name,) + tuple(cells.get((name, col)) for col in col_names) for name in row_names],
+                         args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
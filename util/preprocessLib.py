@@ -1,44 +1,234 @@
 #!/usr/bin/env python3
+import os
 import re
 import sys
-import gzip
+import glob
+import json
+import shutil
+import hashlib
 import argparse  # argument parsing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-# Parse and validate arguments
-# ==============================================================================
-parser = argparse.ArgumentParser(
-    description='Preprocesses Liberty files for compatibility with yosys/abc')
-parser.add_argument('--inputFile', '-i', required=True,
-                    help='Input File')
-parser.add_argument('--outputFile', '-o', required=True,
-                    help='Output File')
-args = parser.parse_args()
-
-
-# Read input file
-print("Opening file for replace:",args.inputFile)
-if args.inputFile.endswith(".gz") or args.inputFile.endswith(".GZ"):
-    f = gzip.open(args.inputFile, 'rt', encoding="utf-8")
-else:
-    f = open(args.inputFile, encoding="utf-8")
-content = f.read().encode("ascii", "ignore").decode("ascii")
-f.close()
-
-# Yosys-abc throws an error if original_pin is found within the liberty file.
-# removing
-pattern = r"(.*original_pin.*)"
-replace = r"/* \1 */;"
-content, count = re.subn(pattern, replace, content)
-print("Commented", count, "lines containing \"original_pin\"")
+import fileIO
+
+# Lines are rewritten as they are read and flushed in blocks of about this many
+# lines, so memory stays bounded however large the (multi-corner) Liberty is.
+BLOCK_LINES = 1 << 16
 
 # Yosys, does not like properties that start with : !, without quotes
-pattern = r":\s+(!.*)\s+;"
-replace = r': "\1" ;'
-content, count = re.subn(pattern, replace, content)
-print("Replaced malformed functions", count)
-
-# Write output file
-print("Writing replaced file:",args.outputFile)
-f = open(args.outputFile, "w")
-f.write(content)
-f.close()
+MALFORMED_FUNCTION_RE = re.compile(r":\s+(!.*)\s+;")
+MALFORMED_FUNCTION_REPL = r': "\1" ;'
+
+# Bump when the edits change; the cache key also covers the source of this
+# script and of fileIO, so any code change invalidates cached outputs.
+CACHE_VERSION = 1
+CACHE_MAX_MB = 4096
+
+
+def _source_digest():
+    h = hashlib.sha256(b"v%d" % CACHE_VERSION)
+    for path in (__file__, fileIO.__file__):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Preprocesses Liberty files for compatibility with yosys/abc')
+    parser.add_argument('--inputFile', '-i', required=True, nargs='+',
+                        help='Input File(s)')
+    parser.add_argument('--outputFile', '-o', required=True, nargs='+',
+                        help='Output File(s), one per input')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='Files processed in parallel (default: CPU count)')
+    parser.add_argument('--cacheDir', default=os.environ.get('LIB_CACHE_DIR'),
+                        help='Content-addressed cache of processed files, shared '
+                             'across designs (default: $LIB_CACHE_DIR, off if unset)')
+    parser.add_argument('--cacheMaxMB', type=int,
+                        default=int(os.environ.get('LIB_CACHE_MAX_MB', CACHE_MAX_MB)),
+                        help='Cache size bound; least recently used entries are '
+                             'evicted beyond it (default: $LIB_CACHE_MAX_MB or %d)' % CACHE_MAX_MB)
+    args = parser.parse_args()
+    if len(args.inputFile) != len(args.outputFile):
+        parser.error('got %d input(s) but %d output(s)'
+                     % (len(args.inputFile), len(args.outputFile)))
+    return args
+
+
+def _fix_block(lines, counts):
+    """Fix malformed functions in a block of lines and return the text."""
+    text = "".join(lines)
+    if "!" in text:
+        text, count = MALFORMED_FUNCTION_RE.subn(MALFORMED_FUNCTION_REPL, text)
+        counts[1] += count
+    return text
+
+
+def preprocess_lib(inputFile, outputFile):
+    """
+    Stream inputFile to outputFile (either may be .gz/.zst) with the same edits
+    the whole-file version made:
+      - drop non-ASCII characters
+      - comment out every line containing "original_pin"
+      - quote malformed functions ": !... ;"
+
+    A malformed function can span lines only through the whitespace around
+    "!..." so a block is only cut before a line whose first non-blank character
+    is neither "!" nor ";"; no match crosses such a cut, and the output is
+    identical to running both substitutions on the whole file.
+    Returns (lines commented, functions replaced).
+    """
+    counts = [0, 0]
+    out_dir = os.path.dirname(os.path.abspath(outputFile))
+    tmp_path = os.path.join(out_dir, ".%d.%s" % (os.getpid(), os.path.basename(outputFile)))
+    try:
+        with fileIO.open_read(inputFile, "rt") as fin, \
+             fileIO.open_write(tmp_path, "wt", encoding="ascii") as fout:
+            block = []
+            for line in fin:
+                if not line.isascii():
+                    line = line.encode("ascii", "ignore").decode("ascii")
+
+                # Yosys-abc throws an error if original_pin is found within the
+                # liberty file. removing
+                if "original_pin" in line:
+                    body = line[:-1] if line.endswith("\n") else line
+                    line = "/* " + body + " */;" + line[len(body):]
+                    counts[0] += 1
+
+                if len(block) >= BLOCK_LINES:
+                    head = line.lstrip()[:1]
+                    if head and head not in "!;":
+                        fout.write(_fix_block(block, counts))
+                        block = []
+                block.append(line)
+            fout.write(_fix_block(block, counts))
+        os.replace(tmp_path, outputFile)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return counts[0], counts[1]
+
+
+# Cache of processed outputs
+# ==============================================================================
+# <cacheDir>/<key>.out holds the exact bytes of an output file and <key>.json
+# its log counts. The key hashes the input file bytes, the output compression
+# and the script source. Entries are only ever added by rename, so concurrent
+# runs sharing the cache never see a partial entry; mtime tracks last use.
+def cache_key(inputFile, outputFile, source_digest):
+    h = hashlib.sha256(source_digest.encode())
+    h.update(b"\0" + str(fileIO.compression(outputFile)).encode() + b"\0")
+    with open(inputFile, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _place(src, dst):
+    """Hard-link src to dst (copy across file systems), replacing dst atomically."""
+    tmp_path = os.path.join(os.path.dirname(os.path.abspath(dst)),
+                            ".%d.%s" % (os.getpid(), os.path.basename(dst)))
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def cache_fetch(cacheDir, key, outputFile):
+    """Place a cached output at outputFile; returns its counts or None on a miss."""
+    entry = os.path.join(cacheDir, key)
+    try:
+        with open(entry + ".json") as f:
+            counts = json.load(f)
+        _place(entry + ".out", outputFile)
+        # Mark as recently used (also makes a hard-linked output newer than its input)
+        os.utime(entry + ".out")
+    except (OSError, ValueError):
+        return None
+    return counts["commented"], counts["replaced"]
+
+
+def cache_store(cacheDir, key, outputFile, counts, max_bytes):
+    entry = os.path.join(cacheDir, key)
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        _place(outputFile, entry + ".out")
+        tmp_path = "%s.%d.tmp" % (entry, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({"commented": counts[0], "replaced": counts[1]}, f)
+        os.replace(tmp_path, entry + ".json")
+        cache_evict(cacheDir, max_bytes)
+    except OSError as e:
+        print("[WARN] Cannot write liberty cache '%s': %s" % (cacheDir, e), file=sys.stderr)
+
+
+def cache_evict(cacheDir, max_bytes):
+    """Remove least recently used entries until the cache fits in max_bytes."""
+    entries = []
+    for path in glob.glob(os.path.join(cacheDir, "*.out")):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        for stale in (path[:-len(".out")] + ".json", path):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+        total -= size
+
+
+def _run(pair, cacheDir=None, max_bytes=0, source_digest=""):
+    inputFile, outputFile = pair
+    lines = ["Opening file for replace: %s" % inputFile]
+    key = cache_key(inputFile, outputFile, source_digest) if cacheDir else None
+    counts = cache_fetch(cacheDir, key, outputFile) if key else None
+    if counts is not None:
+        lines.append("Cache hit %s" % os.path.join(cacheDir, key[:16]))
+    else:
+        counts = preprocess_lib(inputFile, outputFile)
+        if key:
+            cache_store(cacheDir, key, outputFile, counts, max_bytes)
+    lines += [
+        "Commented %d lines containing \"original_pin\"" % counts[0],
+        "Replaced malformed functions %d" % counts[1],
+        "Writing replaced file: %s" % outputFile,
+    ]
+    return lines
+
+
+def main():
+    args = parse_args()
+    pairs = list(zip(args.inputFile, args.outputFile))
+    jobs = min(args.jobs or os.cpu_count() or 1, len(pairs))
+    run = partial(_run, cacheDir=args.cacheDir, max_bytes=args.cacheMaxMB << 20,
+                  source_digest=_source_digest() if args.cacheDir else "")
+
+    if jobs <= 1:
+        results = map(run, pairs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(run, pairs)
+    # Logs are printed per file, in argument order
+    for lines in results:
+        print("\n".join(lines))
+        sys.stdout.flush()
+    if jobs > 1:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Multi-host executor backend for run_experiments.py.
+#
+# RemoteExecutor is a concurrent.futures.Executor that hands submitted calls
+# to worker processes, each with a fixed number of slots (concurrent jobs):
+#
+#   local[:N]        a worker process on this host (stand-in for a node)
+#   ssh:HOST[:N]     "ssh HOST run_experiments.py --serve" (shared file system)
+#   tcp:HOST:PORT    a job server started as "run_experiments.py --serve --listen"
+#
+# Workers run the calls in threads. Every log file a job opens through the
+# host module's _log_redirect hook is streamed back as it is written and
+# lands at the same (relative) path on the submitting side, so run_logs/ looks
+# the same as for a local run. Output printed by a job is forwarded as well.
+#
+# Messages are length-prefixed pickles signed with HMAC-SHA256 of a shared
+# token (--token / $RUN_EXPERIMENTS_TOKEN) on TCP; a frame with a bad
+# signature is never unpickled. A TCP server and its clients always need a
+# non-empty token, even on loopback (any local user can reach that port).
+# Functions are pickled by reference, so workers must run the same
+# run_experiments.py, and see the repo at the same path.
+# -----------------------------------------------------------------------------
+
+import hashlib
+import hmac
+import os
+import pickle
+import shlex
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Executor, Future
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+PROTOCOL_VERSION = 1
+TOKEN_ENV = "RUN_EXPERIMENTS_TOKEN"
+
+_HEADER = struct.Struct("!I")
+_MAC_LEN = hashlib.sha256().digest_size
+
+
+class RemoteError(RuntimeError):
+    """A job raised on its worker, or its worker went away."""
+
+
+class Channel:
+    """HMAC-signed pickle frames over a pair of binary streams; send() is thread-safe."""
+
+    def __init__(self, rfile, wfile, token: str = "", closer: Optional[Callable[[], None]] = None):
+        self._rfile = rfile
+        self._wfile = wfile
+        self._key = token.encode()
+        self._closer = closer
+        self._send_lock = threading.Lock()
+
+    def send(self, *msg) -> None:
+        payload = pickle.dumps(msg, protocol=pickle.HIGHEST_PROTOCOL)
+        mac = hmac.new(self._key, payload, hashlib.sha256).digest()
+        with self._send_lock:
+            self._wfile.write(_HEADER.pack(len(payload)) + mac + payload)
+            self._wfile.flush()
+
+    def _read_exact(self, n: int) -> Optional[bytes]:
+        data = self._rfile.read(n)
+        return data if data is not None and len(data) == n else None
+
+    def recv(self) -> Optional[tuple]:
+        """Next message, or None at end of stream."""
+        header = self._read_exact(_HEADER.size)
+        if header is None:
+            return None
+        (size,) = _HEADER.unpack(header)
+        mac = self._read_exact(_MAC_LEN)
+        payload = self._read_exact(size) if mac is not None else None
+        if payload is None:
+            return None
+        if not hmac.compare_digest(mac, hmac.new(self._key, payload, hashlib.sha256).digest()):
+            raise RemoteError("message with a bad signature (token mismatch?)")
+        return pickle.loads(payload)
+
+    def close(self) -> None:
+        for f in (self._wfile, self._rfile):
+            try:
+                f.close()
+            except OSError:
+                pass
+        if self._closer is not None:
+            self._closer()
+
+
+def _socket_channel(sock: socket.socket, token: str) -> Channel:
+    return Channel(sock.makefile("rb"), sock.makefile("wb"), token, sock.close)
+
+
+# Submitting side
+# ==============================================================================
+@dataclass(frozen=True)
+class WorkerSpec:
+    kind: str  # "local", "ssh" or "tcp"
+    host: str = "localhost"
+    port: int = 0
+    slots: int = 0  # 0: the worker's CPU count
+
+    def __str__(self) -> str:
+        if self.kind == "tcp":
+            return f"tcp:{self.host}:{self.port}"
+        return f"{self.kind}:{self.host}" + (f":{self.slots}" if self.slots else "")
+
+
+def parse_worker_spec(text: str) -> WorkerSpec:
+    """local[:N], ssh:HOST[:N] or tcp:HOST:PORT (see module header)."""
+    kind, _, rest = text.partition(":")
+    parts = rest.split(":") if rest else []
+    try:
+        if kind == "local" and len(parts) <= 1:
+            return WorkerSpec("local", slots=int(parts[0]) if parts else 0)
+        if kind == "ssh" and 1 <= len(parts) <= 2 and parts[0]:
+            return WorkerSpec("ssh", parts[0], slots=int(parts[1]) if len(parts) == 2 else 0)
+        if kind == "tcp" and len(parts) == 2 and parts[0]:
+            return WorkerSpec("tcp", parts[0], port=int(parts[1]))
+    except ValueError:
+        pass
+    raise ValueError(f"bad worker '{text}' (expected local[:N], ssh:HOST[:N] or tcp:HOST:PORT)")
+
+
+class _Worker:
+    def __init__(self, spec: WorkerSpec, channel: Channel, proc: Optional[subprocess.Popen],
+                 name: str, slots: int):
+        self.spec = spec
+        self.channel = channel
+        self.proc = proc
+        self.name = name
+        self.slots = slots
+        self.alive = True
+        self.running: Dict[int, Future] = {}
+
+
+def _serve_argv(python: str, script: str, slots: int) -> List[str]:
+    argv = [python, script, "--serve"]
+    return argv + ["--slots", str(slots)] if slots else argv
+
+
+class RemoteExecutor(Executor):
+    """
+    Executor over a set of workers (see module header). A job goes to the
+    live worker with the most free slots; jobs wait in a queue while every
+    slot is busy. If a worker disconnects, its running jobs fail with
+    RemoteError and the others carry on.
+    """
+
+    def __init__(self, specs: List[WorkerSpec], script: str, cwd: str, token: str = "",
+                 remote_python: str = "python3"):
+        self._lock = threading.Lock()
+        self._queue: Deque[Tuple[Future, Callable, tuple, dict]] = deque()
+        self._workers: List[_Worker] = []
+        self._next_id = 0
+        self._shutdown = False
+        try:
+            for spec in specs:
+                self._workers.append(self._connect(spec, script, cwd, token, remote_python))
+        except BaseException:
+            self.shutdown(wait=False)
+            raise
+        for worker in self._workers:
+            threading.Thread(target=self._reader, args=(worker,), daemon=True).start()
+
+    @staticmethod
+    def _connect(spec: WorkerSpec, script: str, cwd: str, token: str, remote_python: str) -> _Worker:
+        proc = None
+        if spec.kind == "tcp":
+            if not token:
+                raise RemoteError(f"worker {spec} needs a token (--token or ${TOKEN_ENV})")
+            sock = socket.create_connection((spec.host, spec.port))
+            channel = _socket_channel(sock, token)
+        else:
+            if spec.kind == "local":
+                argv = _serve_argv(sys.executable, script, spec.slots)
+            else:
+                remote = " ".join(shlex.quote(a) for a in _serve_argv(remote_python, script, spec.slots))
+                argv = ["ssh", "-o", "BatchMode=yes", spec.host, f"cd {shlex.quote(cwd)} && exec {remote}"]
+            # A pipe (or ssh) is already private: the token only guards TCP
+            proc = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                    cwd=cwd, start_new_session=True)
+            channel = Channel(proc.stdout, proc.stdin)
+        hello = channel.recv()
+        if not hello or hello[0] != "hello" or hello[1] != PROTOCOL_VERSION:
+            channel.close()
+            raise RemoteError(f"worker {spec} did not answer with protocol v{PROTOCOL_VERSION}")
+        _, _, host, pid, slots = hello
+        return _Worker(spec, channel, proc, f"{host}:{pid}", slots)
+
+    @property
+    def slots(self) -> int:
+        return sum(w.slots for w in self._workers if w.alive)
+
+    def describe(self) -> List[str]:
+        return [f"{w.spec} -> {w.name} slots={w.slots}" for w in self._workers]
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._queue.append((fut, fn, args, kwargs))
+            lost = self._dispatch_locked()
+        _fail(lost, "no live workers")
+        return fut
+
+    def _dispatch_locked(self) -> List[Future]:
+        """Start queued jobs on free slots; returns queued futures that can never run."""
+        while self._queue:
+            free = [w for w in self._workers if w.alive and len(w.running) < w.slots]
+            if not free:
+                if any(w.alive for w in self._workers):
+                    return []
+                lost = [item[0] for item in self._queue]
+                self._queue.clear()
+                return lost
+            worker = max(free, key=lambda w: w.slots - len(w.running))
+            fut, fn, args, kwargs = self._queue.popleft()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            self._next_id += 1
+            worker.running[self._next_id] = fut
+            try:
+                worker.channel.send("job", self._next_id, fn, args, kwargs)
+            except (OSError, ValueError):
+                # The reader thread sees the closed stream and fails the job
+                worker.alive = False
+        return []
+
+    def _reader(self, worker: _Worker) -> None:
+        streams: Dict[int, object] = {}
+        try:
+            while True:
+                msg = worker.channel.recv()
+                if msg is None:
+                    break
+                kind = msg[0]
+                if kind == "data":
+                    f = streams.get(msg[1])
+                    if f is not None:
+                        f.write(msg[2])
+                        f.flush()
+                elif kind == "open":
+                    _, sid, path, append = msg
+                    path = Path(path)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    streams[sid] = path.open("ab" if append else "wb")
+                elif kind == "close":
+                    f = streams.pop(msg[1], None)
+                    if f is not None:
+                        f.close()
+                elif kind == "print":
+                    sys.stdout.write(msg[2])
+                    sys.stdout.flush()
+                elif kind == "done":
+                    _, jid, ok, value = msg
+                    with self._lock:
+                        fut = worker.running.pop(jid, None)
+                        lost = self._dispatch_locked()
+                    _fail(lost, "no live workers")
+                    if fut is None:
+                        continue
+                    if ok:
+                        fut.set_result(value)
+                    else:
+                        fut.set_exception(RemoteError(f"on {worker.name}:\n{value}"))
+        except (OSError, EOFError, pickle.UnpicklingError, RemoteError) as e:
+            if not self._shutdown:
+                print(f"[MAIN] WARN: lost worker {worker.spec} ({worker.name}): {e}", file=sys.stderr)
+        finally:
+            for f in streams.values():
+                f.close()
+            with self._lock:
+                worker.alive = False
+                lost = list(worker.running.values())
+                worker.running.clear()
+                lost += self._dispatch_locked()
+            _fail(lost, f"worker {worker.spec} ({worker.name}) disconnected")
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    self._queue.popleft()[0].cancel()
+        if wait:
+            with self._lock:
+                pending = [f for w in self._workers for f in w.running.values()]
+                pending += [item[0] for item in self._queue]
+            wait_futures(pending)
+        for worker in self._workers:
+            try:
+                worker.channel.send("stop")
+            except (OSError, ValueError):
+                pass
+            worker.channel.close()
+            if worker.proc is not None:
+                try:
+                    worker.proc.wait(timeout=None if wait else 5)
+                except subprocess.TimeoutExpired:
+                    worker.proc.terminate()
+
+
+def _fail(futures: List[Future], why: str) -> None:
+    for fut in futures:
+        if not fut.done():
+            fut.set_exception(RemoteError(why))
+
+
+# Worker side
+# ==============================================================================
+class _JobOutput(threading.local):
+    jid: Optional[int] = None
+    readers: List[threading.Thread]
+
+
+class _PrintForwarder:
+    """sys.stdout of a worker: text printed by a job goes back to its submitter."""
+
+    def __init__(self, channel: Channel, output: _JobOutput, fallback):
+        self._channel = channel
+        self._output = output
+        self._fallback = fallback
+
+    def write(self, text: str) -> int:
+        if self._output.jid is None:
+            return self._fallback.write(text)
+        try:
+            self._channel.send("print", self._output.jid, text)
+        except (OSError, ValueError):
+            pass
+        return len(text)
+
+    def flush(self) -> None:
+        if self._output.jid is None:
+            self._fallback.flush()
+
+
+class _Server:
+    def __init__(self, channel: Channel, module, prepare: Optional[Callable]):
+        self.channel = channel
+        self.module = module
+        self.prepare = prepare
+        self.output = _JobOutput()
+        self._sid_lock = threading.Lock()
+        self._next_sid = 0
+
+    def open_log(self, log_path, append: bool):
+        """_log_redirect hook: a pipe whose contents are streamed to log_path upstream."""
+        with self._sid_lock:
+            self._next_sid += 1
+            sid = self._next_sid
+        self.channel.send("open", sid, str(log_path), append)
+        r, w = os.pipe()
+        reader = threading.Thread(target=self._pump, args=(sid, r), daemon=True)
+        reader.start()
+        self.output.readers.append(reader)
+        return os.fdopen(w, "w")
+
+    def _pump(self, sid: int, fd: int) -> None:
+        try:
+            while True:
+                data = os.read(fd, 1 << 16)
+                if not data:
+                    break
+                self.channel.send("data", sid, data)
+            self.channel.send("close", sid)
+        except (OSError, ValueError):
+            pass
+        finally:
+            os.close(fd)
+
+    def run_job(self, jid: int, fn: Callable, args: tuple, kwargs: dict) -> None:
+        self.output.jid = jid
+        self.output.readers = []
+        try:
+            if self.prepare is not None:
+                self.prepare(fn, args)
+            ok, value = True, fn(*args, **kwargs)
+        except BaseException:
+            ok, value = False, traceback.format_exc()
+        # All log output of the job reaches the submitter before its result
+        for reader in self.output.readers:
+            reader.join(timeout=10)
+        self.output.jid = None
+        try:
+            self.channel.send("done", jid, ok, value)
+        except (OSError, ValueError):
+            pass
+        except Exception:
+            self.channel.send("done", jid, False, traceback.format_exc())
+
+    def kill_running(self) -> None:
+        for proc in list(getattr(self.module, "_active_procs", ())):
+            try:
+                os.killpg(proc.pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+
+def serve(channel: Channel, slots: int, module, prepare: Optional[Callable] = None) -> None:
+    """
+    Run jobs arriving on channel until it closes. module is the host module
+    (run_experiments) whose _log_redirect hook and _active_procs set are used;
+    prepare(fn, args), if given, runs before each job.
+    """
+    server = _Server(channel, module, prepare)
+    module._log_redirect = server.open_log
+    stdout = sys.stdout
+    sys.stdout = _PrintForwarder(channel, server.output, sys.stderr)
+    threads: List[threading.Thread] = []
+    try:
+        channel.send("hello", PROTOCOL_VERSION, socket.gethostname(), os.getpid(), slots)
+        while True:
+            try:
+                msg = channel.recv()
+            except (OSError, RemoteError) as e:
+                print(f"[WARN] Dropping connection: {e}", file=sys.stderr)
+                break
+            if msg is None or msg[0] == "stop":
+                break
+            if msg[0] == "job":
+                _, jid, fn, args, kwargs = msg
+                t = threading.Thread(target=server.run_job, args=(jid, fn, args, kwargs), daemon=True)
+                t.start()
+                threads.append(t)
+                threads = [t for t in threads if t.is_alive()]
+    finally:
+        if any(t.is_alive() for t in threads):
+            server.kill_running()
+            for t in threads:
+                t.join(timeout=30)
+        sys.stdout = stdout
+        module._log_redirect = None
+        channel.close()
+
+
+def serve_stdio(slots: int, module, prepare: Optional[Callable] = None) -> int:
+    """Worker on stdin/stdout (local and ssh workers)."""
+    # Keep the protocol off fds 0/1 so jobs and their tools cannot touch it
+    rfile = os.fdopen(os.dup(0), "rb")
+    wfile = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    os.dup2(2, 1)
+    serve(Channel(rfile, wfile), slots, module, prepare)
+    return 0
+
+
+def serve_tcp(host: str, port: int, token: str, slots: int, module,
+              prepare: Optional[Callable] = None) -> int:
+    """Job server: serve one submitting client at a time on host:port."""
+    if not token:
+        print(f"[ERROR] A token is required to listen on {host} "
+              f"(--token or ${TOKEN_ENV}).", file=sys.stderr)
+        return 1
+    with socket.create_server((host, port)) as listener:
+        print(f"[INFO] Serving on {host}:{listener.getsockname()[1]} with {slots} slot(s).",
+              file=sys.stderr)
+        while True:
+            conn, addr = listener.accept()
+            print(f"[INFO] Client {addr[0]}:{addr[1]} connected.", file=sys.stderr)
+            serve(_socket_channel(conn, token), slots, module, prepare)
+            print(f"[INFO] Client {addr[0]}:{addr[1]} disconnected.", file=sys.stderr)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Resource usage of the commands run_experiments.py launches.
+#
+# Every command runs in its own session (setsid). While it runs, a sampler
+# thread walks /proc for the processes of that session and records the whole
+# tree's RSS, CPU time, storage I/O, thread and process counts. When the
+# command exits, a last row carries the exact CPU time and peak RSS from the
+# kernel's rusage (wait4), which also covers processes that ran between
+# samples.
+#
+# Rows are appended as CSV next to the task's log (<case>_run.usage.csv for
+# <case>_run.log):
+#
+#   time,stage,kind,rss_kb,cpu_s,read_bytes,write_bytes,threads,procs
+#
+# kind is "start", "sample" or "exit". CPU and I/O are cumulative for the
+# command; RSS, threads and procs are the values at that instant (at "exit":
+# the peak).
+# summarize() turns the files into the per-task table printed after a suite.
+# -----------------------------------------------------------------------------
+
+import csv
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SAMPLE_INTERVAL = 2.0
+USAGE_FIELDS = ("time", "stage", "kind", "rss_kb", "cpu_s", "read_bytes", "write_bytes",
+                "threads", "procs")
+
+_PAGE_KB = (os.sysconf("SC_PAGE_SIZE") // 1024) if hasattr(os, "sysconf") else 4
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def usage_path(log_path: Path) -> Path:
+    """<case>_run.log -> <case>_run.usage.csv"""
+    return log_path.with_name(log_path.stem + ".usage.csv")
+
+
+def _proc_stat(pid: str) -> Optional[List[str]]:
+    """Fields of /proc/<pid>/stat from field 3 (state) on, or None if gone."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            data = f.read().decode("ascii", "replace")
+    except OSError:
+        return None
+    return data[data.rfind(")") + 2:].split()
+
+
+def _proc_io(pid: str) -> Tuple[int, int]:
+    read = write = 0
+    try:
+        with open(f"/proc/{pid}/io", "rb") as f:
+            for line in f:
+                if line.startswith(b"read_bytes:"):
+                    read = int(line.split()[1])
+                elif line.startswith(b"write_bytes:"):
+                    write = int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return read, write
+
+
+class ProcessTreeSampler:
+    """
+    Samples the processes of session `sid` every `interval` seconds and
+    writes rows to `out` (a text file, closed by stop()). CPU and I/O of each
+    process are kept at their last observed value, so processes that exit
+    still count.
+    """
+
+    def __init__(self, sid: int, out, stage: str, interval: float = SAMPLE_INTERVAL):
+        self.sid = str(sid)
+        self.stage = stage
+        self.interval = interval
+        self._writer = csv.writer(out, lineterminator="\n")
+        self._out = out
+        self._seen: Dict[Tuple[str, str], Tuple[float, int, int]] = {}
+        self.peak_rss_kb = 0
+        self.peak_threads = 0
+        self.peak_procs = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def available() -> bool:
+        return os.path.isdir("/proc/self")
+
+    def start(self) -> "ProcessTreeSampler":
+        self._write("start", 0, 0.0, 0, 0, 0, 0)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        rss_kb = threads = procs = 0
+        try:
+            pids = [p for p in os.listdir("/proc") if p.isdigit()]
+        except OSError:
+            return
+        for pid in pids:
+            fields = _proc_stat(pid)
+            # session is field 6; utime, stime 14-15; num_threads 20; starttime 22; rss 24
+            if fields is None or len(fields) < 22 or fields[3] != self.sid:
+                continue
+            procs += 1
+            threads += int(fields[17])
+            rss_kb += int(fields[21]) * _PAGE_KB
+            read, write = _proc_io(pid)
+            self._seen[(pid, fields[19])] = ((int(fields[11]) + int(fields[12])) / _CLK_TCK, read, write)
+        self.peak_rss_kb = max(self.peak_rss_kb, rss_kb)
+        self.peak_threads = max(self.peak_threads, threads)
+        self.peak_procs = max(self.peak_procs, procs)
+        cpu, read, write = self.totals()
+        self._write("sample", rss_kb, cpu, read, write, threads, procs)
+
+    def totals(self) -> Tuple[float, int, int]:
+        cpu = sum(v[0] for v in self._seen.values())
+        read = sum(v[1] for v in self._seen.values())
+        write = sum(v[2] for v in self._seen.values())
+        return cpu, read, write
+
+    def _write(self, kind: str, rss_kb: int, cpu: float, read: int, write: int,
+               threads: int, procs: int) -> None:
+        try:
+            self._writer.writerow([f"{time.time():.1f}", self.stage, kind, rss_kb, f"{cpu:.2f}",
+                                   read, write, threads, procs])
+            self._out.flush()
+        except (OSError, ValueError):
+            pass
+
+    def stop(self, rusage=None) -> None:
+        """Stop sampling and write the exit row (exact CPU / peak RSS from rusage if given)."""
+        self._stop.set()
+        self._thread.join()
+        cpu, read, write = self.totals()
+        peak_kb = self.peak_rss_kb
+        if rusage is not None:
+            cpu = max(cpu, rusage.ru_utime + rusage.ru_stime)
+            # ru_maxrss is the largest single process (KB on Linux)
+            peak_kb = max(peak_kb, rusage.ru_maxrss)
+            read = max(read, rusage.ru_inblock * 512)
+            write = max(write, rusage.ru_oublock * 512)
+        self._write("exit", peak_kb, cpu, read, write, self.peak_threads, self.peak_procs)
+        self._out.close()
+
+
+def open_usage(path: Path, append: bool, opener=None):
+    """Open a usage CSV (through opener(path, append) if given), writing the header when new."""
+    if opener is not None:
+        f = opener(path, append)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(path, "a" if append else "w", encoding="utf-8")
+    try:
+        new = not append or f.tell() == 0
+    except (OSError, ValueError):  # a stream: only the opener knows
+        new = not append
+    if new:
+        f.write(",".join(USAGE_FIELDS) + "\n")
+    return f
+
+
+# Suite summary
+# ==============================================================================
+@dataclass
+class UsageSummary:
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_kb: int = 0
+    peak_stage: str = ""
+    read_bytes: int = 0
+    write_bytes: int = 0
+    peak_threads: int = 0
+
+
+def summarize(paths: Iterable[Path]) -> Optional[UsageSummary]:
+    """Combine the exit rows of one task's usage files; None if there are none."""
+    total = UsageSummary()
+    found = False
+    for path in paths:
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+        except OSError:
+            continue
+        start = None
+        for row in rows:
+            try:
+                t = float(row["time"])
+                if row["kind"] == "start" or start is None:
+                    start = t
+                if row["kind"] != "exit":
+                    continue
+                found = True
+                total.wall_s += t - start
+                start = None
+                total.cpu_s += float(row["cpu_s"])
+                total.read_bytes += int(row["read_bytes"])
+                total.write_bytes += int(row["write_bytes"])
+                total.peak_threads = max(total.peak_threads, int(row["threads"]))
+                if int(row["rss_kb"]) > total.peak_rss_kb:
+                    total.peak_rss_kb = int(row["rss_kb"])
+                    total.peak_stage = row["stage"]
+            except (KeyError, TypeError, ValueError):
+                continue
+    return total if found else None
+
+
+def _gb(n: float) -> str:
+    return f"{n / (1 << 30):.2f}"
+
+
+def format_table(rows: List[Tuple[str, Optional[UsageSummary]]]) -> List[str]:
+    lines = ["%-32s %9s %9s %6s %9s %-22s %8s %8s %7s" % (
+        "Task", "Wall(s)", "CPU(s)", "Cores", "PeakGB", "Peak stage", "ReadGB", "WriteGB", "Threads")]
+    for label, s in rows:
+        if s is None:
+            lines.append("%-32s %9s" % (label, "-"))
+            continue
+        cores = s.cpu_s / s.wall_s if s.wall_s > 0 else 0.0
+        lines.append("%-32s %9.0f %9.0f %6.1f %9s %-22s %8s %8s %7d" % (
+            label, s.wall_s, s.cpu_s, cores, _gb(s.peak_rss_kb * 1024), s.peak_stage[:22],
+            _gb(s.read_bytes), _gb(s.write_bytes), s.peak_threads))
+    return lines
@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Stage result cache for run_experiments.py.
+#
+# Every Makefile stage of a task gets a fingerprint that chains the previous
+# stage's fingerprint with what the stage itself reads:
+#
+#   - the make command line (target, DESIGN_CONFIG, ...)
+#   - the Makefile recipe of the target (and of the targets it calls), the
+#     scripts it runs (scripts_openroad/, scripts_cadence/, util/, and the
+#     scripts those mention), the design config directory, the design sources
+#     and the platform directories, all by content
+#   - the environment variables those files mention, resolved through the
+#     Makefile/config variable definitions, plus the tools named by *_EXE
+#     variables (from the environment or the Makefile's $(shell which ...)
+#     default): resolved path, size/mtime and, for the known tools, the
+#     output of their version flag
+#
+# After a stage succeeds, the task's RESULTS_DIR/LOG_DIR/REPORTS_DIR/OBJECTS_DIR
+# are snapshotted into a content-addressed store under the fingerprint. A new
+# run restores the snapshot of the last stage whose fingerprint (and every
+# earlier one) is unchanged and starts from the first invalidated stage, so a
+# sweep over 3D parameters reuses synthesis and the 2D stages.
+#
+# Snapshots are relative to the four work directories, and variables that only
+# name them (FLOW_VARIANT, WORK_HOME, ...) are not part of the fingerprint, so
+# variants of the same design share cached stages.
+#
+#   <cache>/objects/<ab>/<sha256>   file contents (read-only copies)
+#   <cache>/stages/<fingerprint>.json   manifest: dir var -> [path, sha, mode, mtime_ns]
+#   <cache>/lock   shared while snapshotting/restoring, exclusive while pruning
+#
+# Inputs outside the repository (absolute paths in the design config, the
+# Liberty cache, ...) are not tracked: point the cache at a fresh directory
+# after changing those.
+# -----------------------------------------------------------------------------
+
+import argparse
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import subprocess
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Bump when the fingerprint inputs or the store layout change.
+STAGE_CACHE_VERSION = 2
+STAGE_CACHE_MAX_GB = 20.0
+
+STAGE_DIR_VARS = ("RESULTS_DIR", "LOG_DIR", "REPORTS_DIR", "OBJECTS_DIR")
+
+# Variables that only say where things live, not what is computed
+LOCATION_VARS = frozenset(STAGE_DIR_VARS) | {
+    "FLOW_VARIANT", "WORK_HOME", "FLOW_HOME", "DESIGN_HOME", "PLATFORM_HOME",
+    "LIB_CACHE_DIR", "LIB_CACHE_MAX_MB", "PWD", "OLDPWD", "SHLVL", "_",
+    "TERM", "DISPLAY", "HOSTNAME", "LOGNAME", "USER", "HOME", "MAIL",
+}
+
+# Makefile variables naming script directories under the repo root
+SCRIPT_DIR_VARS = {
+    "OPENROAD_SCRIPTS_DIR": "scripts_openroad",
+    "CADENCE_SCRIPTS_DIR": "scripts_cadence",
+    "UTILS_DIR": "util",
+    "HOTSPOT_SCRIPTS_DIR": "HotSpot",
+}
+
+# Version flags of the tools named by *_EXE variables; the output goes into
+# the fingerprint, so an upgraded tool invalidates the stages it runs
+TOOL_VERSION_ARGS = {
+    "OPENROAD_EXE": ("-version",),
+    "YOSYS_EXE": ("-V",),
+    "STA_EXE": ("-version",),
+    "PYTHON_EXE": ("--version",),
+    "GENUS_EXE": ("-version",),
+    "INNOVUS_EXE": ("-version",),
+}
+TOOL_VERSION_TIMEOUT = 60
+
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_TARGET_RE = re.compile(r"^([A-Za-z0-9_.\-]+)\s*:(?![=:])(.*)$")
+_DEF_RE = re.compile(r"^\s*(?:export\s+|override\s+)*([A-Za-z0-9_]+)\s*(?:\?|:|\+|!)?=(.*)$")
+_DEFINE_RE = re.compile(r"^\s*define\s+([A-Za-z0-9_]+)")
+_SCRIPT_REF_RE = re.compile(r"\$\((%s)\)/([\w.\-/]+)" % "|".join(SCRIPT_DIR_VARS))
+_SCRIPT_NAME_RE = re.compile(r"[\w\-]+\.(?:tcl|py|sh)\b")
+_SUBMAKE_RE = re.compile(r"\$\(MAKE\)(.*)")
+_WHICH_RE = re.compile(r"\$\(shell\s+which\s+([\w.\-+/]+)\s*\)")
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+class FileDigests:
+    """sha256 of files, memoized by (size, mtime_ns) for the life of the object."""
+
+    def __init__(self):
+        self._memo: Dict[str, Tuple[int, int, str]] = {}
+
+    def digest(self, path: str) -> Optional[str]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        hit = self._memo.get(path)
+        if hit and hit[:2] == (st.st_size, st.st_mtime_ns):
+            return hit[2]
+        sha = file_sha256(path)
+        self._memo[path] = (st.st_size, st.st_mtime_ns, sha)
+        return sha
+
+    def tree(self, root: str) -> List[Tuple[str, str]]:
+        """(path relative to root, digest) of every file under root, sorted."""
+        out = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                sha = self.digest(path)
+                if sha is not None:
+                    out.append((os.path.relpath(path, root), sha))
+        return out
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Stage fingerprints
+# ==============================================================================
+def parse_defs(text: str, defs: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Add the variable definitions in make text to defs (name -> all values, joined)."""
+    defs = {} if defs is None else defs
+    for line in text.splitlines():
+        m = _DEF_RE.match(line)
+        if m:
+            defs[m.group(1)] = defs.get(m.group(1), "") + m.group(2) + "\n"
+    return defs
+
+
+def identifier_closure(text: str, defs: Dict[str, str]) -> Set[str]:
+    """Identifiers in text plus, transitively, those in their definitions."""
+    found: Set[str] = set()
+    todo = set(_IDENT_RE.findall(text))
+    while todo:
+        name = todo.pop()
+        if name in found:
+            continue
+        found.add(name)
+        if name in defs:
+            todo.update(set(_IDENT_RE.findall(defs[name])) - found)
+    return found
+
+
+class MakefileModel:
+    """
+    Just enough of the flow Makefile to tell what a target reads: recipe text
+    per target (with prerequisites and "$(MAKE) ... target" sub-calls), and
+    the text of every variable definition (including define ... endef).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recipes: Dict[str, Tuple[List[str], str]] = {}
+        self.defs: Dict[str, str] = {}
+        target = None
+        define = None
+        for line in _read_text(path).splitlines():
+            if define is not None:
+                if line.strip() == "endef":
+                    define = None
+                else:
+                    self.defs[define] += line + "\n"
+                continue
+            if line.startswith("\t") and target is not None:
+                prereqs, body = self.recipes[target]
+                self.recipes[target] = (prereqs, body + line + "\n")
+                continue
+            m = _DEFINE_RE.match(line)
+            if m:
+                define = m.group(1)
+                self.defs.setdefault(define, "")
+                target = None
+                continue
+            m = _DEF_RE.match(line)
+            if m:
+                parse_defs(line, self.defs)
+                target = None
+                continue
+            m = _TARGET_RE.match(line)
+            if m and not line.startswith((".", "$")):
+                target = m.group(1)
+                self.recipes.setdefault(target, (m.group(2).split(), ""))
+                continue
+            if line.strip() and not line.startswith((" ", "\t", "#")):
+                target = None
+
+    def recipe_closure(self, target: str) -> str:
+        """Recipe text of target and of every target it depends on or calls."""
+        seen: Set[str] = set()
+        todo = [target]
+        texts = []
+        while todo:
+            t = todo.pop()
+            if t in seen or t not in self.recipes:
+                continue
+            seen.add(t)
+            prereqs, body = self.recipes[t]
+            texts.append(body)
+            todo.extend(prereqs)
+            for m in _SUBMAKE_RE.finditer(body):
+                todo.extend(w for w in m.group(1).split() if w in self.recipes)
+        return "".join(texts)
+
+
+def _script_closure(repo_root: str, text: str) -> List[str]:
+    """Scripts referenced as $(OPENROAD_SCRIPTS_DIR)/x.tcl etc., and those they mention."""
+    dirs = [os.path.join(repo_root, d) for d in SCRIPT_DIR_VARS.values()]
+    todo = []
+    for var, rel in _SCRIPT_REF_RE.findall(text):
+        todo.append(os.path.join(repo_root, SCRIPT_DIR_VARS[var], rel))
+    seen: Set[str] = set()
+    out = []
+    while todo:
+        path = os.path.normpath(todo.pop())
+        if path in seen or not os.path.isfile(path):
+            continue
+        seen.add(path)
+        out.append(path)
+        for name in set(_SCRIPT_NAME_RE.findall(_read_text(path))):
+            for d in [os.path.dirname(path)] + dirs:
+                candidate = os.path.join(d, name)
+                if os.path.isfile(candidate):
+                    todo.append(candidate)
+                    break
+    return sorted(out)
+
+
+def _config_value(text: str, name: str) -> Optional[str]:
+    m = re.search(r"^\s*(?:export\s+)?%s\s*\??=\s*(\S+)" % re.escape(name), text, re.M)
+    return m.group(1) if m else None
+
+
+class StageFingerprinter:
+    """Computes chained stage fingerprints for one repo (see module header)."""
+
+    def __init__(self, repo_root: str):
+        self.repo_root = os.path.abspath(repo_root)
+        self.digests = FileDigests()
+        self._trees: Dict[str, List[Tuple[str, str]]] = {}
+        self._makefile = MakefileModel(os.path.join(self.repo_root, "Makefile"))
+        self._inputs: Dict[Tuple[str, str], Tuple[List[str], Set[str]]] = {}
+        self._tools: Dict[Tuple[str, str], str] = {}
+
+    def _tree(self, path: str) -> List[Tuple[str, str]]:
+        if path not in self._trees:
+            self._trees[path] = self.digests.tree(path) if os.path.isdir(path) else []
+        return self._trees[path]
+
+    def _stage_inputs(self, target: str, design_config: str) -> Tuple[List[str], Set[str]]:
+        """(input files, identifiers) of target under design_config, memoized."""
+        key = (target, design_config)
+        if key in self._inputs:
+            return self._inputs[key]
+        model = self._makefile
+        defs = dict(model.defs)
+
+        root = self.repo_root
+        config_text = _read_text(os.path.join(root, design_config))
+        parse_defs(config_text, defs)
+        platform = _config_value(config_text, "PLATFORM") or ""
+        nickname = _config_value(config_text, "DESIGN_NICKNAME") or \
+            _config_value(config_text, "DESIGN_NAME") or ""
+        platform_text = _read_text(os.path.join(root, "platforms", platform, "config.mk")) \
+            if platform else ""
+        settings = os.path.join(root, "settings.mk")
+        settings_text = _read_text(settings)
+        parse_defs(platform_text + "\n" + settings_text, defs)
+
+        recipe = model.recipe_closure(target)
+        # Scripts may also hide behind variables (e.g. $(call _or, ...))
+        names = identifier_closure(recipe, defs)
+        scripts = _script_closure(root, recipe + "".join(defs.get(n, "") for n in names))
+        # Config files only contribute definitions: their own content is
+        # hashed below, so a variable counts when the recipe or a script uses it
+        texts = [recipe] + [_read_text(p) for p in scripts]
+        names = identifier_closure("\n".join(texts), defs)
+
+        files = [model.path, os.path.join(root, design_config)] + scripts
+        if os.path.isfile(settings):
+            files.append(settings)
+        dirs = [os.path.dirname(os.path.join(root, design_config))]
+        for name in (platform, platform + "_3D"):
+            if name and os.path.isdir(os.path.join(root, "platforms", name)):
+                dirs.append(os.path.join(root, "platforms", name))
+        if nickname:
+            src = os.path.join(root, "designs", "src")
+            dirs += sorted(os.path.join(src, d) for d in os.listdir(src)
+                           if d.startswith(nickname)) if os.path.isdir(src) else []
+        result = (files + dirs, names)
+        self._inputs[key] = result
+        return result
+
+    def tool_identity(self, name: str, value: str) -> str:
+        """Resolved path, size/mtime and version output of the tool a *_EXE variable names, memoized."""
+        key = (name, value)
+        if key in self._tools:
+            return self._tools[key]
+        path = value if os.sep in value else shutil.which(value)
+        if not path or not os.path.isfile(path):
+            ident = "missing"
+        else:
+            real = os.path.realpath(path)
+            st = os.stat(real)
+            ident = f"{real}@{st.st_size}:{st.st_mtime_ns}"
+            args = TOOL_VERSION_ARGS.get(name)
+            if args:
+                try:
+                    out = subprocess.run([path, *args], stdin=subprocess.DEVNULL,
+                                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                         timeout=TOOL_VERSION_TIMEOUT)
+                    ident += " " + out.stdout.decode("utf-8", errors="replace").strip()
+                except (OSError, subprocess.SubprocessError):
+                    ident += " ?"
+        self._tools[key] = ident
+        return ident
+
+    def _tool(self, name: str, env: Dict[str, str]) -> Optional[str]:
+        """What a *_EXE variable names: its environment value or the Makefile's $(shell which x)."""
+        if env.get(name):
+            return env[name]
+        m = _WHICH_RE.search(self._makefile.defs.get(name, ""))
+        return m.group(1) if m else None
+
+    def fingerprint(self, prev: str, target: str, cmd: Iterable[str],
+                    env: Dict[str, str]) -> str:
+        """Fingerprint of a make stage run as cmd with env, after a stage fingerprinted prev."""
+        cmd = list(cmd)
+        design_config = env.get("DESIGN_CONFIG", "")
+        for arg in cmd:
+            if arg.startswith("DESIGN_CONFIG="):
+                design_config = arg.split("=", 1)[1]
+        paths, names = self._stage_inputs(target, design_config)
+
+        h = hashlib.sha256(b"stage-cache v%d\0" % STAGE_CACHE_VERSION)
+        h.update(prev.encode() + b"\0")
+        h.update("\0".join(cmd).encode() + b"\0\0")
+        for path in paths:
+            rel = os.path.relpath(path, self.repo_root)
+            if os.path.isdir(path):
+                for sub, sha in self._tree(path):
+                    h.update(f"{rel}/{sub}={sha}\n".encode())
+            else:
+                h.update(f"{rel}={self.digests.digest(path)}\n".encode())
+        for name in sorted(names):
+            if name in LOCATION_VARS:
+                continue
+            if name in env:
+                h.update(f"${name}={env[name]}\n".encode())
+            tool = self._tool(name, env) if name.endswith("_EXE") else None
+            if tool:
+                h.update(f"@{self.tool_identity(name, tool)}\n".encode())
+        return h.hexdigest()
+
+
+# Snapshot store
+# ==============================================================================
+class StageCache:
+    """Content-addressed snapshots of a task's work directories, one per stage fingerprint."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.objects = os.path.join(self.root, "objects")
+        self.stages = os.path.join(self.root, "stages")
+
+    def _manifest_path(self, key: str) -> str:
+        return os.path.join(self.stages, key + ".json")
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.objects, sha[:2], sha)
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """Hold <cache>/lock: shared by snapshot/restore, exclusive for prune."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, "lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def has(self, key: str) -> bool:
+        return os.path.isfile(self._manifest_path(key))
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._manifest_path(key)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("version") == STAGE_CACHE_VERSION else None
+
+    def _put_blob(self, path: str, sha: str) -> None:
+        blob = self._blob_path(sha)
+        if os.path.exists(blob):
+            return
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp_path = "%s.%d.tmp" % (blob, os.getpid())
+        try:
+            # A copy, never a link: the flow rewrites some outputs in place
+            shutil.copyfile(path, tmp_path)
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, blob)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def snapshot(self, key: str, dirs: Dict[str, str], cwd: str, target: str,
+                 prev: Optional[str] = None) -> int:
+        """
+        Store the files under dirs (var -> path, relative to cwd) as stage key.
+        Hashes recorded in the previous stage's manifest are reused for files
+        whose size and mtime did not change. Returns the number of files.
+        """
+        with self._locked(exclusive=False):
+            known: Dict[Tuple[str, str], Tuple[int, int, str]] = {}
+            old = self.load(prev) if prev else None
+            for var, entries in (old or {}).get("dirs", {}).items():
+                for rel, sha, _, size, mtime_ns in entries:
+                    known[(var, rel)] = (size, mtime_ns, sha)
+
+            manifest = {"version": STAGE_CACHE_VERSION, "target": target,
+                        "created": time.time(), "dirs": {}}
+            count = 0
+            for var, path in dirs.items():
+                base = os.path.join(cwd, path)
+                entries = []
+                for dirpath, dirnames, filenames in os.walk(base):
+                    dirnames.sort()
+                    for name in sorted(filenames):
+                        full = os.path.join(dirpath, name)
+                        try:
+                            st = os.stat(full)
+                        except OSError:
+                            continue
+                        if not stat.S_ISREG(st.st_mode):
+                            continue
+                        rel = os.path.relpath(full, base)
+                        hit = known.get((var, rel))
+                        if hit and hit[:2] == (st.st_size, st.st_mtime_ns):
+                            sha = hit[2]
+                        else:
+                            sha = file_sha256(full)
+                        self._put_blob(full, sha)
+                        entries.append([rel, sha, stat.S_IMODE(st.st_mode), st.st_size, st.st_mtime_ns])
+                        count += 1
+                manifest["dirs"][var] = entries
+
+            os.makedirs(self.stages, exist_ok=True)
+            tmp_path = "%s.%d.tmp" % (self._manifest_path(key), os.getpid())
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self._manifest_path(key))
+            return count
+
+    def restore(self, key: str, dirs: Dict[str, str], cwd: str) -> int:
+        """Replace dirs with the snapshot of stage key. Returns the number of files."""
+        with self._locked(exclusive=False):
+            manifest = self.load(key)
+            if manifest is None:
+                raise OSError(f"stage cache entry {key} is missing or unreadable")
+            for path in dirs.values():
+                shutil.rmtree(os.path.join(cwd, path), ignore_errors=True)
+            count = 0
+            for var, path in dirs.items():
+                base = os.path.join(cwd, path)
+                os.makedirs(base, exist_ok=True)
+                for rel, sha, mode, _, mtime_ns in manifest["dirs"].get(var, []):
+                    dst = os.path.join(base, rel)
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copyfile(self._blob_path(sha), dst)
+                    os.chmod(dst, mode)
+                    os.utime(dst, ns=(mtime_ns, mtime_ns))
+                    count += 1
+            # Mark as recently used
+            os.utime(self._manifest_path(key))
+            return count
+
+    def prune(self, max_bytes: float) -> Tuple[int, int]:
+        """
+        Drop least recently used stage manifests until the objects they
+        reference fit in max_bytes, then delete unreferenced objects.
+        Returns (manifests removed, objects removed).
+        """
+        with self._locked(exclusive=True):
+            manifests = []
+            for name in os.listdir(self.stages) if os.path.isdir(self.stages) else []:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.stages, name)
+                try:
+                    mtime = os.stat(path).st_mtime
+                    with open(path) as f:
+                        shas = {e[1]: e[3] for entries in json.load(f)["dirs"].values() for e in entries}
+                except (OSError, ValueError, KeyError, IndexError):
+                    shas = {}
+                    mtime = 0.0
+                manifests.append((mtime, path, shas))
+            manifests.sort(reverse=True)
+
+            keep: Dict[str, int] = {}
+            removed = 0
+            for _, path, shas in manifests:
+                grown = dict(keep)
+                grown.update(shas)
+                if keep and sum(grown.values()) > max_bytes:
+                    os.remove(path)
+                    removed += 1
+                else:
+                    keep = grown
+
+            objects_removed = 0
+            for dirpath, _, filenames in os.walk(self.objects):
+                for name in filenames:
+                    if name not in keep:
+                        os.remove(os.path.join(dirpath, name))
+                        objects_removed += 1
+            return removed, objects_removed
+
+
+def stage_dirs(env: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """The task's work directories, or None unless all four are set."""
+    dirs = {var: env.get(var, "") for var in STAGE_DIR_VARS}
+    return dirs if all(dirs.values()) else None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="List or prune the stage result cache")
+    parser.add_argument("cache_dir", help="Stage cache directory")
+    parser.add_argument("--prune", type=float, metavar="GB",
+                        help="Evict least recently used stages until the cache fits in GB")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cache = StageCache(args.cache_dir)
+    if args.prune is not None:
+        stages, objects = cache.prune(args.prune * (1 << 30))
+        print(f"[INFO] Removed {stages} stage(s) and {objects} object(s).")
+    names = sorted(os.listdir(cache.stages)) if os.path.isdir(cache.stages) else []
+    for name in names:
+        manifest = cache.load(name[:-len(".json")]) if name.endswith(".json") else None
+        if manifest:
+            files = sum(len(v) for v in manifest["dirs"].values())
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(manifest["created"]))
+            print(f"{name[:16]}  {manifest['target']:<28} {files:6d} files  {created}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Persistent state of a run_experiments.py suite, and its retry policy.
+#
+# The journal (run_logs/suite_journal.json by default) holds one entry per
+# task: its state (queued, running, retrying, done, failed, cancelled, pruned), the
+# parts it ran (run, eval), the number of attempts and the last error. It is
+# rewritten atomically on every change, so after a crash or Ctrl-C
+# `run_experiments.py --resume` reads it back and skips the tasks that
+# already finished (or were pruned as dominated sweep points).
+#
+# RetryPolicy decides which failures are worth another attempt: only
+# transient ones, recognized by the error lines in the tail of the failed
+# command's log (license checkout failures, OOM kills reported by the tool,
+# bash or make) or a lost remote worker. Retries are opt-in (--retries) and
+# back off exponentially.
+# -----------------------------------------------------------------------------
+
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from suiteProgress import write_json_atomic
+
+JOURNAL_VERSION = 1
+TAIL_BYTES = 64 * 1024
+
+# Prefix of a tool's error line: OpenROAD "[ERROR GRT-0119]", Cadence
+# "**ERROR: (...)", and plain "ERROR:"/"Error:" from Yosys, Tcl and scripts
+_ERROR_LINE = r"^[ \t]*(?:\[ERROR[^\]\n]*\]|\*\*ERROR\b|ERROR\b|Error:)[^\n]*?"
+
+# Matched line by line (re.M), so only error lines count: a warning or a
+# report that merely mentions a license server or the word Killed does not
+TRANSIENT_PATTERNS = (
+    # License servers: checkout failures, all seats in use, server down
+    _ERROR_LINE + r"(?i:licen[cs]e[^\n]*\b(?:check ?out|unavailable|not available|in use|exceeded|"
+                  r"server (?:down|not responding|unreachable)|timed? ?out))",
+    _ERROR_LINE + r"(?i:(?:unable|failed|cannot) to (?:check ?out|obtain|get)\b[^\n]*licen[cs]e)",
+    r"^[^\n]*\b(?:FLEXnet Licensing error|FLEXlm error):",
+    # Out of memory: the tool's own report, or the kernel's SIGKILL as reported by bash/make
+    _ERROR_LINE + r"(?i:out of memory|cannot allocate memory)",
+    r"^terminate called after throwing an instance of 'std::bad_alloc'",
+    r"^MemoryError\b",
+    r"^[^\n]*: line \d+: +\d+ Killed\b",
+    r"^make(?:\[\d+\])?: \*\*\* [^\n]*Error 137\b",
+)
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class SuiteJournal:
+    """Task states of a suite, persisted to `path` (see module header)."""
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = path
+        self.data = {"version": JOURNAL_VERSION, "started": _now(), "tasks": {}}
+        if resume:
+            try:
+                with path.open(encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == JOURNAL_VERSION:
+                    self.data = data
+            except (OSError, ValueError):
+                pass
+        self.tasks: Dict[str, dict] = self.data["tasks"]
+
+    def completed(self, label: str, parts: Sequence[str]) -> bool:
+        entry = self.tasks.get(label)
+        return bool(entry) and entry.get("state") in ("done", "pruned") and set(parts) <= set(entry.get("parts", ()))
+
+    def mark(self, label: str, state: str, parts: Optional[Sequence[str]] = None,
+             error: Optional[str] = None) -> None:
+        entry = self.tasks.setdefault(label, {"attempts": 0})
+        if state == "queued":
+            entry["attempts"] = 0
+            entry.pop("error", None)
+        elif state == "running" and entry.get("state") != "running":
+            entry["attempts"] = entry.get("attempts", 0) + 1
+        entry["state"] = state
+        if parts is not None:
+            entry["parts"] = list(parts)
+        if error is not None:
+            entry["error"] = error
+        entry["updated"] = _now()
+        self.save()
+
+    def save(self) -> None:
+        try:
+            write_json_atomic(self.path, self.data)
+        except OSError as e:
+            print(f"[MAIN] WARN: cannot write {self.path}: {e}")
+
+
+class RetryPolicy:
+    """Up to `retries` more attempts for transient failures, `backoff` * 2^n seconds apart."""
+
+    def __init__(self, retries: int = 0, backoff: float = 30.0,
+                 patterns: Sequence[str] = TRANSIENT_PATTERNS):
+        self.retries = retries
+        self.backoff = backoff
+        self._re = re.compile("|".join(f"(?:{p})" for p in patterns), re.M)
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number `retry` (1-based)."""
+        return self.backoff * (2 ** (retry - 1))
+
+    def transient(self, log_path: Path, last_command: bool = False) -> Optional[str]:
+        """
+        The log line that marks the failure as transient, or None. With
+        last_command, only the output after the last '+ ' command line (the
+        failed stage of a log shared by several stages) is considered.
+        """
+        try:
+            with open(log_path, "rb") as f:
+                f.seek(0, 2)
+                size = f.tell()
+                f.seek(max(size - TAIL_BYTES, 0))
+                text = f.read().decode("utf-8", "ignore")
+        except OSError:
+            return None
+        if last_command:
+            cut = text.rfind("\n+ ")
+            if cut >= 0:
+                text = text[cut + 1:]
+        m = self._re.search(text)
+        if not m:
+            return None
+        start = text.rfind("\n", 0, m.start()) + 1
+        end = text.find("\n", m.end())
+        return text[start:end if end >= 0 else len(text)].strip()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Live progress of a run_experiments.py suite.
+#
+# Every task is a list of stages (its Makefile steps, run.sh then eval.sh),
+# each with an expected duration: the last recorded duration of that stage
+# for that task (run_logs/stage_durations.json), else the scheduler's
+# estimate. While the suite runs, the task logs are followed incrementally:
+#
+#   - the stage a task is in comes from the scheduler when it runs stages
+#     itself, otherwise from the make calls seen in the log (the Makefile
+#     prints "[INFO][FLOW] Using platform directory" once per top-level call)
+#   - the step within a stage from "[ORD] ..."/"[CDS] ..." lines and the tool
+#     of the latest OpenROAD message ("[INFO DRT-0195]" -> detail_route)
+#
+# A status JSON (run_logs/status.json) is rewritten atomically every few
+# seconds with per-task stage, elapsed and expected time, time since the log
+# last grew (a stuck DRT shows up there first) and the ETAs. A summary is
+# printed every --progress-interval seconds.
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+STATUS_INTERVAL = 5.0
+# Bytes of new log read per poll; the rest is picked up by later polls
+READ_LIMIT = 4 << 20
+
+_MAKE_START = "[INFO][FLOW] Using platform directory"
+_FLOW_ECHO_RE = re.compile(r"^\[(?:ORD|CDS)\] (.+?)\s*(?:\.\.\.)?\s*$")
+_TOOL_RE = re.compile(r"\[(?:INFO|WARNING|ERROR) ([A-Z]{3})-\d+\]")
+
+# OpenROAD message prefixes -> step shown in the status
+TOOL_STEPS = {
+    "IFP": "floorplan", "PPL": "io_placement", "TAP": "tapcell", "PDN": "pdn",
+    "GPL": "global_place", "DPL": "detail_place", "RSZ": "resize", "CTS": "cts",
+    "GRT": "global_route", "DRT": "detail_route", "ANT": "antenna", "PAR": "partition",
+    "FLW": "flow", "RCX": "extraction", "PSM": "power_grid", "STA": "timing",
+}
+
+
+def _fmt_secs(secs: Optional[float]) -> str:
+    if secs is None:
+        return "?"
+    secs = int(secs)
+    if secs >= 3600:
+        return f"{secs // 3600}h{secs % 3600 // 60:02d}m"
+    if secs >= 60:
+        return f"{secs // 60}m{secs % 60:02d}s"
+    return f"{secs}s"
+
+
+def _iso(t: Optional[float]) -> Optional[str]:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t)) if t is not None else None
+
+
+def write_json_atomic(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+class LogFollower:
+    """Complete lines appended to a log since the last call; starts over if the log is replaced or truncated."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+        self.ino = None
+        self.partial = b""
+        self.mtime: Optional[float] = None
+
+    def read_lines(self, since: float = 0.0) -> List[str]:
+        """New lines, ignoring a log last written before since (left from an earlier suite)."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+        if st.st_mtime < since:
+            return []
+        if st.st_ino != self.ino or st.st_size < self.offset:
+            self.ino, self.offset, self.partial = st.st_ino, 0, b""
+        self.mtime = st.st_mtime
+        if st.st_size == self.offset:
+            return []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read(READ_LIMIT)
+        except OSError:
+            return []
+        self.offset += len(data)
+        data = self.partial + data
+        lines = data.split(b"\n")
+        self.partial = lines.pop()
+        return [line.decode("utf-8", "ignore") for line in lines]
+
+
+@dataclass
+class StageRecord:
+    name: str
+    expected: Optional[float]
+    status: str = "pending"  # pending, running, done, failed, cached
+    started: Optional[float] = None
+    seconds: Optional[float] = None
+
+
+@dataclass
+class TaskProgress:
+    label: str
+    stages: List[StageRecord]
+    logs: List[Tuple[LogFollower, int]]  # (log, index of its first stage)
+    make_stages: Optional[List[int]]  # stages that are make calls; None: the scheduler reports stages
+    state: str = "queued"  # queued, running, waiting (between stages), done, failed, pruned
+    current: Optional[int] = None
+    step: Optional[str] = None
+    makes_seen: Dict[int, int] = field(default_factory=dict)  # per log
+
+    def remaining(self, now: float) -> Optional[float]:
+        total = 0.0
+        for i, stage in enumerate(self.stages):
+            if stage.status in ("done", "failed", "cached"):
+                continue
+            if stage.expected is None:
+                return None
+            if i == self.current and stage.started is not None:
+                total += max(stage.expected - (now - stage.started), 0.0)
+            else:
+                total += stage.expected
+        return total if self.state in ("queued", "running", "waiting") else 0.0
+
+
+class StageDurations:
+    """Last successful duration of every stage of every task, kept across suites."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            with path.open(encoding="utf-8") as f:
+                self.data: Dict[str, Dict[str, float]] = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, label: str, stage: str) -> Optional[float]:
+        return self.data.get(label, {}).get(stage)
+
+    def record(self, label: str, stage: str, seconds: float) -> None:
+        self.data.setdefault(label, {})[stage] = round(seconds, 1)
+
+    def save(self) -> None:
+        try:
+            write_json_atomic(self.path, self.data)
+        except OSError as e:
+            print(f"[MAIN] WARN: cannot write {self.path}: {e}")
+
+
+class SuiteProgress:
+    """Progress and ETAs of all tasks of a suite (see module header)."""
+
+    def __init__(self, status_path: Path, durations: StageDurations, jobs: int,
+                 print_interval: float = 0.0):
+        self.status_path = status_path
+        self.durations = durations
+        self.jobs = max(jobs, 1)
+        self.print_interval = print_interval
+        self.started = time.time()
+        self.tasks: Dict[object, TaskProgress] = {}
+        self._last_status = 0.0
+        self._last_print = self.started
+
+    def add_task(self, key, label: str, stages: Sequence[Tuple[str, Optional[float], bool]],
+                 logs: Sequence[Tuple[Path, int]], from_logs: bool) -> None:
+        """
+        stages: (name, estimate, is a make call) in order; logs: (path, index
+        of its first stage). With from_logs, stage changes are inferred from
+        the logs instead of reported through stage_started/stage_finished.
+        """
+        records = []
+        for name, estimate, _ in stages:
+            recorded = self.durations.get(label, name)
+            records.append(StageRecord(name, recorded if recorded is not None else estimate))
+        make_stages = [i for i, (_, _, is_make) in enumerate(stages) if is_make] if from_logs else None
+        self.tasks[key] = TaskProgress(label, records, [(LogFollower(p), i) for p, i in logs], make_stages)
+
+    def expected(self, key, index: int) -> Optional[float]:
+        return self.tasks[key].stages[index].expected
+
+    # Scheduler events
+    def stage_started(self, key, index: int, now: Optional[float] = None) -> None:
+        task = self.tasks[key]
+        now = now or time.time()
+        if task.current is not None and task.stages[task.current].status == "running":
+            self._finish(task, task.current, True, now - (task.stages[task.current].started or now))
+        task.state = "running"
+        task.current = index
+        task.step = None
+        stage = task.stages[index]
+        stage.status, stage.started = "running", now
+
+    def stage_finished(self, key, index: int, ok: bool, seconds: float) -> None:
+        task = self.tasks[key]
+        self._finish(task, index, ok, seconds)
+        if task.state == "running":
+            task.state = "waiting"
+
+    def stages_cached(self, key, indices: Sequence[int]) -> None:
+        for i in indices:
+            self.tasks[key].stages[i].status = "cached"
+
+    def task_finished(self, key, ok: bool, state: Optional[str] = None) -> None:
+        task = self.tasks[key]
+        if ok and task.current is not None and task.stages[task.current].status == "running":
+            stage = task.stages[task.current]
+            self._finish(task, task.current, True, time.time() - (stage.started or time.time()))
+        elif not ok and task.current is not None and task.stages[task.current].status == "running":
+            self._finish(task, task.current, False, time.time() - (task.stages[task.current].started or 0))
+        if ok:
+            # Stages the logs did not show (e.g. no banner) still ran
+            for stage in task.stages:
+                if stage.status == "pending":
+                    stage.status = "done"
+        task.state = state or ("done" if ok else "failed")
+        task.step = None
+
+    def stage_retrying(self, key, index: int) -> None:
+        """A failed stage is queued again."""
+        task = self.tasks[key]
+        task.stages[index].status = "pending"
+        task.state, task.step = "waiting", None
+
+    def task_retrying(self, key) -> None:
+        """A failed task is queued again and will start over with fresh logs."""
+        task = self.tasks[key]
+        for stage in task.stages:
+            if stage.status != "cached":
+                stage.status, stage.started, stage.seconds = "pending", None, None
+        task.state, task.current, task.step = "queued", None, None
+        task.makes_seen.clear()
+
+    def _finish(self, task: TaskProgress, index: int, ok: bool, seconds: float) -> None:
+        stage = task.stages[index]
+        stage.status = "done" if ok else "failed"
+        stage.seconds = seconds
+        if ok:
+            self.durations.record(task.label, stage.name, seconds)
+
+    # Log following
+    def poll(self) -> None:
+        now = time.time()
+        for key, task in self.tasks.items():
+            if task.state in ("done", "failed", "pruned"):
+                continue
+            for n, (follower, first) in enumerate(task.logs):
+                for line in follower.read_lines(self.started):
+                    self._scan(key, task, n, first, line, now)
+
+    def _scan(self, key, task: TaskProgress, n: int, first: int, line: str, now: float) -> None:
+        if task.make_stages is not None and line.startswith(_MAKE_START):
+            # The k-th make call of this log is its k-th make stage
+            seen = task.makes_seen.get(n, 0)
+            task.makes_seen[n] = seen + 1
+            makes = [i for i in task.make_stages if i >= first]
+            if seen < len(makes):
+                self.stage_started(key, makes[seen], now)
+            return
+        m = _FLOW_ECHO_RE.match(line)
+        if m:
+            task.step = m.group(1)
+            return
+        m = _TOOL_RE.search(line)
+        if m:
+            task.step = TOOL_STEPS.get(m.group(1), m.group(1))
+
+    # Reports
+    def snapshot(self) -> dict:
+        now = time.time()
+        tasks = []
+        remaining_total = 0.0
+        remaining_max = 0.0
+        unknown = False
+        for task in self.tasks.values():
+            remaining = task.remaining(now)
+            if remaining is None:
+                unknown = True
+            else:
+                remaining_total += remaining
+                remaining_max = max(remaining_max, remaining)
+            cur = task.stages[task.current] if task.current is not None else None
+            last_output = max((f.mtime for f, _ in task.logs if f.mtime), default=None)
+            tasks.append({
+                "task": task.label,
+                "state": task.state,
+                "stage": cur.name if cur and task.state == "running" else None,
+                "step": task.step,
+                "stage_elapsed": round(now - cur.started, 1) if cur and cur.started and cur.status == "running" else None,
+                "stage_expected": round(cur.expected, 1) if cur and cur.expected is not None else None,
+                "stages_done": sum(s.status in ("done", "cached") for s in task.stages),
+                "stages_total": len(task.stages),
+                "last_output_age": round(now - last_output, 1) if last_output and task.state == "running" else None,
+                "eta_seconds": round(remaining, 1) if remaining is not None else None,
+                "logs": [str(f.path) for f, _ in task.logs],
+                "stages": [{"name": s.name, "status": s.status, "seconds": s.seconds and round(s.seconds, 1),
+                            "expected": s.expected and round(s.expected, 1)} for s in task.stages],
+            })
+        # Work is spread over the pool, but no task finishes before its own chain
+        eta = None if unknown else max(remaining_max, remaining_total / self.jobs)
+        return {
+            "started": _iso(self.started),
+            "updated": _iso(now),
+            "elapsed": round(now - self.started, 1),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "eta": _iso(now + eta) if eta is not None else None,
+            "tasks": tasks,
+        }
+
+    def report(self, force: bool = False) -> None:
+        """Poll the logs, then write the status JSON / print a summary when due."""
+        now = time.time()
+        status_due = force or now - self._last_status >= STATUS_INTERVAL
+        print_due = self.print_interval > 0 and now - self._last_print >= self.print_interval
+        if not (status_due or print_due):
+            return
+        self.poll()
+        status = self.snapshot()
+        if status_due:
+            self._last_status = now
+            try:
+                write_json_atomic(self.status_path, status)
+            except OSError as e:
+                print(f"[MAIN] WARN: cannot write {self.status_path}: {e}")
+        if print_due:
+            self._last_print = now
+            self.print_summary(status)
+
+    @staticmethod
+    def print_summary(status: dict) -> None:
+        done = sum(t["stages_done"] for t in status["tasks"])
+        total = sum(t["stages_total"] for t in status["tasks"])
+        running = [t for t in status["tasks"] if t["state"] == "running"]
+        eta = f"ETA {status['eta'][11:]} ({_fmt_secs(status['eta_seconds'])} left)" \
+            if status["eta"] else "ETA unknown"
+        print(f"[MAIN] progress: {done}/{total} stages, {len(running)} running, "
+              f"{_fmt_secs(status['elapsed'])} elapsed, {eta}")
+        for t in running:
+            step = f" [{t['step']}]" if t["step"] else ""
+            quiet = f", quiet {_fmt_secs(t['last_output_age'])}" \
+                if t["last_output_age"] is not None and t["last_output_age"] >= 60 else ""
+            print(f"[MAIN]   {t['task']}: {t['stage']}{step} {_fmt_secs(t['stage_elapsed'])}"
+                  f" / ~{_fmt_secs(t['stage_expected'])}{quiet}")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Early termination of hopeless sweep points.
+#
+# Once a sweep point has been through global route, two numbers already tell
+# a lot about how it will end up:
+#
+#   timing    achieved clock period, period - worst slack (FLW-0007/0009 in
+#             5_1_grt.log, from write_ref_sdc.tcl), or -slack without a period
+#   overflow  global routing overflow (Total row of the final GRT congestion
+#             report in 5_1_grt.log)
+#
+# 5_*.json metrics files in LOG_DIR, when the flow writes them, fill in what
+# the log does not show. Lower is better for both. Point P is dominated by Q
+# when Q is no worse on every metric and P is worse by more than `margin`
+# (relative: p > q + margin * |q|) on at least one. Dominated points that are
+# still running are stopped before detailed route, the most expensive stage,
+# and points are only ever compared within one (flow, tech, case).
+# -----------------------------------------------------------------------------
+
+import glob
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple
+
+GRT_LOG = "5_1_grt.log"
+READ_LIMIT = 8 * 1024 * 1024
+
+_PERIOD_RE = re.compile(r"^\[INFO FLW-0007\] clock \S+ period (\S+)", re.M)
+_SLACK_RE = re.compile(r"^\[INFO FLW-0009\] Clock \S+ slack (\S+)", re.M)
+_OVERFLOW_RE = re.compile(r"^Total\s.*?(\d+)\s*$", re.M)
+_DONE_RE = re.compile(r"^Elapsed(?: time)?:", re.M)
+_BANNER_RE = re.compile(r"^OpenROAD v", re.M)
+_JSON_SLACK_KEYS = ("globalroute__timing__setup__ws", "globalroute__timing__clock__slack")
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def grt_metrics(log_dir: Path, since: float = 0.0) -> Optional[Dict[str, float]]:
+    """
+    {"timing": ..., "overflow": ...} (whichever are known) once global route
+    of the design in log_dir has finished; None before. Files older than
+    `since` (left over from an earlier run) are ignored.
+    """
+    metrics: Dict[str, float] = {}
+    done = False
+    log_path = log_dir / GRT_LOG
+    try:
+        if log_path.stat().st_mtime >= since:
+            with open(log_path, "rb") as f:
+                text = f.read(READ_LIMIT).decode("utf-8", "ignore")
+            # tee -a: only the last run of global_route in this log counts
+            banners = [m.start() for m in _BANNER_RE.finditer(text)]
+            text = text[banners[-1]:] if banners else text
+            done = bool(_DONE_RE.search(text) or _SLACK_RE.search(text))
+            periods = _PERIOD_RE.findall(text)
+            slacks = _SLACK_RE.findall(text)
+            overflows = _OVERFLOW_RE.findall(text)
+            slack = _float(slacks[-1]) if slacks else None
+            period = _float(periods[-1]) if periods else None
+            if slack is not None:
+                metrics["timing"] = period - slack if period is not None else -slack
+            if overflows:
+                metrics["overflow"] = float(overflows[-1])
+    except OSError:
+        pass
+    for path in sorted(glob.glob(str(log_dir / "5_*.json"))):
+        try:
+            if os.path.getmtime(path) < since:
+                continue
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not isinstance(data, dict):
+            continue
+        done = True
+        slack = next((_float(data[k]) for k in _JSON_SLACK_KEYS if k in data), None)
+        if "timing" not in metrics and slack is not None:
+            metrics["timing"] = -slack
+        if "overflow" not in metrics:
+            for key, value in data.items():
+                if key.startswith("globalroute__") and "overflow" in key and _float(value) is not None:
+                    metrics["overflow"] = _float(value)
+                    break
+    return metrics if done and metrics else None
+
+
+def _worse(p: float, q: float, margin: float) -> bool:
+    return p > q + margin * abs(q)
+
+
+def dominates(q: Dict[str, float], p: Dict[str, float], margin: float) -> bool:
+    """Whether q dominates p by more than margin (see module header)."""
+    shared = [k for k in p if k in q]
+    if not shared or any(q[k] > p[k] for k in shared):
+        return False
+    return any(_worse(p[k], q[k], margin) for k in shared)
+
+
+@dataclass
+class SweepPoint:
+    group: Hashable
+    label: str
+    log_dir: Path
+    since: float = 0.0  # when the point started; older files are stale
+    metrics: Optional[Dict[str, float]] = None
+    finished: bool = False
+    failed: bool = False  # a failed point proves nothing about the others
+    pruned_by: Optional[str] = None
+
+
+@dataclass
+class SweepPruner:
+    """Tracks the GRT metrics of every sweep point and picks the dominated ones."""
+
+    margin: float
+    points: Dict[Hashable, SweepPoint] = field(default_factory=dict)
+
+    def add(self, key: Hashable, group: Hashable, label: str, log_dir: Path) -> None:
+        self.points[key] = SweepPoint(group, label, log_dir)
+
+    def started(self, key: Hashable, now: float) -> None:
+        point = self.points.get(key)
+        if point is not None and not point.since:
+            point.since = now
+
+    def finished(self, key: Hashable, ok: bool) -> None:
+        point = self.points.get(key)
+        if point is not None:
+            point.finished, point.failed = True, not ok
+
+    def poll(self) -> List[Tuple[Hashable, str]]:
+        """Read new GRT metrics; return (key, reason) of unfinished points now dominated."""
+        fresh = False
+        for point in self.points.values():
+            if point.metrics is None and point.since and point.pruned_by is None:
+                point.metrics = grt_metrics(point.log_dir, point.since)
+                fresh = fresh or point.metrics is not None
+        if not fresh:
+            return []
+        out = []
+        for key, p in self.points.items():
+            if p.metrics is None or p.finished or p.pruned_by is not None:
+                continue
+            for q in self.points.values():
+                if q is not p and q.group == p.group and q.metrics is not None and not q.failed \
+                        and dominates(q.metrics, p.metrics, self.margin):
+                    p.pruned_by = q.label
+                    out.append((key, f"dominated by {q.label}: {_fmt(p.metrics)} vs {_fmt(q.metrics)}"))
+                    break
+        return out
+
+
+def _fmt(metrics: Dict[str, float]) -> str:
+    return " ".join(f"{k}={v:g}" for k, v in sorted(metrics.items()))
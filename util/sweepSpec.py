@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Parameter sweeps for run_experiments.py.
+#
+# A sweep is a list of points; each point is a set of environment variables
+# (hbPitch, PAR_BAL_LO/HI, CLK_PERIOD, ...) that the task's run.sh/eval.sh
+# see on top of the suite environment. Every (flow, tech, case) task is run
+# once per point, on the same pool as any other task.
+#
+# A spec file is JSON, either a list of points or an object with
+#
+#   "product": {"VAR": VALUES, ...}   cartesian product over the variables
+#   "points":  [{"VAR": "value", ...}, ...]   explicit points
+#
+# (with both, every product point is combined with every listed point).
+# VALUES is a list, or a string "a,b,c" or an inclusive range "start:stop:step"
+# such as "1.01:0.51:-0.05" (decimal steps, no float rounding), as accepted by
+# --sweep-var VAR=VALUES on the command line.
+# -----------------------------------------------------------------------------
+
+import itertools
+import json
+import re
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+Point = Tuple[Tuple[str, str], ...]
+
+_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_TAG_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._+=,-]")
+
+
+def parse_values(spec: Union[str, Sequence]) -> List[str]:
+    """Values of one variable: a list, "a,b,c" or "start:stop:step"."""
+    if isinstance(spec, (list, tuple)):
+        return [str(v) for v in spec]
+    spec = str(spec)
+    if spec.count(":") == 2 and "," not in spec:
+        try:
+            start, stop, step = (Decimal(x) for x in spec.split(":"))
+        except InvalidOperation:
+            raise ValueError(f"bad range '{spec}' (expected start:stop:step)")
+        if step == 0 or (stop - start) * step < 0:
+            raise ValueError(f"range '{spec}' never reaches its end")
+        values = []
+        v = start
+        while (v <= stop) if step > 0 else (v >= stop):
+            values.append(str(v))
+            v += step
+        return values
+    return [v for v in spec.split(",") if v != ""]
+
+
+def parse_sweep_var(arg: str) -> Tuple[str, List[str]]:
+    """--sweep-var NAME=VALUES"""
+    name, sep, values = arg.partition("=")
+    if not sep or not _NAME_RE.match(name):
+        raise ValueError(f"bad --sweep-var '{arg}' (expected NAME=v1,v2,... or NAME=start:stop:step)")
+    parsed = parse_values(values)
+    if not parsed:
+        raise ValueError(f"--sweep-var '{arg}' has no values")
+    return name, parsed
+
+
+def expand(product: Dict[str, List[str]], points: Sequence[Dict[str, str]] = ()) -> List[Point]:
+    """All points: the cartesian product, each combined with every explicit point."""
+    names = list(product)
+    grid = [tuple(zip(names, values)) for values in itertools.product(*(product[n] for n in names))]
+    extra = [tuple((str(k), str(v)) for k, v in p.items()) for p in points] or [()]
+    out: List[Point] = []
+    for g in grid:
+        for e in extra:
+            point = dict(g)
+            point.update(e)
+            key = tuple(point.items())
+            if key not in out:
+                out.append(key)
+    return out
+
+
+def load_sweep(path: Path) -> List[Point]:
+    with path.open(encoding="utf-8") as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        spec = {"points": spec}
+    if not isinstance(spec, dict) or not set(spec) <= {"product", "points"}:
+        raise ValueError(f"{path}: expected a list of points or {{\"product\": ..., \"points\": ...}}")
+    product = {}
+    for name, values in spec.get("product", {}).items():
+        if not _NAME_RE.match(name):
+            raise ValueError(f"{path}: bad variable name '{name}'")
+        product[name] = parse_values(values)
+    points = spec.get("points", [])
+    for p in points:
+        if not isinstance(p, dict) or not all(_NAME_RE.match(k) for k in p):
+            raise ValueError(f"{path}: bad point {p!r}")
+    return expand(product, points)
+
+
+def point_tag(point: Point) -> str:
+    """File-name-safe name of a point: VAR=value,VAR=value"""
+    return _TAG_UNSAFE_RE.sub("_", ",".join(f"{k}={v}" for k, v in point))